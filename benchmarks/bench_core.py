@@ -0,0 +1,412 @@
+"""Набор бенчмарков основных частей программы (без экрана, на Linux тоже).
+
+Меряет:
+    tree_load          - построение дерева узлов SnippetTree из JSON-профиля
+    flat_index_*       - построение плоского порядка ротации и правку в нём
+    store_load         - загрузка SnippetStore без Qt (индексы без модели и окна)
+    store_edit         - правка в папке окна выбора через SnippetStore
+    store_rotate       - следующий текст ротации из SnippetStore
+    search[...]        - запросы к поисковому индексу окна выбора на SEARCH_SIZE
+                         текстах; дольше SEARCH_BUDGET_MS - ошибка
+    load_config        - чтение конфигурации с перестройкой индексов и модели
+    save_config        - полная запись конфигурации
+    popup_init         - создание окна выбора
+    popup_update       - update_text_list (список папок и поиск)
+    main_list_update   - update_main_list_widget с раскладкой списка
+    apply_theme        - смена темы главного окна
+    apply_theme_same   - повторное применение той же темы
+    paste_events       - число событий клавиатуры на одну вставку по длине текста
+    import_text_rotator - время импорта text_rotator в новом процессе
+    import_snippet_store - время импорта ядра models.snippet_store (без Qt)
+
+Qt работает с платформой offscreen, keyboard заменён счётчиком событий,
+буфер обмена подтверждается сразу, конфигурация пишется во временный
+домашний каталог. Результаты сохраняются в JSON и сравниваются с
+сохранённым эталоном (benchmarks/baseline.json). Бенчмарк без записи в
+эталоне - ошибка: его ухудшение иначе прошло бы незамеченным.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_core.py [--sizes 1000 10000 100000] [--output results.json]
+    python benchmarks/bench_core.py --update-baseline   # перезаписать эталон
+    python benchmarks/bench_core.py --allow-missing     # только предупредить об отсутствующих в эталоне
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(ROOT, "benchmarks", "baseline.json")
+NOISE_FLOOR_MS = 0.05 # Меньшие абсолютные разницы не считаются ухудшением
+SEARCH_SIZE = 50000
+SEARCH_BUDGET_MS = 5.0 # Запрос при наборе в окне выбора
+# Частое слово, одна буква (и её вариант в другой раскладке), два слова,
+# опечатка, другая раскладка, номер
+SEARCH_QUERIES = ("привет", "d", "доставка оплата", "дотсавка", "ghbdtn", "12345")
+sys.path.insert(0, ROOT)
+
+
+class CountingKeyboard:
+    """Заглушка модуля keyboard: считает синтетические события."""
+
+    def __init__(self):
+        self.events = 0
+
+    def press(self, key):
+        self.events += 1
+
+    def release(self, key):
+        self.events += 1
+
+    def press_and_release(self, key):
+        self.events += 2
+
+
+def prepare_environment(home):
+    """Окружение без экрана: offscreen Qt, временный HOME, заглушка winreg вне Windows."""
+    os.environ["QT_QPA_PLATFORM"] = "offscreen"
+    os.environ["HOME"] = home
+    os.environ["USERPROFILE"] = home
+    os.environ.pop("TEXT_ROTATOR_STORAGE", None)
+    if sys.platform != "win32":
+        sys.modules.setdefault("winreg", types.ModuleType("winreg"))
+    os.chdir(ROOT) # resource_path ищет assets относительно текущего каталога
+    logging.basicConfig(level=logging.WARNING)
+
+
+WORDS = ("привет спасибо пожалуйста заказ доставка оплата возврат адрес телефон почта "
+         "hello thanks please order delivery payment refund address phone email").split()
+
+
+def make_profile(count, rng, folder_size=50):
+    """Синтетический профиль: десятая часть текстов в корне, остальные - в папках с подпапками."""
+    items = []
+    made = 0
+
+    def text():
+        nonlocal made
+        made += 1
+        return f"{made}. " + " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 20)))
+
+    for _ in range(count // 10):
+        items.append(text())
+    while made < count:
+        folder = {'type': 'folder', 'name': f"Папка {len(items)}", 'items': []}
+        for _ in range(min(folder_size, count - made)):
+            if rng.random() < 0.1 and made + 5 <= count:
+                folder['items'].append({'type': 'folder', 'name': f"Подпапка {made}",
+                                        'items': [text() for _ in range(5)]})
+            else:
+                folder['items'].append(text())
+        items.append(folder)
+    return items
+
+
+def timed(function, repeat):
+    """Медиана времени вызова function() в миллисекундах."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {'ms': round(statistics.median(samples), 3), 'runs': repeat}
+
+
+def repeat_for(size):
+    return 3 if size >= 100000 else 5 if size >= 10000 else 10
+
+
+def bench_flat_index(results, size, rng):
+    from models.flat_index import FlatIndex
+    from models.snippet_tree import SnippetTree
+    raw = make_profile(size, rng)
+    tree = SnippetTree()
+    results[f"tree_load[n={size}]"] = timed(lambda: tree.load({'rotation': raw}), repeat_for(size))
+    profile = tree.roots['rotation'].items
+    results[f"flat_index_rebuild[n={size}]"] = timed(lambda: FlatIndex(profile), repeat_for(size))
+    index = FlatIndex(profile)
+    folder_path = next(row for row, item in enumerate(profile) if item.is_folder)
+
+    def edit():
+        for op in ({'op': 'add', 'profile': 'rotation', 'path': [folder_path, 0], 'value': "новый текст"},
+                   {'op': 'delete', 'profile': 'rotation', 'path': [folder_path, 0]}):
+            tree.apply(op)
+            index.update(op)
+
+    results[f"flat_index_edit[n={size}]"] = timed(edit, 100)
+    results[f"flat_index_lookup[n={size}]"] = timed(lambda: index.text_at(len(index) // 2), 1000)
+
+
+def write_config(path, size, rng):
+    """Записывает конфигурацию из двух синтетических профилей по size/2 текстов."""
+    from models.config_codec import default_state, encode_config
+    state = default_state()
+    state['data_rotation'] = make_profile(size // 2, rng)
+    state['data_popup'] = make_profile(size - size // 2, rng)
+    for suffix in (".journal", ".cursors"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(encode_config(state))
+
+
+def bench_store(results, size, rng):
+    """Ядро без окна: загрузка, правка и ротация через SnippetStore."""
+    from models.snippet_store import SnippetStore
+    path = os.path.join(os.environ["HOME"], "store_bench.json")
+    write_config(path, size, rng)
+    store = SnippetStore(path)
+    try:
+        results[f"store_load[n={size}]"] = timed(store.load, repeat_for(size))
+        folder_path = next(row for row, item in enumerate(store.profile('popup')) if item.is_folder)
+
+        def edit():
+            store.apply({'op': 'add', 'profile': 'popup', 'path': [folder_path, 0], 'value': "новый текст"})
+            store.apply({'op': 'delete', 'profile': 'popup', 'path': [folder_path, 0]})
+
+        results[f"store_edit[n={size}]"] = timed(edit, 100)
+        results[f"store_rotate[n={size}]"] = timed(lambda: store.next_in_profile('rotation'), 1000)
+    finally:
+        store.close()
+
+
+def bench_search(results, rng):
+    """Поиск без окна: SearchIndex над профилем из SEARCH_SIZE текстов."""
+    from models.search_index import SearchIndex
+    from models.snippet_tree import SnippetTree
+    tree = SnippetTree()
+    tree.load({'popup': make_profile(SEARCH_SIZE, rng)})
+    index = SearchIndex()
+    index.rebuild(tree.roots['popup'].items)
+    results[f"search_build[n={SEARCH_SIZE}]"] = timed(index.ensure_built, 1)
+    for query in SEARCH_QUERIES:
+        results[f"search[n={SEARCH_SIZE},q={query}]"] = timed(lambda: index.search(query), 20)
+
+
+def bench_app(results, window, size, rng):
+    from ui.text_selection_popup import TextSelectionPopup
+
+    window.flush_config()
+    write_config(window.config_file, size, rng)
+    repeat = repeat_for(size)
+
+    results[f"load_config[n={size}]"] = timed(window.load_config, repeat)
+
+    def save():
+        window.write_config()
+        window.store.flush()
+
+    results[f"save_config[n={size}]"] = timed(save, repeat)
+
+    popups = []
+
+    def build_popup():
+        popups.append(TextSelectionPopup(window.snippet_model, lambda text: None, search_index=window.store.search_index))
+
+    results[f"popup_init[n={size}]"] = timed(build_popup, repeat)
+    popup = popups[-1]
+    results[f"popup_update[n={size}]"] = timed(popup.update_text_list, repeat)
+
+    def search():
+        popup.search_edit.blockSignals(True)
+        popup.search_edit.setText("доставка оплата")
+        popup.search_edit.blockSignals(False)
+        popup.update_text_list()
+
+    results[f"popup_search[n={size}]"] = timed(search, repeat)
+    for item in popups:
+        item.deleteLater()
+
+    def main_list():
+        window.use_popup = not window.use_popup
+        window.update_main_list_widget()
+        window.main_list_widget.doItemsLayout()
+
+    results[f"main_list_update[n={size}]"] = timed(main_list, repeat)
+
+    def theme():
+        window.apply_theme("light" if window.is_dark_theme else "dark") # Каждый раз другая тема
+
+    results[f"apply_theme[n={size}]"] = timed(theme, repeat)
+    # Повторное применение той же темы (активация окна в режиме «Авто»)
+    results[f"apply_theme_same[n={size}]"] = timed(lambda: window.apply_theme(), repeat)
+
+
+def bench_paste_events(results):
+    import models.paste_worker as paste_worker_module
+    from models.paste_worker import PasteJob, PasteWorker
+
+    # Отдельный незапущенный поток вставки: задания выполняются прямо здесь,
+    # а у рабочего экземпляра окна буфер обмена подключён через очередь GUI
+    worker = PasteWorker()
+    backend = CountingKeyboard()
+    original = paste_worker_module.keyboard
+    paste_worker_module.keyboard = backend
+    # Подтверждаем буфер обмена сразу, без ожидания GUI-потока
+    worker.clipboard_requested.connect(worker.timing.notify_clipboard_text)
+    try:
+        for length in (10, 64, 200, 2000, 20000):
+            text = ("lorem ipsum dolor sit amet\n" * (length // 27 + 1))[:length]
+            for select in (True, False):
+                if select and not worker.selection_engine.plan_select(text):
+                    raise AssertionError(f"Вставка ротации длиной {length} осталась бы невыделенной")
+                backend.events = 0
+                presses = 3
+                start = time.perf_counter()
+                for _ in range(presses):
+                    worker._execute(PasteJob(text, select))
+                mode = "rotation" if select else "popup"
+                results[f"paste_events[{mode},len={length}]"] = {
+                    'events': backend.events // presses,
+                    'ms': round((time.perf_counter() - start) * 1000 / presses, 3),
+                }
+    finally:
+        paste_worker_module.keyboard = original
+
+
+# Модуль для импорта передаётся первым аргументом
+IMPORT_PROBE = """
+import importlib, sys, types
+if sys.platform != "win32":
+    sys.modules.setdefault("winreg", types.ModuleType("winreg"))
+from utils.import_profile import ImportProfiler
+profiler = ImportProfiler().install()
+importlib.import_module(sys.argv[1])
+profiler.uninstall()
+print(profiler.total_ms(), 'PyQt5' in sys.modules)
+"""
+
+
+def bench_import(results, repeat=5):
+    """Медиана времени импорта text_rotator и ядра в новом интерпретаторе (по ImportProfiler)."""
+    for module, key in (("text_rotator", "import_text_rotator"), ("models.snippet_store", "import_snippet_store")):
+        samples = []
+        for _ in range(repeat):
+            output = subprocess.run([sys.executable, "-c", IMPORT_PROBE, module], cwd=ROOT, capture_output=True,
+                                    text=True, check=True).stdout
+            total_ms, uses_qt = output.split()[-2:]
+            samples.append(float(total_ms))
+        results[key] = {'ms': round(statistics.median(samples), 3), 'runs': repeat, 'qt': uses_qt == "True"}
+
+
+def compare(results, baseline, threshold):
+    """Печатает сравнение с эталоном. Возвращает (ухудшения, бенчмарки без эталона)."""
+    regressions = []
+    missing = []
+    print(f"{'benchmark':<40}{'baseline':>12}{'current':>12}{'ratio':>8}")
+    for name, current in results.items():
+        reference = baseline.get(name)
+        metric = 'events' if 'events' in current else 'ms'
+        value = current[metric]
+        if reference is None or metric not in reference:
+            print(f"{name:<40}{'-':>12}{value:>12}{'':>8}  ?")
+            missing.append(name)
+            continue
+        base = reference[metric]
+        ratio = value / base if base else float('inf') if value else 1.0
+        if metric == 'events':
+            worse = value > base
+        else: # Разница в доли микросекунд - шум таймера, а не ухудшение
+            worse = ratio > threshold and value - base > NOISE_FLOOR_MS
+        mark = "  !" if worse else ""
+        print(f"{name:<40}{base:>12}{value:>12}{ratio:>8.2f}{mark}")
+        if worse:
+            regressions.append(name)
+    return regressions, missing
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help="Число текстов в конфигурации")
+    parser.add_argument('--output', default=None, help="Куда записать результаты (JSON)")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="Эталон для сравнения")
+    parser.add_argument('--update-baseline', action='store_true', help="Записать результаты как новый эталон")
+    parser.add_argument('--allow-missing', action='store_true',
+                        help="Не считать ошибкой бенчмарки, которых нет в эталоне")
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help="Во сколько раз медленнее эталона считать ухудшением")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    home = tempfile.mkdtemp(prefix="text_rotator_bench_")
+    prepare_environment(home)
+    from PyQt5 import QtCore, QtWidgets
+    QtCore.qInstallMessageHandler(lambda *args: None) # Предупреждения платформы offscreen не нужны
+    app = QtWidgets.QApplication(sys.argv[:1])
+    import text_rotator
+
+    rng = random.Random(args.seed)
+    results = {}
+    window = text_rotator.TextRotator()
+    try:
+        for size in args.sizes:
+            print(f"n = {size}...", file=sys.stderr)
+            bench_flat_index(results, size, rng)
+            bench_store(results, size, rng)
+            bench_app(results, window, size, rng)
+            app.processEvents()
+        bench_search(results, rng)
+        bench_paste_events(results)
+        bench_import(results)
+    finally:
+        window.hotkey_dispatcher.stop()
+        window.paste_worker.stop()
+        window.flush_config()
+        window.store.close()
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'qt': QtCore.QT_VERSION_STR,
+            'sizes': args.sizes,
+            'seed': args.seed,
+            'time': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f).get('results', {})
+    else:
+        print(f"ВНИМАНИЕ: эталон {args.baseline} не найден", file=sys.stderr)
+    regressions, missing = compare(results, baseline, args.threshold)
+    over_budget = [name for name, result in results.items()
+                   if name.startswith("search[") and result['ms'] > SEARCH_BUDGET_MS]
+    if over_budget:
+        print(f"Дольше {SEARCH_BUDGET_MS} мс: {', '.join(over_budget)}")
+        sys.exit(1) # Такой эталон записывать нельзя
+
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Эталон записан в {args.baseline}")
+        return
+    failed = False
+    if missing:
+        print(f"ВНИМАНИЕ: нет в эталоне ({len(missing)}): {', '.join(missing)}\n"
+              f"Перезапишите эталон: python benchmarks/bench_core.py --update-baseline", file=sys.stderr)
+        failed = not args.allow_missing
+    if regressions:
+        print(f"Ухудшения относительно эталона: {', '.join(regressions)}")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Бенчмарк выделения вставленного текста в режиме ротации.
+
+Считает число синтетических событий клавиатуры на одно нажатие горячей
+клавиши для текстов разной длины и оценивает время их отправки. Старый
+посимвольный алгоритм приведён для сравнения.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_paste_selection.py [--event-cost-ms 0.5]
+"""
+import argparse
+import functools
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.selection_engine import SelectionEngine, run_steps
+
+
+class CountingBackend:
+    """Заглушка keyboard: считает события и имитирует стоимость SendInput."""
+
+    def __init__(self, event_cost_s):
+        self.event_cost_s = event_cost_s
+        self.events = 0
+
+    def _emit(self):
+        self.events += 1
+        if self.event_cost_s:
+            time.sleep(self.event_cost_s)
+
+    def press(self, key):
+        self._emit()
+
+    def release(self, key):
+        self._emit()
+
+    def press_and_release(self, key):
+        self._emit()
+        self._emit()
+
+
+def legacy_paste(text, backend):
+    """Алгоритм до SelectionEngine: стрелка влево на каждый символ."""
+    backend.press_and_release('ctrl+v')
+    backend.press('shift')
+    for _ in range(len(text)):
+        backend.press_and_release('left')
+    backend.release('shift')
+
+
+def engine_paste(engine, text, backend):
+    backend.press_and_release('ctrl+v')
+    run_steps(engine.plan_select(text), backend)
+
+
+def measure(paste, text, event_cost_s, presses=3):
+    backend = CountingBackend(event_cost_s)
+    start = time.perf_counter()
+    for _ in range(presses):
+        paste(text, backend)
+    elapsed = (time.perf_counter() - start) / presses
+    return backend.events // presses, elapsed * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--event-cost-ms', type=float, default=0.2,
+                        help="Имитируемая стоимость одного события клавиатуры")
+    args = parser.parse_args()
+    event_cost_s = args.event_cost_ms / 1000
+
+    print(f"{'length':>8} | {'legacy events':>13} {'legacy ms':>10} | {'engine events':>13} {'engine ms':>10}")
+    for length in (10, 64, 200, 2000, 20000):
+        text = ("lorem ipsum dolor sit amet\n" * (length // 27 + 1))[:length]
+        legacy_events, legacy_ms = measure(legacy_paste, text, event_cost_s)
+        engine = SelectionEngine()
+        engine_events, engine_ms = measure(functools.partial(engine_paste, engine), text, event_cost_s)
+        print(f"{length:>8} | {legacy_events:>13} {legacy_ms:>10.1f} | {engine_events:>13} {engine_ms:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,52 @@
+import logging
 import sys
+import os
+import time
+
+started = time.perf_counter() # Начало запуска для отметок этапов
+
+from utils.import_profile import start_from_env
+
+# Замер импортов (TEXT_ROTATOR_IMPORT_REPORT=<файл>) ставится до импорта Qt и окна
+import_profiler, import_report_path = start_from_env()
+
 from PyQt5 import QtWidgets
+from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QIcon
+from models.latency import StartupTimeline
 from text_rotator import TextRotator
+from utils.log import setup_logging
 from utils.resource_path import resource_path
-import os
+
+log = logging.getLogger(__name__)
 
 if __name__ == "__main__":
+    # Растры иконок (ui/icons.py) строятся с учётом плотности пикселей экрана
+    QtWidgets.QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps)
     app = QtWidgets.QApplication(sys.argv)
-    
+    # Журнал пишется в фоне в ~/text_rotator.log (с ротацией файлов)
+    log_service = setup_logging(os.path.join(os.path.expanduser("~"), "text_rotator.log"))
+    app.aboutToQuit.connect(log_service.stop)
+
     # Устанавливаем иконку приложения
     app_icon_path = resource_path("assets/app.ico")
     if os.path.exists(app_icon_path):
         app.setWindowIcon(QIcon(app_icon_path))
     else:
-        print(f"Warning: Application icon not found at {app_icon_path}")
-        
+        log.warning("Application icon not found at %s", app_icon_path)
+
     app.setQuitOnLastWindowClosed(False)
-    window = TextRotator()
-    sys.exit(app.exec_()) 
\ No newline at end of file
+    startup = StartupTimeline(started)
+    startup.mark('imports')
+    # --tray (автозагрузка): горячие клавиши сразу, главное окно - при первом показе
+    window = TextRotator(start_in_tray="--tray" in sys.argv, startup=startup, log_service=log_service)
+
+    if import_profiler is not None:
+        # Импорты, сделанные позже (диалоги, обновления), в отчёт не входят
+        import_profiler.uninstall()
+        try:
+            import_profiler.write_report(import_report_path)
+            log.info("Импорт модулей при запуске: %.1f мс, отчёт: %s", import_profiler.total_ms(), import_report_path)
+        except OSError as e:
+            log.error("Не удалось записать отчёт об импортах: %s", e)
+    sys.exit(app.exec_())
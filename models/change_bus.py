@@ -0,0 +1,119 @@
+"""События изменения дерева текстов и настроек и шина, которая их раздаёт.
+
+SnippetTree публикует событие на каждую правку: что произошло (вставка,
+удаление, перемещение, изменение узла, загрузка заново), с каким узлом
+(id и сам узел), в какой папке и на какой строке. Подписчики - модель Qt
+для представлений, плоские индексы ротации, поисковый индекс, хранилище -
+обновляют только затронутое место, без перестройки всего профиля.
+
+Подписчик с before=True получает событие до изменения данных (модели Qt
+нужно вызвать begin*Rows), остальные - после. FolderLoaded данных не меняет:
+он сообщает, что у ленивой папки появились узлы.
+"""
+
+
+class ChangeEvent:
+    """Базовое событие. op - операция журнала (models/change_journal.py),
+    которая его вызвала; у TreeReset - None."""
+    __slots__ = ('op',)
+
+    def __init__(self, op=None):
+        self.op = op
+
+
+class TreeReset(ChangeEvent):
+    """Профили загружены заново (SnippetTree.load); tree - само дерево."""
+    __slots__ = ('tree',)
+
+    def __init__(self, tree):
+        super().__init__()
+        self.tree = tree
+
+
+class NodeEvent(ChangeEvent):
+    """Правка одного узла: profile, папка folder (узел Folder), строка row в ней
+    и сам узел node (у вставки - уже созданный, но ещё не вставленный)."""
+    __slots__ = ('profile', 'folder', 'row', 'node')
+
+    def __init__(self, op, folder, row, node):
+        super().__init__(op)
+        self.profile = op['profile']
+        self.folder = folder
+        self.row = row
+        self.node = node
+
+    @property
+    def node_id(self):
+        return self.node.id
+
+
+class NodeInserted(NodeEvent):
+    """Узел вставлен на строку row."""
+    __slots__ = ()
+
+
+class NodeRemoved(NodeEvent):
+    """Узел удалён со строки row (вместе с содержимым, если это папка)."""
+    __slots__ = ()
+
+
+class NodeMoved(NodeEvent):
+    """Узел перенесён со строки row на строку to той же папки."""
+    __slots__ = ('to',)
+
+    def __init__(self, op, folder, row, node):
+        super().__init__(op, folder, row, node)
+        self.to = op['to']
+
+
+class NodeUpdated(NodeEvent):
+    """Изменён текст или имя папки; узел и его id остаются прежними."""
+    __slots__ = ()
+
+
+class FolderLoaded(ChangeEvent):
+    """Ленивая папка folder прочитана из хранилища (ref - её ссылка в нём)."""
+    __slots__ = ('folder', 'ref')
+
+    def __init__(self, folder, ref):
+        super().__init__()
+        self.folder = folder
+        self.ref = ref
+
+
+class SettingChanged(ChangeEvent):
+    """Изменена настройка key (операция 'set')."""
+    __slots__ = ('key', 'value')
+
+    def __init__(self, op):
+        super().__init__(op)
+        self.key = op['key']
+        self.value = op['value']
+
+
+class ChangeBus:
+    """Синхронная шина событий: подписчики вызываются в порядке подписки,
+    в том же потоке, что и публикация."""
+
+    def __init__(self):
+        self._subscribers = [] # (обработчик, типы событий, before)
+
+    def subscribe(self, handler, *event_types, before=False):
+        """Подписывает handler(event) на события указанных типов (без типов - на все)."""
+        self._subscribers.append((handler, event_types or (ChangeEvent,), before))
+
+    def unsubscribe(self, handler):
+        self._subscribers = [entry for entry in self._subscribers if entry[0] != handler]
+
+    def publish_before(self, event):
+        """Событие о предстоящем изменении (данные ещё прежние)."""
+        self._dispatch(event, True)
+
+    def publish(self, event):
+        """Событие о выполненном изменении."""
+        self._dispatch(event, False)
+
+    def _dispatch(self, event, before):
+        for handler, event_types, handler_before in self._subscribers:
+            if handler_before == before and isinstance(event, event_types):
+                handler(event)
@@ -0,0 +1,146 @@
+import json
+import logging
+import os
+import shutil
+import threading
+
+from models.snippet_tree import apply_tree_op
+from utils.config_store import atomic_write_text
+
+log = logging.getLogger(__name__)
+
+# Ключи конфигурации, которые меняются операцией 'set'
+SETTINGS_KEYS = ('hotkey', 'hotkey_bindings', 'use_popup', 'theme_mode', 'rotation_strategy')
+
+
+def _profile_key(profile):
+    return 'data_' + profile # 'rotation' -> 'data_rotation', 'popup' -> 'data_popup'
+
+
+def apply_op(config, op):
+    """Применяет одну операцию журнала к словарю конфигурации.
+
+    Операции:
+        add    - вставить value по пути path
+        delete - удалить элемент по пути path
+        move   - переместить элемент path на позицию to в том же списке
+        edit   - заменить текст по пути path на value
+        rename - переименовать папку по пути path в name
+        set    - записать настройку key = value
+    """
+    if op['op'] == 'set':
+        if op['key'] in SETTINGS_KEYS:
+            config[op['key']] = op['value']
+        return
+    apply_tree_op(config.setdefault(_profile_key(op['profile']), []), op)
+
+
+class ChangeJournal:
+    """Журнал изменений рядом с файлом конфигурации (одна JSON-строка на операцию).
+
+    Каждая правка дописывается в конец журнала вместо перезаписи всей
+    конфигурации. Снимок конфигурации хранит номер последней вошедшей в него
+    операции (journal_seq); при загрузке снимок дополняется операциями журнала
+    с большими номерами. Когда журнал превышает max_ops операций или max_bytes
+    байт, нужен новый снимок, после записи которого журнал сжимается (compact).
+    Запись идёт без fsync: строка переживает падение процесса, но не питания.
+
+    Операции адресуют элементы позициями, поэтому воспроизведение
+    останавливается на первой операции, которую не удалось применить: все
+    следующие указывали бы уже не на те элементы. Журнал обрезается до неё
+    (исходный файл остаётся с расширением .bak), а needs_snapshot требует
+    записать свежий снимок.
+    """
+
+    DEFAULT_MAX_OPS = 500
+    DEFAULT_MAX_BYTES = 256 * 1024
+
+    def __init__(self, path, max_ops=DEFAULT_MAX_OPS, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_ops = max_ops
+        self.max_bytes = max_bytes
+        self.seq = 0
+        self._entries = [] # (seq, строка) операций, ещё не вошедших в снимок на диске
+        self._size = 0
+        self._file = None
+        self._lock = threading.Lock()
+        self.needs_snapshot = False
+
+    def replay(self, config, after_seq=0):
+        """Применяет к config операции с номером больше after_seq. Возвращает их число."""
+        self.seq = after_seq
+        self._entries = []
+        self._size = 0
+        self.needs_snapshot = False
+        if not os.path.exists(self.path):
+            return 0
+        applied = 0
+        needs_rewrite = False
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Недописанная строка после сбоя - дальше ничего нет
+                    log.warning("ChangeJournal: пропущена повреждённая запись журнала")
+                    needs_rewrite = True
+                    break
+                if not line.endswith('\n'):
+                    line += '\n'
+                    needs_rewrite = True
+                seq = record.get('seq', 0)
+                if seq <= after_seq:
+                    continue
+                try:
+                    apply_op(config, record)
+                except (LookupError, ValueError, TypeError, AttributeError) as e:
+                    log.error("ChangeJournal: не удалось применить операцию %s (%s), "
+                              "она и следующие отброшены, копия журнала - %s.bak", seq, e, self.path)
+                    shutil.copyfile(self.path, self.path + ".bak")
+                    self.needs_snapshot = True
+                    needs_rewrite = True
+                    break
+                self.seq = max(self.seq, seq)
+                self._entries.append((seq, line))
+                self._size += len(line.encode('utf-8'))
+                applied += 1
+        if needs_rewrite:
+            # Чиним хвост, иначе новые записи склеятся с последней строкой
+            atomic_write_text(self.path, ''.join(line for _, line in self._entries))
+        return applied
+
+    def append(self, op):
+        """Дописывает операцию в журнал и возвращает её номер."""
+        with self._lock:
+            seq = self.seq + 1
+            line = json.dumps(dict(op, seq=seq), ensure_ascii=False) + '\n'
+            if self._file is None:
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(line)
+            self._file.flush()
+            self.seq = seq
+            self._entries.append((seq, line))
+            self._size += len(line.encode('utf-8'))
+            return seq
+
+    def needs_compaction(self):
+        return len(self._entries) > self.max_ops or self._size > self.max_bytes
+
+    def compact(self, snapshot_seq):
+        """Удаляет из журнала операции, уже вошедшие в записанный снимок."""
+        with self._lock:
+            remaining = [(seq, line) for seq, line in self._entries if seq > snapshot_seq]
+            if len(remaining) == len(self._entries):
+                return
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            atomic_write_text(self.path, ''.join(line for _, line in remaining))
+            self._entries = remaining
+            self._size = sum(len(line.encode('utf-8')) for _, line in remaining)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
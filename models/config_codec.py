@@ -0,0 +1,56 @@
+import json
+import logging
+
+log = logging.getLogger(__name__)
+
+DEFAULT_HOTKEY = "ctrl+2"
+
+
+def default_state():
+    """Профили и настройки по умолчанию."""
+    return {
+        'data_rotation': [],
+        'data_popup': [],
+        'hotkey': DEFAULT_HOTKEY,
+        'hotkey_bindings': [],
+        'use_popup': False,
+        'theme_mode': "auto",
+        'rotation_strategy': "round_robin",
+    }
+
+
+def decode_config(config):
+    """Приводит загруженный JSON конфигурации к текущему формату.
+
+    Поддерживает старые форматы с ключами 'data' и 'texts' (только профиль
+    ротации). Возвращает (state, migrated), где migrated=True означает, что
+    формат был старым и конфигурацию стоит пересохранить.
+    """
+    state = default_state()
+    state['hotkey'] = config.get('hotkey', DEFAULT_HOTKEY)
+    state['hotkey_bindings'] = config.get('hotkey_bindings', [])
+    state['theme_mode'] = config.get('theme_mode', "auto")
+    state['rotation_strategy'] = config.get('rotation_strategy', "round_robin")
+
+    if 'data_rotation' in config or 'data_popup' in config:
+        state['data_rotation'] = config.get('data_rotation', [])
+        state['data_popup'] = config.get('data_popup', [])
+        state['use_popup'] = config.get('use_popup', False)
+        log.info("Load Config: Загружены профили rotation/popup. Режим use_popup: %s", state['use_popup'])
+        return state, False
+    for legacy_key in ('data', 'texts'):
+        if legacy_key in config:
+            log.info("Load Config: Обнаружен старый формат ('%s'). Миграция...", legacy_key)
+            state['data_rotation'] = config.get(legacy_key, [])
+            log.info("Load Config: Миграция завершена. Режим установлен на 'rotation'.")
+            return state, True
+    log.info("Load Config: Конфигурационный файл не содержит данных. Режим: rotation.")
+    return state, False
+
+
+def encode_config(state, **extra):
+    """Сериализует профили и настройки (и служебные ключи extra) в JSON."""
+    config = dict(state)
+    config.update(extra)
+    # Без indent json использует быстрый C-кодировщик
+    return json.dumps(config, ensure_ascii=False)
@@ -0,0 +1,166 @@
+from bisect import bisect_right
+
+
+class FlatIndex:
+    """Плоский порядок текстов профиля (обход дерева папок) без плоского списка.
+
+    Элементы списков - узлы Snippet и Folder (models/snippet_tree.py).
+    Непрочитанная (ленивая) папка учитывается по числу текстов, которое
+    сообщило хранилище, и читается, только когда ротация заходит внутрь неё.
+
+    Для каждого списка (корень профиля или содержимое папки) хранится массив
+    префиксных сумм числа текстов: prefix[i] - сколько текстов в items[:i]
+    вместе с вложенными папками. Отсюда:
+        len(index)          - O(1), последний элемент префикса корня;
+        text_at(position)   - спуск по дереву с bisect на каждом уровне;
+        update(op)          - правка меняет префиксы только в списках на пути к ней.
+
+    Курсор ротации - позиция следующего текста. При вставке и удалении перед
+    ним он сдвигается, при перемещении папки или текста под курсором - едет
+    вместе с ними, так что ротация продолжается с того же текста.
+    """
+
+    def __init__(self, items=None):
+        self.rebuild([] if items is None else items)
+
+    def rebuild(self, items):
+        self._root = items
+        self._prefixes = {} # id(список) -> (список, префиксные суммы)
+        self._prefix(items)
+        self.cursor = 0
+        self.version = getattr(self, 'version', -1) + 1 # Растёт при каждом изменении состава или порядка текстов
+
+    def __len__(self):
+        return self._prefix(self._root)[-1]
+
+    def count(self, items=None):
+        """Число текстов в списке items (по умолчанию - во всём профиле)."""
+        return self._prefix(self._root if items is None else items)[-1]
+
+    def group_sizes(self, items=None):
+        """Число текстов в каждом элементе списка items (1 для текста, размер папки)."""
+        prefix = self._prefix(self._root if items is None else items)
+        return [prefix[row + 1] - prefix[row] for row in range(len(prefix) - 1)]
+
+    def text_at(self, position, items=None):
+        """Текст (строка) с номером position в плоском порядке списка items."""
+        items = self._root if items is None else items
+        while True:
+            prefix = self._prefix(items)
+            if not 0 <= position < prefix[-1]:
+                raise IndexError(position)
+            row = bisect_right(prefix, position) - 1 # Пустые папки пропускаются сами
+            position -= prefix[row]
+            item = items[row]
+            if not item.is_folder:
+                return item.text
+            items = item.items
+
+    def next_text(self):
+        """Текст под курсором; курсор переходит к следующему (по кругу)."""
+        total = len(self)
+        if not total:
+            return None
+        position = self.cursor % total
+        self.cursor = (position + 1) % total
+        return self.text_at(position)
+
+    def prepare(self, op):
+        """Вызывается до правки op: запоминает префиксы списков на её пути.
+
+        Папка, прочитанная лениво уже после rebuild, иначе получила бы
+        префиксы только после правки, и update учёл бы её дважды."""
+        items = self._root
+        self._prefix(items)
+        for row in op['path'][:-1]:
+            items = items[row].items
+            self._prefix(items)
+
+    def update(self, op):
+        """Учитывает операцию журнала, уже применённую к данным профиля
+        (до неё вызывается prepare)."""
+        kind = op['op']
+        if kind not in ('add', 'delete', 'move'):
+            return # edit, rename и set не меняют число и порядок текстов
+        self.version += 1
+        total = len(self)
+        self.cursor = self.cursor % total if total else 0
+        # Списки на пути и смещение правки в плоском порядке (по ещё старым префиксам)
+        chain = []
+        offset = 0
+        items = self._root
+        for row in op['path'][:-1]:
+            offset += self._prefix(items)[row]
+            chain.append((items, row))
+            items = items[row].items
+        row = op['path'][-1]
+        # Префиксы списков на пути уже в кэше (rebuild или prepare)
+        prefix = self._prefix(items)
+        position = offset + prefix[row]
+        if kind == 'add':
+            delta = self._leaves(items[row])
+            prefix.insert(row + 1, prefix[row])
+            self._add(prefix, row + 1, delta)
+            self._shift_cursor(position, delta)
+        elif kind == 'delete':
+            delta = -(prefix[row + 1] - prefix[row])
+            del prefix[row + 1]
+            self._add(prefix, row + 1, delta)
+            self._shift_cursor(position, delta)
+        else:
+            self._move(prefix, items, row, op['to'], offset)
+            delta = 0
+        for parent, parent_row in chain:
+            self._add(self._prefix(parent), parent_row + 1, delta)
+        total = len(self)
+        self.cursor = self.cursor % total if total else 0 # После удаления в конце - снова с начала
+
+    # --- Служебное ---
+
+    def _prefix(self, items):
+        entry = self._prefixes.get(id(items))
+        if entry is None or entry[0] is not items:
+            prefix = [0]
+            for item in items:
+                prefix.append(prefix[-1] + self._leaves(item))
+            entry = self._prefixes[id(items)] = (items, prefix)
+        return entry[1]
+
+    def _leaves(self, item):
+        if not item.is_folder:
+            return 1
+        return self._prefix(item.items)[-1] if item.loaded else item.size
+
+    @staticmethod
+    def _add(prefix, start, delta):
+        if delta:
+            for i in range(start, len(prefix)):
+                prefix[i] += delta
+
+    def _shift_cursor(self, position, delta):
+        if delta > 0:
+            if self.cursor >= position:
+                self.cursor += delta
+        elif delta < 0:
+            removed = -delta
+            if self.cursor >= position + removed:
+                self.cursor -= removed
+            elif self.cursor > position:
+                self.cursor = position # Следующим станет текст после удалённых
+
+    def _move(self, prefix, items, source, target, offset):
+        """Перестраивает префикс после переноса items[source] на позицию target."""
+        size = self._leaves(items[target])
+        old_position = offset + prefix[source]
+        for i in range(min(source, target), max(source, target) + 1):
+            prefix[i + 1] = prefix[i] + self._leaves(items[i])
+        new_position = offset + prefix[target]
+        cursor = self.cursor
+        if old_position <= cursor < old_position + size:
+            self.cursor = new_position + (cursor - old_position) # Курсор едет вместе с элементом
+        else:
+            if cursor >= old_position + size:
+                cursor -= size
+            if cursor >= new_position:
+                cursor += size
+            self.cursor = cursor
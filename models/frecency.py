@@ -0,0 +1,67 @@
+import json
+import logging
+import os
+import time
+
+from utils.config_store import ConfigWriter
+
+log = logging.getLogger(__name__)
+
+
+class FrecencyStore:
+    """Частота и давность выбора текстов в окне выбора.
+
+    Каждый выбор увеличивает счётчик текста; вклад счётчика убывает вдвое
+    за HALF_LIFE секунд с последнего выбора. Данные хранятся в небольшом
+    файле рядом с конфигурацией и записываются в фоне.
+    """
+
+    HALF_LIFE = 7 * 24 * 3600
+    MAX_ENTRIES = 1000
+
+    def __init__(self, path):
+        self.path = path
+        self._entries = {} # текст -> [число выборов, время последнего выбора]
+        self._writer = None
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._entries = {key: list(value) for key, value in json.load(f).items()}
+        except (OSError, ValueError, TypeError) as e:
+            log.error("FrecencyStore: не удалось прочитать %s: %s", self.path, e)
+            self._entries = {}
+
+    def record(self, key, now=None):
+        now = time.time() if now is None else now
+        entry = self._entries.get(key)
+        if entry is None:
+            self._entries[key] = [1, now]
+        else:
+            # Старые выборы "стареют" до момента нового выбора
+            entry[0] = entry[0] * self._decay(now - entry[1]) + 1
+            entry[1] = now
+        if len(self._entries) > self.MAX_ENTRIES:
+            weakest = sorted(self._entries, key=lambda k: self.score(k, now))
+            for stale in weakest[:len(self._entries) - self.MAX_ENTRIES]:
+                del self._entries[stale]
+        if self._writer is None:
+            self._writer = ConfigWriter(self.path)
+        self._writer.write_async(json.dumps(self._entries, ensure_ascii=False))
+
+    def score(self, key, now=None):
+        """Частота с учётом давности; 0 для ни разу не выбранного текста."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return 0.0
+        now = time.time() if now is None else now
+        return entry[0] * self._decay(now - entry[1])
+
+    def _decay(self, age):
+        return 0.5 ** (max(age, 0) / self.HALF_LIFE)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
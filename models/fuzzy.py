@@ -0,0 +1,88 @@
+# Раскладки клавиатуры: символ на той же клавише в английской и русской раскладке
+EN_LAYOUT = "`qwertyuiop[]asdfghjkl;'zxcvbnm,."
+RU_LAYOUT = "ёйцукенгшщзхъфывапролджэячсмитьбю"
+_TO_RU = str.maketrans(EN_LAYOUT, RU_LAYOUT)
+_TO_EN = str.maketrans(RU_LAYOUT, EN_LAYOUT)
+
+
+def layout_variants(text):
+    """Возвращает text и его варианты, набранные в другой раскладке ("ghbdtn" -> "привет")."""
+    variants = [text]
+    for table in (_TO_RU, _TO_EN):
+        converted = text.translate(table)
+        if converted not in variants:
+            variants.append(converted)
+    return variants
+
+
+def char_mask(word):
+    """Битовая маска букв слова для быстрого отсева: у похожих слов маски почти совпадают."""
+    mask = 0
+    for ch in word:
+        mask |= 1 << (ord(ch) & 63)
+    return mask
+
+
+def missing_at_most(token_mask, word_mask, limit):
+    """True, если в слове нет не больше limit букв запроса (по маскам)."""
+    missing = token_mask & ~word_mask
+    for _ in range(limit):
+        missing &= missing - 1 # Снимаем по одной недостающей букве
+    return missing == 0
+
+
+def typo_limit(length):
+    """Сколько опечаток допускается в слове запроса длиной length."""
+    return 1 if length < 7 else 2
+
+
+def prefix_distance(token, word, limit):
+    """Наименьшее расстояние Дамерау-Левенштейна (с перестановкой соседних букв)
+    от token до начала word длиной len(token)-1..len(token)+1.
+
+    Одна таблица динамики даёт расстояния сразу до всех префиксов word:
+    последняя строка - это расстояния до word[:j]. Если расстояние больше
+    limit, счёт обрывается и возвращается limit + 1."""
+    word = word[:len(token) + 1]
+    previous_previous = None
+    previous = list(range(len(word) + 1))
+    for i in range(1, len(token) + 1):
+        current = [i] + [0] * len(word)
+        for j in range(1, len(word) + 1):
+            cost = 0 if token[i - 1] == word[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (i > 1 and j > 1 and token[i - 1] == word[j - 2] and token[i - 2] == word[j - 1]):
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous_previous, previous = previous, current
+    return min(previous[min(max(len(token) - 1, 1), len(word)):])
+
+
+def is_subsequence(token, word):
+    """Буквы token встречаются в word в том же порядке ("првт" -> "привет")."""
+    position = 0
+    for ch in token:
+        position = word.find(ch, position) + 1
+        if not position:
+            return False
+    return True
+
+
+def fuzzy_word_score(token, word):
+    """Оценка 0..1 того, что word - слово, которое пользователь начал набирать как token.
+
+    1 - точный префикс; 0.8/0.65 - префикс с одной/двумя опечатками (замена,
+    пропуск, лишняя буква, перестановка соседних); до 0.5 - подпоследовательность
+    с тем же первым символом; 0 - не похоже.
+    """
+    if word.startswith(token):
+        return 1.0
+    length = len(token)
+    limit = typo_limit(length)
+    distance = prefix_distance(token, word, limit)
+    if distance <= limit:
+        return 0.8 - 0.15 * (distance - 1)
+    if word[0] == token[0] and is_subsequence(token, word):
+        return 0.2 + 0.3 * length / len(word)
+    return 0.0
@@ -0,0 +1,181 @@
+import logging
+import threading
+import time
+from collections import deque
+import keyboard
+from PyQt5.QtCore import QThread, pyqtSignal
+
+log = logging.getLogger(__name__)
+
+# Синонимы имён клавиш, приводимые к одному виду
+KEY_ALIASES = {
+    'control': 'ctrl',
+    'win': 'windows',
+    'cmd': 'windows',
+    'command': 'windows',
+    'option': 'alt',
+    'return': 'enter',
+    'escape': 'esc',
+}
+
+
+def normalize_key_name(name):
+    """Приводит имя клавиши к каноническому виду ('Left Ctrl' -> 'ctrl')."""
+    name = name.strip().lower()
+    for prefix in ('left ', 'right '):
+        if name.startswith(prefix) and name != prefix.strip():
+            name = name[len(prefix):]
+    return KEY_ALIASES.get(name, name)
+
+
+def parse_chord(hotkey_str):
+    """Разбирает строку вида 'ctrl + shift + a' в отсортированный кортеж клавиш."""
+    keys = {normalize_key_name(part) for part in hotkey_str.split('+') if part.strip()}
+    if not keys:
+        raise ValueError(f"Пустая комбинация клавиш: {hotkey_str!r}")
+    return tuple(sorted(keys))
+
+
+class ChordTrie:
+    """Префиксное дерево по отсортированным наборам клавиш.
+
+    Поиск проходит не больше len(аккорд) узлов, поэтому не зависит от числа
+    привязок."""
+
+    __slots__ = ('root',)
+
+    def __init__(self):
+        self.root = {}
+
+    def add(self, chord, binding_id):
+        node = self.root
+        for key in chord:
+            node = node.setdefault(key, {})
+        node[None] = binding_id # None - маркер конца аккорда
+
+    def lookup(self, chord):
+        node = self.root
+        for key in chord:
+            node = node.get(key)
+            if node is None:
+                return None
+        return node.get(None)
+
+
+class HotkeyDispatcher(QThread):
+    """Единый перехватчик клавиатуры для всех горячих клавиш приложения.
+
+    Вместо отдельного потока и keyboard.add_hotkey на каждую комбинацию
+    ставится один keyboard.hook. Нажатия сопоставляются с таблицей аккордов
+    (ChordTrie), найденный идентификатор привязки передаётся в GUI сигналом
+    hotkey_pressed. Привязки меняются через set_bindings без остановки потока;
+    при пустом наборе перехватчик снимается.
+    """
+    hotkey_pressed = pyqtSignal(str, float) # binding_id, perf_counter() нажатия
+
+    DEBOUNCE_INTERVAL = 0.1 # Срабатывания одной привязки чаще этого считаем "дребезгом"
+
+    def __init__(self, backend=keyboard, parent=None, tracer=None):
+        super(HotkeyDispatcher, self).__init__(parent)
+        self.backend = backend
+        self.tracer = tracer # LatencyTracer для стадии 'hook'
+        self._table = ChordTrie()
+        self._scan_codes = {} # scan code -> каноническое имя клавиши из привязок
+        self._pressed = set()
+        self._suppressed = set() # Клавиши, чьё отпускание тоже нужно подавить
+        self._last_fired = {}
+        self._hook = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pending = deque()
+        self._stop_requested = False
+
+    def set_bindings(self, bindings):
+        """Заменяет все привязки {binding_id: 'ctrl+2'}.
+
+        Возвращает словарь {binding_id: текст ошибки} для некорректных комбинаций."""
+        table = ChordTrie()
+        scan_codes = {}
+        errors = {}
+        for binding_id, hotkey_str in bindings.items():
+            try:
+                chord = parse_chord(hotkey_str)
+                for key in chord:
+                    for code in self.backend.key_to_scan_codes(key):
+                        scan_codes[code] = key
+            except (ValueError, KeyError) as e:
+                errors[binding_id] = str(e)
+                continue
+            if table.lookup(chord) is not None:
+                errors[binding_id] = f"Комбинация {hotkey_str} уже занята"
+                continue
+            table.add(chord, binding_id)
+
+        with self._lock:
+            # Подмена ссылок атомарна для потока перехватчика
+            self._table = table
+            self._scan_codes = scan_codes
+            self._pressed.clear()
+            self._suppressed.clear()
+            if table.root and self._hook is None:
+                self._hook = self.backend.hook(self._on_key_event, suppress=True)
+            elif not table.root and self._hook is not None:
+                self.backend.unhook(self._hook)
+                self._hook = None
+        return errors
+
+    def _on_key_event(self, event):
+        """Вызывается из потока keyboard. Возвращает False, чтобы подавить событие."""
+        started = time.perf_counter()
+        allowed = self._handle_key_event(event, started)
+        if not allowed and self.tracer is not None:
+            # Замер только для наших клавиш: обычный набор текста в гистограмму не идёт
+            self.tracer.record_since('hook', started)
+        return allowed
+
+    def _handle_key_event(self, event, started):
+        key = self._scan_codes.get(event.scan_code)
+        if key is None:
+            key = normalize_key_name(event.name or '')
+
+        if event.event_type == 'up':
+            self._pressed.discard(key)
+            if key in self._suppressed:
+                self._suppressed.discard(key)
+                return False
+            return True
+
+        if key in self._pressed:
+            # Автоповтор удерживаемой клавиши - повторно не срабатываем
+            return key not in self._suppressed
+        self._pressed.add(key)
+
+        binding_id = self._table.lookup(tuple(sorted(self._pressed)))
+        if binding_id is None:
+            return True
+
+        now = time.monotonic()
+        if now - self._last_fired.get(binding_id, 0.0) >= self.DEBOUNCE_INTERVAL:
+            self._last_fired[binding_id] = now
+            self._pending.append((binding_id, started))
+            self._wake.set()
+        self._suppressed.add(key)
+        return False
+
+    def run(self):
+        # Ждём срабатываний или остановки без пробуждений по таймеру
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            if self._stop_requested:
+                break
+            while self._pending:
+                self.hotkey_pressed.emit(*self._pending.popleft())
+        log.info("HotkeyDispatcher остановлен")
+
+    def stop(self):
+        """Снимает перехватчик и завершает поток."""
+        self.set_bindings({})
+        self._stop_requested = True
+        self._wake.set()
+        self.wait(1000)
@@ -0,0 +1,115 @@
+import json
+import logging
+import time
+from array import array
+
+log = logging.getLogger(__name__)
+
+
+class LatencyHistogram:
+    """Последние capacity замеров одной стадии в кольцевом буфере.
+
+    Запись - одно присваивание в заранее выделенный массив и увеличение
+    счётчика, без блокировок: у каждой стадии один пишущий поток, а
+    читатель (окно настроек) лишь копирует буфер и сортирует копию."""
+
+    CAPACITY = 512
+
+    def __init__(self, capacity=CAPACITY):
+        self.capacity = capacity
+        self._samples = array('d', bytes(8 * capacity))
+        self._count = 0 # Всего записей; позиция следующей - _count % capacity
+
+    def record(self, seconds):
+        count = self._count
+        self._samples[count % self.capacity] = seconds
+        self._count = count + 1
+
+    def __len__(self):
+        return min(self._count, self.capacity)
+
+    def samples(self):
+        """Замеры в секундах, от старых к новым."""
+        count = self._count
+        if count <= self.capacity:
+            return list(self._samples[:count])
+        start = count % self.capacity
+        return list(self._samples[start:]) + list(self._samples[:start])
+
+    def summary(self):
+        """Число замеров и перцентили p50/p95/p99, максимум (миллисекунды)."""
+        values = sorted(self.samples())
+
+        def percentile(p):
+            if not values:
+                return None
+            return round(values[min(len(values) - 1, int(p * len(values)))] * 1000, 2)
+
+        return {
+            'count': len(values),
+            'p50_ms': percentile(0.5),
+            'p95_ms': percentile(0.95),
+            'p99_ms': percentile(0.99),
+            'max_ms': round(values[-1] * 1000, 2) if values else None,
+        }
+
+
+class LatencyTracer:
+    """Время прохождения нажатия горячей клавиши до вставленного текста по стадиям.
+
+    Все отметки берутся из time.perf_counter() (монотонные часы):
+        hook        - обработка события горячей клавиши в перехватчике (подавленные нажатия)
+        signal      - от перехватчика до обработчика в GUI-потоке
+        clipboard   - установка и подтверждение буфера обмена
+        inject      - эмуляция ctrl+v
+        select      - выделение вставленного текста
+        total       - от нажатия до конца вставки
+        popup_paint - от нажатия до первой отрисовки окна выбора
+    """
+
+    STAGES = ('hook', 'signal', 'clipboard', 'inject', 'select', 'total', 'popup_paint')
+
+    def __init__(self, capacity=LatencyHistogram.CAPACITY):
+        self.histograms = {stage: LatencyHistogram(capacity) for stage in self.STAGES}
+
+    def record(self, stage, seconds):
+        self.histograms[stage].record(seconds)
+
+    def record_since(self, stage, started):
+        """Записывает время от отметки started до текущего момента."""
+        self.histograms[stage].record(time.perf_counter() - started)
+
+    def summary(self):
+        return {stage: histogram.summary() for stage, histogram in self.histograms.items()}
+
+    def export_json(self, path, extra=None):
+        """Сохраняет сводку и сами замеры (мс) в JSON-файл."""
+        report = {
+            'summary': self.summary(),
+            'samples_ms': {stage: [round(value * 1000, 3) for value in histogram.samples()]
+                           for stage, histogram in self.histograms.items()},
+        }
+        if extra:
+            report.update(extra)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+class StartupTimeline:
+    """Отметки этапов запуска: время от начала (origin) и от предыдущей отметки, в мс.
+
+    origin - perf_counter() начала запуска; main.py берёт его до импорта Qt."""
+
+    def __init__(self, origin=None):
+        self.origin = time.perf_counter() if origin is None else origin
+        self._last = self.origin
+        self.marks = [] # [{'stage', 'at_ms', 'took_ms'}]
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        entry = {'stage': stage, 'at_ms': round((now - self.origin) * 1000, 2),
+                 'took_ms': round((now - self._last) * 1000, 2)}
+        self._last = now
+        self.marks.append(entry)
+        log.info("Запуск: %s за %.1f мс (%.1f мс от начала)", stage, entry['took_ms'], entry['at_ms'])
+        return entry
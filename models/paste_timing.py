@@ -0,0 +1,124 @@
+import threading
+import time
+from collections import deque
+
+
+class PasteTimingController:
+    """Адаптивные задержки вставки вместо фиксированных пауз.
+
+    Перед вставкой поток ждёт не фиксированные 100 мс, а подтверждения того,
+    что буфер обмена уже содержит нужный текст (его содержимое читается сразу
+    после setText и при каждом QClipboard.dataChanged). Время подтверждения
+    сглаживается (EWMA) и определяет таймаут ожидания и паузу после вставки.
+
+    Подтверждение записи ещё не значит, что окно-цель прочитало буфер, поэтому
+    непосредственно перед ctrl+v буфер сверяется с текстом вставки
+    (clipboard_holds), а после неё не меняется в течение паузы settle_delay
+    (hold_remaining): следующая вставка ждёт, пока цель заберёт предыдущий текст.
+    Методы notify_* вызываются из GUI-потока, остальные - из потока вставки.
+    """
+
+    INITIAL_TIMEOUT = 0.25      # таймаут, пока нет ни одного замера
+    MIN_TIMEOUT = 0.02
+    MAX_TIMEOUT = 0.5
+    MAX_SETTLE_DELAY = 0.05     # прежняя фиксированная пауза перед выделением
+    MIN_SETTLE_DELAY = 0.005
+    FOCUS_DELAY = 0.05          # окну-цели нужно вернуть фокус после закрытия попапа
+    SMOOTHING = 0.2
+
+    def __init__(self, history_size=200):
+        self._ready = threading.Event()
+        self._expected_text = None
+        self._started_at = 0.0
+        self._cancelled = False
+        self._clipboard_text = None # Последнее увиденное содержимое буфера обмена
+        self._pasted_at = None
+        self.estimate = None    # сглаженная задержка подтверждения, секунды
+        self.history = deque(maxlen=history_size)
+        self.confirmed_count = 0
+        self.timeout_count = 0
+        self.last_delay = None
+
+    def begin(self, text):
+        """Начинает ожидание буфера обмена с текстом text."""
+        self._ready.clear()
+        self._expected_text = text
+        self._started_at = time.perf_counter()
+
+    def cancel(self):
+        """Прерывает текущее и все последующие ожидания (остановка потока вставки)."""
+        self._cancelled = True
+        self._ready.set()
+
+    def notify_clipboard_text(self, text):
+        """Сообщает о текущем содержимом буфера обмена (вызов из GUI-потока
+        после каждой записи и каждого изменения буфера, в том числе чужого)."""
+        self._clipboard_text = text
+        if self._expected_text is not None and text == self._expected_text:
+            self._ready.set()
+
+    def clipboard_holds(self, text):
+        """True, если последнее увиденное содержимое буфера - именно text."""
+        return self._clipboard_text == text
+
+    def mark_pasted(self):
+        """Отмечает отправку ctrl+v: с этого момента буфер держится неизменным."""
+        self._pasted_at = time.perf_counter()
+
+    def hold_remaining(self):
+        """Сколько ещё не менять буфер после последней вставки (секунды)."""
+        if self._pasted_at is None:
+            return 0.0
+        return max(0.0, self._pasted_at + self.settle_delay() - time.perf_counter())
+
+    def clipboard_timeout(self):
+        if self.estimate is None:
+            return self.INITIAL_TIMEOUT
+        return min(self.MAX_TIMEOUT, max(self.MIN_TIMEOUT, self.estimate * 4))
+
+    def settle_delay(self):
+        """Пауза после ctrl+v: до выделения вставленного текста и до следующей записи в буфер."""
+        if self.estimate is None:
+            return self.MAX_SETTLE_DELAY
+        return min(self.MAX_SETTLE_DELAY, max(self.MIN_SETTLE_DELAY, self.estimate * 2))
+
+    def wait_clipboard(self):
+        """Ждёт подтверждения буфера обмена. Возвращает False по таймауту."""
+        confirmed = self._ready.wait(self.clipboard_timeout())
+        if self._cancelled:
+            return False # Остановка - не замер
+        delay = time.perf_counter() - self._started_at
+        self._expected_text = None
+        self.last_delay = delay
+        self.history.append(delay)
+        if confirmed:
+            self.confirmed_count += 1
+            if self.estimate is None:
+                self.estimate = delay
+            else:
+                self.estimate += self.SMOOTHING * (delay - self.estimate)
+        else:
+            # Машина нагружена: в следующий раз ждём дольше
+            self.timeout_count += 1
+            self.estimate = min(self.MAX_TIMEOUT, max(self.estimate or 0.0, delay))
+        return confirmed
+
+    def metrics(self):
+        """Наблюдаемые задержки буфера обмена за сессию (миллисекунды)."""
+        delays = sorted(self.history)
+
+        def percentile(p):
+            if not delays:
+                return None
+            return round(delays[min(len(delays) - 1, int(p * len(delays)))] * 1000, 2)
+
+        return {
+            'confirmed': self.confirmed_count,
+            'timeouts': self.timeout_count,
+            'estimate_ms': None if self.estimate is None else round(self.estimate * 1000, 2),
+            'last_ms': None if self.last_delay is None else round(self.last_delay * 1000, 2),
+            'p50_ms': percentile(0.5),
+            'p95_ms': percentile(0.95),
+            'clipboard_timeout_ms': round(self.clipboard_timeout() * 1000, 2),
+            'settle_delay_ms': round(self.settle_delay() * 1000, 2),
+        }
@@ -0,0 +1,131 @@
+import logging
+import queue
+import time
+import keyboard
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from models.paste_timing import PasteTimingController
+from models.selection_engine import SelectionEngine, run_steps
+
+log = logging.getLogger(__name__)
+
+
+class PasteJob:
+    """Задание на вставку: установить буфер обмена, вставить и (в ротации) выделить текст.
+
+    started - perf_counter() нажатия горячей клавиши (None для вставки из окна выбора)."""
+    __slots__ = ('text', 'select', 'started')
+
+    def __init__(self, text, select, started=None):
+        self.text = text
+        self.select = select
+        self.started = started
+
+
+class PasteWorker(QThread):
+    """Поток вставки текста, чтобы паузы и эмуляция клавиш не блокировали GUI.
+
+    Задания берутся из ограниченной очереди и выполняются строго по порядку.
+    Буфер обмена Qt можно менять только из GUI-потока, поэтому для его установки
+    поток посылает clipboard_requested (подключается через Qt.QueuedConnection)
+    и ждёт подтверждения в self.timing с таймаутом. Поток никогда не
+    блокирует GUI и не ждёт его без таймаута: stop() не ждёт завершения, а
+    запрос буфера, на который GUI не успел ответить, просто бросается.
+    """
+    clipboard_requested = pyqtSignal(str)
+    paste_finished = pyqtSignal(str, float) # текст, мс от нажатия (-1, если не замерялось)
+    paste_failed = pyqtSignal(str)
+
+    MAX_PENDING_JOBS = 4
+
+    def __init__(self, parent=None, tracer=None):
+        super(PasteWorker, self).__init__(parent)
+        self.jobs = queue.Queue(maxsize=self.MAX_PENDING_JOBS)
+        self.selection_engine = SelectionEngine()
+        self.timing = PasteTimingController()
+        self.tracer = tracer # LatencyTracer для стадий вставки
+        self._stopping = False
+
+    def has_room(self):
+        """Примет ли submit следующее задание. Задания ставит только GUI-поток,
+        а рабочий поток лишь забирает их, так что ответ True остаётся верным
+        до ближайшего submit из того же потока."""
+        return not self.jobs.full()
+
+    def submit(self, text, select, started=None):
+        """Ставит вставку в очередь. Возвращает False, если очередь переполнена."""
+        try:
+            self.jobs.put_nowait(PasteJob(text, select, started))
+            return True
+        except queue.Full:
+            log.warning("PasteWorker: очередь вставки переполнена, нажатие пропущено")
+            return False
+
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None or self._stopping:
+                break
+            try:
+                if self._execute(job):
+                    elapsed_ms = (time.perf_counter() - job.started) * 1000 if job.started is not None else -1.0
+                    self.paste_finished.emit(job.text, elapsed_ms)
+            except Exception as e:
+                self.paste_failed.emit(str(e))
+        log.info("PasteWorker остановлен")
+
+    def _execute(self, job):
+        """Выполняет вставку. Возвращает False, если её прервала остановка потока
+        или буфер обмена не содержит текста вставки."""
+        tracer = self.tracer
+        # Окно-цель могло ещё не прочитать предыдущий текст: буфер пока не трогаем
+        time.sleep(self.timing.hold_remaining())
+        mark = time.perf_counter()
+        self.timing.begin(job.text)
+        self.clipboard_requested.emit(job.text)
+        if not self.timing.wait_clipboard() and not self._stopping:
+            log.warning("PasteWorker: буфер обмена не подтверждён за %.0f мс", self.timing.last_delay * 1000)
+        if tracer is not None:
+            tracer.record_since('clipboard', mark)
+
+        if not job.select:
+            time.sleep(self.timing.FOCUS_DELAY)
+        if self._stopping:
+            return False
+        if not self.timing.clipboard_holds(job.text):
+            # Буфер не наш или его уже перезаписали: ctrl+v вставил бы чужой или прошлый текст
+            log.warning("PasteWorker: в буфере обмена не тот текст, вставка пропущена")
+            return False
+
+        mark = time.perf_counter() # Пауза фокуса в замер эмуляции не входит
+        keyboard.press_and_release('ctrl+v')
+        self.timing.mark_pasted()
+        if tracer is not None:
+            tracer.record_since('inject', mark)
+
+        # В режиме ротации выделяем вставленный текст, чтобы следующая вставка его заменила
+        if job.select and not self._stopping:
+            select_steps = self.selection_engine.plan_select(job.text)
+            if select_steps:
+                mark = time.perf_counter()
+                time.sleep(self.timing.settle_delay()) # Пауза после вставки перед выделением
+                run_steps(select_steps, keyboard)
+                if tracer is not None:
+                    tracer.record_since('select', mark)
+        if tracer is not None and job.started is not None:
+            tracer.record_since('total', job.started)
+        return True
+
+    def stop(self):
+        """Отбрасывает ожидающие задания и просит поток завершиться, не дожидаясь его.
+
+        Текущая вставка бросается на ближайшем шаге (ожидание буфера обмена
+        прерывается сразу); об окончании сообщает сигнал finished."""
+        self._stopping = True
+        self.timing.cancel()
+        try:
+            while True:
+                self.jobs.get_nowait()
+        except queue.Empty:
+            pass
+        self.jobs.put_nowait(None)
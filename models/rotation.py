@@ -0,0 +1,124 @@
+import json
+import logging
+import os
+
+from models.rotation_strategies import STRATEGIES, RotationPool, make_strategy
+from utils.config_store import ConfigWriter
+
+log = logging.getLogger(__name__)
+
+
+class RotationCursors:
+    """Позиции ротации, сохраняемые в маленьком файле рядом с конфигурацией.
+
+    Ключ - 'profile:<профиль>' или 'folder:<профиль>/<имя папки>', значение -
+    номер следующего текста. Файл переписывается целиком в фоне (ConfigWriter
+    склеивает частые нажатия в одну запись), основная конфигурация не трогается.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._positions = {}
+        self._writer = None
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._positions = {key: int(value) for key, value in json.load(f).items()}
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            log.error("RotationCursors: не удалось прочитать %s: %s", self.path, e)
+            self._positions = {}
+
+    def get(self, key):
+        return self._positions.get(key, 0)
+
+    def set(self, key, position):
+        if self._positions.get(key) == position:
+            return
+        self._positions[key] = position
+        if self._writer is None:
+            self._writer = ConfigWriter(self.path)
+        self._writer.write_async(json.dumps(self._positions, ensure_ascii=False))
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+class RotationEngine:
+    """Ротация текстов с независимыми курсорами для профилей и папок.
+
+    Плоский порядок берётся из FlatIndex профиля (без повторного обхода
+    дерева), позиции хранятся в RotationCursors и переживают перезапуск
+    программы и переключение режимов. Курсор профиля живёт в самом
+    FlatIndex, поэтому сдвигается при правках; курсор папки - номер внутри
+    её собственного плоского порядка.
+
+    Кроме ротации по порядку ('round_robin') доступны стратегии из
+    models/rotation_strategies.py; для каждого профиля и папки создаётся
+    своя. seed делает случайный выбор воспроизводимым.
+    """
+
+    def __init__(self, flat_indexes, cursors, strategy='round_robin', seed=None):
+        self.flat_indexes = flat_indexes # {'rotation': FlatIndex, 'popup': FlatIndex}
+        self.cursors = cursors
+        self.seed = seed
+        self.strategy = strategy
+        self._strategies = {} # ключ курсора -> RotationStrategy
+
+    def set_strategy(self, strategy):
+        if strategy != 'round_robin' and strategy not in STRATEGIES:
+            log.warning("RotationEngine: неизвестная стратегия %r, используется ротация по порядку", strategy)
+            strategy = 'round_robin'
+        self.strategy = strategy
+        self._strategies = {}
+
+    def restore(self):
+        """Переносит сохранённые курсоры профилей в индексы (после их перестройки)."""
+        for profile, flat_index in self.flat_indexes.items():
+            total = len(flat_index)
+            flat_index.cursor = self.cursors.get(self._profile_key(profile)) % total if total else 0
+
+    def next_in_profile(self, profile):
+        """(позиция, текст) следующего текста профиля; (None, None), если текстов нет."""
+        flat_index = self.flat_indexes[profile]
+        if not len(flat_index):
+            return None, None
+        if self.strategy != 'round_robin':
+            position = self._pick(self._profile_key(profile), RotationPool(flat_index))
+            return position, flat_index.text_at(position)
+        position = flat_index.cursor % len(flat_index)
+        text = flat_index.next_text()
+        self.cursors.set(self._profile_key(profile), flat_index.cursor)
+        return position, text
+
+    def next_in_folder(self, profile, folder):
+        """Следующий текст папки folder (узел Folder профиля) или None."""
+        flat_index = self.flat_indexes[profile]
+        items = folder.items
+        total = flat_index.count(items)
+        if not total:
+            return None
+        key = f"folder:{profile}/{folder.name}"
+        if self.strategy != 'round_robin':
+            return flat_index.text_at(self._pick(key, RotationPool(flat_index, items)), items)
+        position = self.cursors.get(key) % total
+        self.cursors.set(key, (position + 1) % total)
+        return flat_index.text_at(position, items)
+
+    def save_positions(self):
+        """Запоминает курсоры профилей (после правок они могли сдвинуться)."""
+        for profile, flat_index in self.flat_indexes.items():
+            self.cursors.set(self._profile_key(profile), flat_index.cursor)
+
+    def _pick(self, key, pool):
+        strategy = self._strategies.get(key)
+        if strategy is None:
+            strategy = self._strategies[key] = make_strategy(self.strategy, self.seed, key)
+        return strategy.next(pool)
+
+    @staticmethod
+    def _profile_key(profile):
+        return f"profile:{profile}"
@@ -0,0 +1,200 @@
+import random
+from collections import OrderedDict, deque
+
+
+class RotationPool:
+    """Тексты, по которым идёт ротация: весь профиль или одна папка.
+
+    Обёртка над FlatIndex, через которую стратегии получают число текстов,
+    текст по номеру и версию (меняется при каждой правке состава)."""
+
+    def __init__(self, flat_index, items=None):
+        self.flat_index = flat_index
+        self.items = items
+
+    def __len__(self):
+        return self.flat_index.count(self.items)
+
+    @property
+    def version(self):
+        return self.flat_index.version
+
+    def text_at(self, position):
+        return self.flat_index.text_at(position, self.items)
+
+    def weights(self):
+        """Вес текста - 1/размер его элемента верхнего уровня: каждая папка
+        (и каждый отдельный текст) выпадает одинаково часто, сколько бы
+        текстов в ней ни было."""
+        weights = []
+        for size in self.flat_index.group_sizes(self.items):
+            if size:
+                weights.extend([1.0 / size] * size)
+        return weights
+
+
+class RotationStrategy:
+    """Стратегия выбора следующего текста.
+
+    next(pool) возвращает номер текста в плоском порядке pool. Подготовка
+    (reset) выполняется только после правки набора текстов, сам выбор -
+    за O(1) или O(log n) без просмотра всего списка.
+    """
+
+    def __init__(self, rng):
+        self.rng = rng
+        self._version = None
+
+    def next(self, pool):
+        if pool.version != self._version:
+            self._version = pool.version
+            self.reset(pool)
+        return self.pick(pool)
+
+    def reset(self, pool):
+        pass
+
+    def pick(self, pool):
+        raise NotImplementedError
+
+
+class ShuffleStrategy(RotationStrategy):
+    """Случайный порядок без повторов: каждый текст - один раз за круг.
+
+    Перестановка строится лениво (Фишер-Йетс по словарю обменов), поэтому
+    шаг стоит O(1) и память растёт только на число уже выданных текстов.
+    Новый круг не начинается с текста, которым закончился предыдущий."""
+
+    def reset(self, pool):
+        self._size = len(pool)
+        self._swaps = {}
+        self._step = 0
+        self._last = None
+
+    def pick(self, pool):
+        size = self._size
+        if self._step >= size:
+            self._swaps = {}
+            self._step = 0
+        step = self._step
+        if step == 0 and self._last is not None and 0 <= self._last < size and size > 1:
+            target = self.rng.randrange(size - 1)
+            if target >= self._last:
+                target += 1
+        else:
+            target = self.rng.randrange(step, size)
+        value = self._swaps.get(target, target)
+        self._swaps[target] = self._swaps.pop(step, step)
+        self._step = step + 1
+        self._last = value
+        return value
+
+
+class WeightedStrategy(RotationStrategy):
+    """Взвешенный случайный выбор по таблице псевдонимов (метод Воуза).
+
+    Таблица строится за O(n) один раз после правки, выбор - O(1)."""
+
+    def reset(self, pool):
+        weights = pool.weights()
+        size = len(weights)
+        total = sum(weights)
+        scaled = [weight * size / total for weight in weights]
+        self._probability = [1.0] * size
+        self._alias = list(range(size))
+        small = [i for i, value in enumerate(scaled) if value < 1.0]
+        large = [i for i, value in enumerate(scaled) if value >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self._probability[less] = scaled[less]
+            self._alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+
+    def pick(self, pool):
+        column = self.rng.randrange(len(self._probability))
+        return column if self.rng.random() < self._probability[column] else self._alias[column]
+
+
+class LeastRecentlyUsedStrategy(RotationStrategy):
+    """Текст, который дольше всех не вставлялся (новые тексты - первыми).
+
+    Порядок хранится в OrderedDict по тексту, поэтому переживает правки;
+    выбор и обновление - O(1)."""
+
+    def __init__(self, rng):
+        super(LeastRecentlyUsedStrategy, self).__init__(rng)
+        self._order = OrderedDict() # текст -> None, от давно использованного к недавнему
+
+    def reset(self, pool):
+        self._positions = {}
+        for position in range(len(pool)):
+            self._positions.setdefault(pool.text_at(position), position)
+        order = OrderedDict((text, None) for text in self._positions if text not in self._order)
+        for text in self._order:
+            if text in self._positions:
+                order[text] = None
+        self._order = order
+
+    def pick(self, pool):
+        text = next(iter(self._order))
+        self._order.move_to_end(text)
+        return self._positions[text]
+
+
+class SkipRecentStrategy(RotationStrategy):
+    """Случайный текст, не встречавшийся среди последних window вставок.
+
+    Окно ограничено половиной числа текстов, так что подходящий текст
+    находится в среднем за две попытки."""
+
+    WINDOW = 5
+    MAX_ATTEMPTS = 32
+
+    def __init__(self, rng, window=WINDOW):
+        super(SkipRecentStrategy, self).__init__(rng)
+        self.window = window
+        self._recent = deque()
+
+    def reset(self, pool):
+        self._limit = min(self.window, len(pool) // 2)
+        while len(self._recent) > self._limit:
+            self._recent.popleft()
+
+    def pick(self, pool):
+        size = len(pool)
+        for _ in range(self.MAX_ATTEMPTS):
+            position = self.rng.randrange(size)
+            text = pool.text_at(position)
+            if text not in self._recent:
+                break
+        if self._limit:
+            self._recent.append(text)
+            if len(self._recent) > self._limit:
+                self._recent.popleft()
+        return position
+
+
+# Стратегии со случайным выбором; 'round_robin' (по порядку) реализован
+# самим RotationEngine, так как его курсор сохраняется между запусками
+STRATEGIES = {
+    'shuffle': ShuffleStrategy,
+    'weighted': WeightedStrategy,
+    'lru': LeastRecentlyUsedStrategy,
+    'skip_recent': SkipRecentStrategy,
+}
+
+# Названия для окна настроек
+STRATEGY_TITLES = {
+    'round_robin': "По порядку",
+    'shuffle': "Случайно без повторов",
+    'weighted': "Папки поровну",
+    'lru': "Давно не вставленные",
+    'skip_recent': "Случайно, без последних 5",
+}
+
+
+def make_strategy(name, seed=None, key=''):
+    """Создаёт стратегию name; при заданном seed выбор детерминирован (для каждого key свой поток)."""
+    rng = random.Random(f"{seed}:{key}") if seed is not None else random.Random()
+    return STRATEGIES[name](rng)
@@ -0,0 +1,406 @@
+import bisect
+import gc
+import heapq
+import re
+from collections import defaultdict
+
+from models.change_bus import FolderLoaded, NodeInserted, NodeRemoved, NodeUpdated
+from models.fuzzy import char_mask, fuzzy_word_score, layout_variants, missing_at_most, typo_limit
+
+WORD_RE = re.compile(r'\w+')
+
+
+class SearchResult:
+    __slots__ = ('kind', 'value', 'folders', 'spans', 'score')
+
+    def __init__(self, kind, value, folders, spans, score):
+        self.kind = kind # 'text' или 'folder'
+        self.value = value # Узел Snippet или Folder
+        self.folders = folders # Цепочка папок от корня до элемента (для папки - включая её)
+        self.spans = spans # [(start, end)] совпадений в тексте/имени папки
+        self.score = score
+
+
+class PendingDoc:
+    """Элемент ещё не прочитанной папки: узла для него пока нет, есть только
+    строка в хранилище. Узел получается по ссылке папки и номеру строки
+    (SearchIndex._resolve), когда элемент попадает в результаты."""
+    __slots__ = ('parent_ref', 'row', 'text')
+
+    def __init__(self, parent_ref, row, text):
+        self.parent_ref = parent_ref
+        self.row = row
+        self.text = text # Текст или имя папки
+
+
+class SearchIndex:
+    """Инвертированный индекс по словам всех текстов и имён папок профиля.
+
+    Словарь слов хранится отсортированным, поэтому слово запроса ищется как
+    префикс: бинарный поиск даёт диапазон подходящих слов, их списки документов
+    объединяются, а для нескольких слов запроса - пересекаются. Набор
+    кандидатов обрывается на MAX_CANDIDATES ещё при переборе списков, и
+    ранжируются только они, поэтому частый префикс не обходит весь профиль.
+
+    Если точных совпадений мало, слово запроса сравнивается со всем словарём
+    нечётко (опечатки, перестановки, подпоследовательность); для каждого слова
+    словаря заранее посчитана битовая маска букв, отсекающая явно непохожие
+    слова без посимвольного сравнения, а сами слова разложены по первой букве
+    (первая буква считается набранной верно или переставленной со второй). Запрос, набранный в другой раскладке,
+    ищется так же, как исходный. К оценке совпадения добавляется частота и
+    давность выбора текста (frecency), если она передана.
+
+    Документ - узел Snippet или Folder (models/snippet_tree.py), его номер -
+    id узла. Индекс обновляется по событиям шины изменений (on_change):
+    вставка, удаление и правка переиндексируют только затронутые узлы,
+    перемещение индекса не меняет.
+
+    rebuild только запоминает профиль: индекс строится при первом поиске
+    или явном вызове ensure_built (после запуска, когда окно выбора
+    готовится заранее), чтобы загрузка не читала и не разбирала все тексты.
+    Ленивые папки (хранилище SQLite) при этом не читаются в дерево: их
+    содержимое одним запросом отдаёт source(refs), такие документы
+    (PendingDoc) имеют номер -id строки хранилища и заменяются узлами,
+    когда папка прочитана (событие FolderLoaded).
+    """
+
+    MAX_RESULTS = 50
+    # Для очень частых префиксов (одна-две буквы) рассматриваем не больше
+    # стольких документов, чтобы ответ оставался мгновенным
+    MAX_CANDIDATES = 1000
+    FUZZY_MIN_LENGTH = 3
+    FUZZY_MAX_WORDS = 20
+    LAYOUT_WEIGHT = 0.9 # Совпадение после смены раскладки чуть хуже точного
+    FRECENCY_WEIGHT = 1.5
+
+    def __init__(self, frecency=None, source=None):
+        self.frecency = frecency
+        # source(refs) -> [(id, ref родителя, строка, kind, content)] - содержимое ленивых папок refs
+        self.source = source
+        self._docs = {} # id узла (или -id строки хранилища) -> (kind, узел или PendingDoc, текст в нижнем регистре)
+        self._folders = {} # ref -> узел ленивой папки (и после её чтения)
+        self._pending = {} # ref папки -> [номера документов PendingDoc её элементов]
+        self._postings = {} # слово -> set(id узла)
+        self._vocab = [] # отсортированные слова
+        self._masks = {} # первая буква -> {слово: битовая маска его букв}
+        self._items = [] # Верхний уровень профиля, по которому строится индекс
+        self._built = True
+
+    def rebuild(self, items):
+        """Перестраивает индекс по узлам items (верхний уровень профиля popup) при следующем поиске."""
+        self._items = items
+        self._built = False
+
+    def ensure_built(self):
+        if self._built:
+            return
+        self._docs = {}
+        self._folders = {}
+        self._pending = {}
+        entries = [entry for node in self._items for entry in self._node_docs(node)]
+        if self._folders and self.source is not None:
+            for row_id, parent_ref, row, kind, content in self.source(list(self._folders)):
+                entries.append((-row_id, kind, PendingDoc(parent_ref, row, content), content))
+                self._pending.setdefault(parent_ref, []).append(-row_id)
+        # Одним проходом, без _add_doc: словарь сортируется и маски
+        # считаются один раз, а не при каждом новом слове. Сборщик мусора
+        # на это время отключается, как и при построении дерева
+        docs = self._docs
+        postings = defaultdict(set)
+        find_words = WORD_RE.findall
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for doc_id, kind, target, text in entries:
+                lowered = text.lower()
+                docs[doc_id] = (kind, target, lowered)
+                for word in set(find_words(lowered)):
+                    postings[word].add(doc_id)
+        finally:
+            if gc_enabled:
+                gc.enable()
+        self._postings = dict(postings)
+        self._vocab = sorted(self._postings)
+        self._masks = {}
+        for word in self._vocab:
+            self._masks.setdefault(word[0], {})[word] = char_mask(word)
+        self._built = True
+
+    def on_change(self, event):
+        """Обновляет индекс по событию шины изменений (после правки)."""
+        if not self._built:
+            return # Правка попадёт в индекс при его построении
+        if isinstance(event, FolderLoaded):
+            self._on_folder_loaded(event.folder, event.ref)
+        elif isinstance(event, NodeInserted):
+            self._index_node(event.node)
+        elif isinstance(event, NodeRemoved):
+            self._drop_node(event.node)
+        elif isinstance(event, NodeUpdated):
+            self._remove_doc(event.node.id)
+            self._add_node_doc(event.node)
+
+    def search(self, query, limit=MAX_RESULTS):
+        """Возвращает до limit результатов SearchResult, лучшие первыми."""
+        self.ensure_built()
+        # Весь запрос в другой раскладке пробуем, только если как есть ничего не нашлось:
+        # в нём знаки препинания могут оказаться буквами ("lj,hsq" -> "добрый")
+        for variant in layout_variants(query.lower()):
+            results = self._search_words(variant, limit)
+            if results:
+                return results
+        return []
+
+    def _search_words(self, query, limit):
+        tokens = sorted(set(WORD_RE.findall(query)), key=len, reverse=True)
+        if not tokens:
+            return []
+        candidates = None # doc_id -> сумма качества совпадения слов запроса
+        terms = set() # Слова и префиксы, которые нужно подсветить
+        for token in tokens: # Длинные слова избирательнее - начинаем с них
+            matches = self._match_token(token, terms, limit, candidates)
+            if candidates is None:
+                candidates = matches
+            else:
+                candidates = {doc_id: quality + matches[doc_id]
+                              for doc_id, quality in candidates.items() if doc_id in matches}
+            if not candidates:
+                return []
+        phrase = ' '.join(WORD_RE.findall(query))
+        scored = heapq.nlargest(limit, ((self._score(doc_id, quality, phrase), doc_id)
+                                        for doc_id, quality in candidates.items()))
+        # Документы берутся до построения результатов: чтение папки при
+        # получении узла заменяет документы её элементов
+        docs = [(self._docs[doc_id], score) for score, doc_id in scored]
+        return [self._make_result(doc, terms, score) for doc, score in docs]
+
+    def _match_token(self, token, terms, limit, within=None):
+        """Документы, подходящие под одно слово запроса: doc_id -> качество 0..1.
+
+        within - кандидаты по предыдущим словам запроса: совпадения ищутся
+        только среди них, нечёткий поиск нужен, если точных мало. Всего
+        документов - не больше MAX_CANDIDATES."""
+        matches = {}
+        for variant in layout_variants(token):
+            weight = 1.0 if variant == token else self.LAYOUT_WEIGHT
+            docs = self._prefix_docs(variant, within, self.MAX_CANDIDATES - len(matches))
+            if docs:
+                terms.add(variant)
+            for doc_id in docs:
+                if matches.get(doc_id, 0) < weight:
+                    matches[doc_id] = weight
+        # Числа (номера заказов) нечётко не ищем: номер с опечаткой - это другой номер
+        if len(matches) < limit and len(token) >= self.FUZZY_MIN_LENGTH and not token.isdigit():
+            for word, quality in self._fuzzy_words(token, within): # Лучшие слова первыми
+                terms.add(word)
+                for doc_id in self._word_docs(word, within):
+                    if doc_id not in matches:
+                        if len(matches) >= self.MAX_CANDIDATES:
+                            break
+                        matches[doc_id] = quality
+                    elif matches[doc_id] < quality:
+                        matches[doc_id] = quality
+        return matches
+
+    def _fuzzy_words(self, token, within=None):
+        """Лучшие FUZZY_MAX_WORDS слов, нечётко похожих на token.
+
+        Если кандидатов по другим словам запроса немного, сравниваем только
+        со словами этих документов, иначе - со всем словарём."""
+        if within is not None and len(within) <= self.FUZZY_MAX_WORDS * 10:
+            words = set()
+            for doc_id in within:
+                words.update(WORD_RE.findall(self._docs[doc_id][2]))
+            pool = [(word, char_mask(word)) for word in words]
+        else:
+            pool = [item for first in set(token[:2]) for item in self._masks.get(first, {}).items()]
+        token_mask = char_mask(token)
+        # Отсев с тем же запасом, что и у fuzzy_word_score: каждая опечатка
+        # может убрать из слова одну букву запроса и укоротить его на одну
+        limit = typo_limit(len(token))
+        min_length = len(token) - limit
+        found = []
+        for word, mask in pool:
+            if len(word) < min_length or not missing_at_most(token_mask, mask, limit):
+                continue
+            quality = fuzzy_word_score(token, word)
+            if quality:
+                found.append((quality, word))
+        return [(word, quality) for quality, word in heapq.nlargest(self.FUZZY_MAX_WORDS, found)]
+
+    def __len__(self):
+        self.ensure_built()
+        return len(self._docs)
+
+    def _index_node(self, node):
+        """Индексирует узел и всё содержимое папки."""
+        for entry in self._node_docs(node):
+            self._add_doc(*entry)
+
+    def _node_docs(self, node):
+        """(номер, kind, узел, текст) узла и всего содержимого папки.
+        Непрочитанная папка только запоминается: её содержимое - документы PendingDoc."""
+        pending = [node]
+        while pending:
+            node = pending.pop()
+            if not node.is_folder:
+                yield node.id, 'text', node, node.text
+                continue
+            yield node.id, 'folder', node, node.name
+            if node.loaded:
+                pending.extend(node.items)
+            else:
+                self._folders[node.ref] = node
+
+    def _drop_node(self, node):
+        pending = [node]
+        while pending:
+            node = pending.pop()
+            self._remove_doc(node.id)
+            if not node.is_folder:
+                continue
+            if node.loaded:
+                pending.extend(node.items)
+            else:
+                self._drop_pending(node.ref)
+
+    def _drop_pending(self, ref):
+        """Убирает документы PendingDoc из папки ref и вложенных в неё."""
+        refs = [ref]
+        while refs:
+            ref = refs.pop()
+            self._folders.pop(ref, None)
+            for doc_id in self._pending.pop(ref, ()):
+                if self._docs[doc_id][0] == 'folder':
+                    refs.append(-doc_id)
+                self._remove_doc(doc_id)
+
+    def _on_folder_loaded(self, folder, ref):
+        """Документы PendingDoc элементов папки заменяются её новыми узлами;
+        содержимое вложенных (ещё ленивых) папок остаётся как было."""
+        if self._folders.get(ref) is not folder:
+            return # Папка не из этого профиля
+        for doc_id in self._pending.pop(ref, ()):
+            self._remove_doc(doc_id)
+        for child in folder.items:
+            self._index_node(child)
+
+    def _resolve(self, target):
+        """Узел документа; для PendingDoc папки на пути к нему читаются."""
+        if target.__class__ is not PendingDoc:
+            return target
+        folder = self._folders.get(target.parent_ref)
+        if folder is None: # Родитель - тоже ещё не прочитанная вложенная папка
+            folder = self._resolve(self._docs[-target.parent_ref][1])
+        return folder.items[target.row]
+
+    def _add_node_doc(self, node):
+        if node.is_folder:
+            self._add_doc(node.id, 'folder', node, node.name)
+        else:
+            self._add_doc(node.id, 'text', node, node.text)
+
+    def _add_doc(self, doc_id, kind, target, text):
+        lowered = text.lower()
+        self._docs[doc_id] = (kind, target, lowered)
+        for word in set(WORD_RE.findall(lowered)):
+            docs = self._postings.get(word)
+            if docs is None:
+                docs = self._postings[word] = set()
+                bisect.insort(self._vocab, word)
+                self._masks.setdefault(word[0], {})[word] = char_mask(word)
+            docs.add(doc_id)
+
+    def _remove_doc(self, doc_id):
+        lowered = self._docs.pop(doc_id)[2]
+        for word in set(WORD_RE.findall(lowered)):
+            docs = self._postings[word]
+            docs.discard(doc_id)
+            if not docs:
+                del self._postings[word]
+                del self._masks[word[0]][word]
+                del self._vocab[bisect.bisect_left(self._vocab, word)]
+
+    def _prefix_docs(self, token, within=None, limit=MAX_CANDIDATES):
+        """Документы со словом, начинающимся с token, - не больше limit.
+
+        Списки документов не объединяются целиком: для частого префикса они
+        содержат почти весь профиль, поэтому набор обрывается на limit прямо
+        при переборе. within - кандидаты по предыдущим словам запроса."""
+        result = set()
+        vocab = self._vocab
+        position = bisect.bisect_left(vocab, token)
+        while len(result) < limit and position < len(vocab) and vocab[position].startswith(token):
+            for doc_id in self._word_docs(vocab[position], within):
+                result.add(doc_id)
+                if len(result) >= limit:
+                    break
+            position += 1
+        return result
+
+    def _word_docs(self, word, within=None):
+        """Документы со словом word; если задано within - только из него
+        (перебирается меньший из двух наборов)."""
+        postings = self._postings[word]
+        if within is None:
+            return postings
+        if len(within) < len(postings):
+            return (doc_id for doc_id in within if doc_id in postings)
+        return (doc_id for doc_id in postings if doc_id in within)
+
+    def _score(self, doc_id, quality, phrase):
+        kind, node, lowered = self._docs[doc_id]
+        score = quality
+        if lowered.startswith(phrase):
+            score += 2
+        elif phrase in lowered:
+            score += 1
+        if kind == 'folder':
+            score += 0.5
+        elif self.frecency is not None:
+            frecency = self.frecency.score(node.text)
+            # Насыщение: часто выбираемый текст поднимается, но не перебивает явное совпадение
+            score += self.FRECENCY_WEIGHT * frecency / (frecency + 1)
+        return score - len(lowered) / 10000 # При прочих равных - более короткий
+
+    def _make_result(self, doc, terms, score):
+        kind, target, lowered = doc
+        node = self._resolve(target)
+        # Папки от корня профиля до узла (папка-результат входит в цепочку)
+        folders = []
+        folder = node if kind == 'folder' else node.parent
+        while folder.parent is not None:
+            folders.append(folder)
+            folder = folder.parent
+        folders.reverse()
+        return SearchResult(kind, node, folders, find_spans(lowered, terms), score)
+
+
+def find_spans(lowered, tokens):
+    """Находит в тексте начала слов, совпадающие с tokens; пересекающиеся отрезки сливаются."""
+    spans = []
+    for token in tokens:
+        for match in re.finditer(r'\b' + re.escape(token), lowered):
+            spans.append((match.start(), match.end()))
+    spans.sort()
+    merged = []
+    for start, end in spans:
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def make_preview(text, spans, width=50):
+    """Однострочное превью текста вокруг первого совпадения и сдвинутые под него отрезки."""
+    start = 0
+    if spans and spans[0][1] > width - 3:
+        start = max(0, spans[0][0] - 15)
+    preview = text[start:start + width].replace('\n', ' ')
+    prefix = '...' if start else ''
+    suffix = '...' if start + width < len(text) else ''
+    shift = len(prefix) - start
+    visible = [(max(s, start) + shift, min(e, start + width) + shift)
+               for s, e in spans if e > start and s < start + width]
+    return prefix + preview + suffix, visible
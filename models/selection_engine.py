@@ -0,0 +1,89 @@
+import re
+
+# Остановки ctrl+left: начала слов и групп знаков препинания (как в полях ввода Windows)
+WORD_STOP_RE = re.compile(r"\w+|[^\w\s]+")
+
+
+class SelectionEngine:
+    """Планирует выделение только что вставленного текста в режиме ротации.
+
+    Раньше выделение делалось нажатием стрелки влево на каждый символ, поэтому
+    задержка росла вместе с длиной текста. Здесь тексты до max_steps символов
+    выделяются посимвольно, длинные - прыжками: последняя строка одним
+    shift+home (или по словам, если у неё есть отступ), средние строки -
+    shift+up, первая строка - по словам (ctrl+shift+left). Число нажатий
+    зависит от числа строк и слов первой строки, а не от длины текста, и
+    вставленный текст выделяется всегда, чтобы следующая вставка ротации
+    заменила его.
+    """
+
+    MAX_STEPS = 64
+
+    def __init__(self, max_steps=MAX_STEPS):
+        self.max_steps = max_steps
+
+    def plan_select(self, text):
+        """Шаги после ctrl+v, выделяющие вставленный текст (курсор стоит в его конце)."""
+        # Перевод строки CRLF редакторы проходят одним нажатием стрелки
+        text = text.replace('\r\n', '\n')
+        if not text:
+            return []
+        if len(text) <= self.max_steps:
+            moves = ['left'] * len(text)
+        else:
+            moves = self._jump_moves(text)
+        return [('press', 'shift')] + [('send', key) for key in moves] + [('release', 'shift')]
+
+    def _jump_moves(self, text):
+        lines = text.split('\n')
+        if len(lines) == 1:
+            return _line_moves(text, joined=True)
+        last = lines[-1]
+        # Без отступа home ведёт в начало строки и в редакторах с "умным" home
+        last_moves = ['home'] if last and not last[0].isspace() else _line_moves(last)
+        # Из начала последней строки - в начало второй, затем в конец первой
+        return (last_moves + ['up'] * (len(lines) - 2) + ['left']
+                + _line_moves(lines[0], joined=True))
+
+
+def _line_moves(line, joined=False):
+    """Нажатия, выделяющие строку line от её конца до начала.
+
+    joined - перед строкой может стоять чужой текст (первая строка вставки):
+    её первое слово выделяется посимвольно, иначе ctrl+left захватил бы и
+    слово, к которому вставка прилипла."""
+    starts = [match.start() for match in WORD_STOP_RE.finditer(line)]
+    if not starts:
+        # Строка из пробелов: ctrl+left перескочил бы на предыдущую строку
+        return ['left'] * len(line)
+    if joined:
+        # После прыжков курсор стоит в начале второго слова: остаток до него
+        # (первое слово и пробелы за ним) выделяется посимвольно
+        jumps = len(starts) - 1
+        chars = starts[1] if jumps else len(line)
+    else:
+        jumps = len(starts)
+        chars = starts[0] # Отступ
+    if jumps + chars >= len(line):
+        return ['left'] * len(line)
+    return ['ctrl+left'] * jumps + ['left'] * chars
+
+
+def run_steps(steps, backend):
+    """Выполняет шаги плана через backend с API библиотеки keyboard.
+
+    Зажатые клавиши отпускаются и при ошибке посреди плана."""
+    pressed = []
+    try:
+        for action, key in steps:
+            if action == 'send':
+                backend.press_and_release(key)
+            elif action == 'press':
+                backend.press(key)
+                pressed.append(key)
+            elif action == 'release':
+                backend.release(key)
+                pressed.remove(key)
+    finally:
+        for key in reversed(pressed):
+            backend.release(key)
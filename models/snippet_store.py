@@ -0,0 +1,182 @@
+"""Хранилище текстов без Qt: профили и настройки, индексы, ротация и запись.
+
+SnippetStore - ядро программы. Главное окно только показывает его данные
+и передаёт правки; бенчмарки и утилиты работают с ним напрямую:
+
+    store = SnippetStore(path)
+    store.load()
+    store.apply({'op': 'add', 'profile': 'rotation', 'path': [0], 'value': "Текст"})
+    position, text = store.next_in_profile('rotation')
+    store.close()
+"""
+import logging
+
+from models.change_bus import (ChangeBus, FolderLoaded, NodeInserted, NodeMoved, NodeRemoved, NodeUpdated,
+                               SettingChanged, TreeReset)
+from models.change_journal import apply_op
+from models.config_codec import default_state
+from models.flat_index import FlatIndex
+from models.frecency import FrecencyStore
+from models.rotation import RotationCursors, RotationEngine
+from models.search_index import SearchIndex
+from models.snippet_tree import PROFILES, SnippetTree, find_folder, unique_folder_name
+from models.storage import open_storage
+
+log = logging.getLogger(__name__)
+
+
+class SnippetStore:
+    """Профили (tree - узлы Snippet/Folder, см. models/snippet_tree.py),
+    настройки (state) и всё, что от них зависит: плоские индексы ротации,
+    поисковый индекс окна выбора, частота выбора текстов, курсоры ротации и
+    хранилище на диске. В хранилище профили уходят в исходном формате JSON.
+
+    Правки передаются операциями журнала (см. models/change_journal.py).
+    apply меняет данные, а индексы и хранилище узнают о правке из шины
+    изменений bus (models/change_bus.py) и обновляют только затронутое
+    место. На ту же шину подписываются представления (модель Qt).
+    """
+
+    def __init__(self, config_file, on_error=None):
+        """on_error(сообщение) - ошибка фоновой записи (вызывается из потока записи)."""
+        self.config_file = config_file
+        # Хранилище: JSON с журналом правок или SQLite (см. models/storage.py)
+        self.storage = open_storage(config_file, on_error=on_error)
+        self.bus = ChangeBus()
+        # Хранилище SQLite отдаёт папки лениво, их содержимое читается через _load_children
+        self.tree = SnippetTree(self.bus, source=self._load_children)
+        # Плоский порядок текстов каждого профиля, обновляется вместе с правками
+        self.flat_indexes = {profile: FlatIndex() for profile in PROFILES}
+        # Тексты, которые чаще и недавно выбирали в окне, поднимаются в результатах поиска
+        self.frecency = FrecencyStore(config_file + ".frecency")
+        self.frecency.load()
+        # Содержимое ленивых папок индекс берёт из хранилища, не читая папки в дерево
+        self.search_index = SearchIndex(frecency=self.frecency, source=self._search_rows)
+        # Курсоры ротации хранятся отдельно от конфигурации и переживают перезапуск
+        self.rotation_cursors = RotationCursors(config_file + ".cursors")
+        self.rotation_cursors.load()
+        self.rotation = RotationEngine(self.flat_indexes, self.rotation_cursors)
+        self._needs_snapshot = False
+        self.bus.subscribe(self._on_reset, TreeReset)
+        self.bus.subscribe(self._prepare_rotation, NodeInserted, NodeRemoved, NodeMoved, before=True)
+        self.bus.subscribe(self._update_rotation, NodeInserted, NodeRemoved, NodeMoved)
+        self.bus.subscribe(self._update_search, NodeInserted, NodeRemoved, NodeUpdated)
+        self.bus.subscribe(self.search_index.on_change, FolderLoaded)
+        self.bus.subscribe(self._record, NodeInserted, NodeRemoved, NodeMoved, NodeUpdated, SettingChanged)
+        self.set_state(default_state())
+
+    # --- Загрузка и сохранение ---
+
+    def load(self):
+        """Загружает конфигурацию. Возвращает True, если её стоит пересохранить
+        (старый формат или обрезанный журнал правок). Ошибки чтения пробрасываются, данные при этом не меняются."""
+        state, migrated = self.storage.load()
+        self.set_state(state)
+        return migrated
+
+    def set_state(self, state):
+        """Заменяет профили и настройки (state в формате config_codec); индексы
+        перестраиваются по событию TreeReset."""
+        # Настройки без профилей: профили живут в дереве
+        self.state = {key: value for key, value in state.items() if not key.startswith('data_')}
+        self.rotation.set_strategy(self.state['rotation_strategy'])
+        self.tree.load({profile: state['data_' + profile] for profile in PROFILES})
+
+    def _load_children(self, ref):
+        return self.storage.load_children(ref)
+
+    def _search_rows(self, refs):
+        return self.storage.search_rows('popup', refs)
+
+    def snapshot(self):
+        """Профили и настройки в формате config_codec (как в файле)."""
+        state = {'data_' + profile: self.tree.to_json(profile) for profile in PROFILES}
+        state.update(self.state)
+        return state
+
+    def save(self):
+        """Передаёт полный снимок в хранилище (запись идёт в фоне)."""
+        self.storage.save(self.snapshot())
+
+    def flush(self):
+        """Дожидается окончания фоновой записи."""
+        self.storage.flush()
+
+    def close(self):
+        self.storage.close()
+        self.frecency.close()
+        self.rotation_cursors.close()
+
+    # --- Данные ---
+
+    def profile(self, profile):
+        """Узлы верхнего уровня профиля ('rotation' или 'popup')."""
+        return self.tree.roots[profile].items
+
+    def has_texts(self, profile):
+        return len(self.flat_indexes[profile]) > 0
+
+    def suggest_folder_name(self, profile, base_name):
+        """Имя новой папки профиля, не совпадающее с существующими."""
+        return unique_folder_name(self.profile(profile), base_name)
+
+    def apply(self, op):
+        """Выполняет правку (операцию журнала) и записывает её. Возвращает True,
+        если пора сохранить полный снимок (журнал вырос или правку записать
+        не удалось). Значения в op ('value' у add/edit) - в формате JSON."""
+        self._needs_snapshot = False
+        if op['op'] == 'set':
+            if op['key'] == 'rotation_strategy':
+                self.rotation.set_strategy(op['value'])
+                op['value'] = self.rotation.strategy # Неизвестное имя заменяется на 'round_robin'
+            apply_op(self.state, op)
+            self.bus.publish(SettingChanged(op))
+        else:
+            self.tree.apply(op)
+        return self._needs_snapshot
+
+    # --- Подписчики шины изменений ---
+
+    def _on_reset(self, event):
+        for profile in PROFILES:
+            self.flat_indexes[profile].rebuild(self.profile(profile))
+        self.rotation.restore()
+        self.search_index.rebuild(self.profile('popup'))
+
+    def _prepare_rotation(self, event):
+        self.flat_indexes[event.profile].prepare(event.op)
+
+    def _update_rotation(self, event):
+        self.flat_indexes[event.profile].update(event.op)
+        self.rotation.save_positions() # Курсор мог сдвинуться вместе с текстами
+
+    def _update_search(self, event):
+        if event.profile == 'popup': # Поиск есть только в окне выбора
+            self.search_index.on_change(event)
+
+    def _record(self, event):
+        try:
+            if self.storage.record(event.op):
+                self._needs_snapshot = True
+        except Exception as e:
+            log.error("Не удалось сохранить правку: %s", e)
+            self._needs_snapshot = True # Сохраняем полный снимок
+
+    # --- Ротация ---
+
+    def next_in_profile(self, profile):
+        """(позиция, текст) следующего текста профиля; (None, None), если текстов нет."""
+        return self.rotation.next_in_profile(profile)
+
+    def next_in_folder(self, folder_name, preferred_profile):
+        """Следующий текст папки верхнего уровня; папка ищется сначала в
+        preferred_profile, затем в другом профиле. None - папки нет или она пуста."""
+        for profile in sorted(PROFILES, key=lambda name: name != preferred_profile):
+            folder = find_folder(self.profile(profile), folder_name)
+            if folder is not None:
+                return self.rotation.next_in_folder(profile, folder)
+        return None
+
+    def record_pick(self, text):
+        """Запоминает выбор текста в окне выбора (для порядка результатов поиска)."""
+        self.frecency.record(text)
@@ -0,0 +1,304 @@
+"""Дерево текстов профилей без Qt.
+
+В файле конфигурации и журнале правок профиль - список, элемент которого
+либо строка (текст), либо папка {'type': 'folder', 'name': ..., 'items': [...]}.
+В памяти программы тот же профиль - дерево узлов Snippet и Folder: у каждого
+узла есть целочисленный id, ссылка на родительскую папку и номер строки в
+ней (row), SnippetTree хранит индекс id -> узел и сообщает о каждой правке
+событием на шине (models/change_bus.py). Путь к элементу - список индексов
+от корня профиля; по узлу он собирается из row за O(глубина).
+
+Папка может загружаться лениво: хранилище отдаёт вместо содержимого
+ссылку 'ref' и число текстов 'texts' ({'type': 'folder', 'name': ...,
+'ref': ..., 'texts': N}), а сами элементы читаются через SnippetTree.source
+при первом обращении к Folder.items (после чего публикуется FolderLoaded).
+
+resolve_path и apply_tree_op работают с исходным JSON (воспроизведение
+журнала поверх снимка), SnippetTree.apply - с узлами.
+"""
+import gc
+import logging
+
+from models.change_bus import ChangeBus, FolderLoaded, NodeInserted, NodeMoved, NodeRemoved, NodeUpdated, TreeReset
+
+log = logging.getLogger(__name__)
+
+PROFILES = ('rotation', 'popup')
+
+
+class Snippet:
+    """Текст."""
+    __slots__ = ('id', 'parent', 'row', 'text')
+    is_folder = False
+
+    def __init__(self, node_id, parent, text, row=0):
+        self.id = node_id
+        self.parent = parent # Папка, в которой лежит текст
+        self.row = row # Номер строки в parent.items
+        self.text = text
+
+    def __repr__(self):
+        return f"Snippet({self.id}, {self.text!r})"
+
+    def to_json(self):
+        return self.text
+
+
+class PendingItems:
+    """Содержимое ещё не прочитанной папки: чем его загрузить и сколько в нём текстов."""
+    __slots__ = ('load', 'ref', 'size')
+
+    def __init__(self, load, ref, size):
+        self.load = load # load(folder, ref) заполняет folder.items
+        self.ref = ref
+        self.size = size
+
+
+class Folder:
+    """Папка или корень профиля (у корня parent = None, name - имя профиля)."""
+    __slots__ = ('id', 'parent', 'row', 'name', '_items')
+    is_folder = True
+
+    def __init__(self, node_id, parent, name, pending=None, row=0):
+        self.id = node_id
+        self.parent = parent
+        self.row = row # Номер строки в parent.items (у корня - 0)
+        self.name = name
+        self._items = [] if pending is None else pending
+
+    @property
+    def items(self):
+        """Узлы Snippet и Folder по порядку (ленивая папка читается здесь)."""
+        items = self._items
+        if items.__class__ is list:
+            return items
+        self._items = []
+        items.load(self, items.ref)
+        return self._items
+
+    @property
+    def loaded(self):
+        return self._items.__class__ is list
+
+    @property
+    def ref(self):
+        """Ссылка непрочитанной папки в хранилище (None, если папка прочитана)."""
+        return None if self.loaded else self._items.ref
+
+    @property
+    def size(self):
+        """Число текстов в ещё не прочитанной папке (None, если папка прочитана)."""
+        return None if self.loaded else self._items.size
+
+    @property
+    def title(self):
+        return self.name or 'Безымянная папка'
+
+    def __repr__(self):
+        count = len(self._items) if self.loaded else "?"
+        return f"Folder({self.id}, {self.name!r}, {count} items)"
+
+    def to_json(self):
+        return {'type': 'folder', 'name': self.name, 'items': [item.to_json() for item in self.items]}
+
+
+class SnippetTree:
+    """Деревья профилей 'rotation' и 'popup' и индекс узлов по id.
+
+    id выдаются по возрастанию и не повторяются, в том числе после load,
+    поэтому сохранённый id не может указать на чужой узел. Текст при
+    правке (edit) остаётся тем же узлом с тем же id. Номера строк (row)
+    правка пересчитывает только у сдвинувшихся соседей в той же папке.
+
+    Каждая правка публикуется в bus дважды: до изменения (publish_before)
+    и после (publish); load публикует TreeReset.
+    """
+
+    def __init__(self, bus=None, source=None):
+        self.bus = bus if bus is not None else ChangeBus()
+        self.source = source # source(ref) -> JSON-список элементов ленивой папки
+        self.nodes = {} # id -> Snippet/Folder
+        self.roots = {} # профиль -> корневая Folder
+        self._next_id = 1
+        self.load({profile: [] for profile in PROFILES})
+
+    def load(self, profiles):
+        """Строит деревья из JSON: profiles = {'rotation': [...], 'popup': [...]}.
+
+        На время построения сборщик мусора отключается: иначе он много раз
+        обходит уже созданные узлы, пока их число растёт."""
+        self.bus.publish_before(TreeReset(self))
+        self.nodes = {}
+        self.roots = {}
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for profile in PROFILES:
+                root = self.roots[profile] = self._register(Folder(None, None, profile))
+                self._fill(root, profiles.get(profile, []))
+        finally:
+            if gc_enabled:
+                gc.enable()
+        self.bus.publish(TreeReset(self))
+
+    def to_json(self, profile):
+        """Профиль в формате файла конфигурации."""
+        return [item.to_json() for item in self.roots[profile].items]
+
+    def node(self, node_id):
+        return self.nodes.get(node_id)
+
+    def create(self, value, parent):
+        """Узел из JSON-значения (строки или словаря папки) внутри parent."""
+        if isinstance(value, str):
+            return self._register(Snippet(None, parent, value))
+        folder = self._register(Folder(None, parent, value.get('name', '')))
+        self._fill(folder, value.get('items', []))
+        return folder
+
+    def container(self, profile, path):
+        """Папка, в которой лежит элемент path профиля."""
+        folder = self.roots[profile]
+        for row in path[:-1]:
+            folder = folder.items[row]
+        return folder
+
+    def path_of(self, node):
+        """(профиль, путь) узла - адрес в формате операций журнала."""
+        path = []
+        while node.parent is not None:
+            path.append(node.row)
+            node = node.parent
+        path.reverse()
+        return node.name, path
+
+    def apply(self, op):
+        """Применяет к деревьям операцию журнала add/delete/move/edit/rename
+        и публикует событие о ней. Возвращает это событие."""
+        kind = op['op']
+        folder = self.container(op['profile'], op['path'])
+        row = op['path'][-1]
+        if kind == 'add':
+            event = NodeInserted(op, folder, row, self.create(op['value'], folder))
+        elif kind == 'delete':
+            event = NodeRemoved(op, folder, row, folder.items[row])
+        elif kind == 'move':
+            event = NodeMoved(op, folder, row, folder.items[row])
+        elif kind in ('edit', 'rename'):
+            event = NodeUpdated(op, folder, row, folder.items[row])
+            if event.node.is_folder != (kind == 'rename'):
+                raise ValueError(f"Операция {kind} не подходит для узла {event.node!r}")
+        else:
+            raise ValueError(f"Неизвестная операция журнала: {kind}")
+
+        self.bus.publish_before(event)
+        items = folder.items
+        if kind == 'add':
+            items.insert(row, event.node)
+            _renumber(items, row, len(items))
+        elif kind == 'delete':
+            self._release(items.pop(row))
+            _renumber(items, row, len(items))
+        elif kind == 'move':
+            items.insert(event.to, items.pop(row))
+            _renumber(items, min(row, event.to), max(row, event.to) + 1)
+        elif kind == 'edit':
+            event.node.text = op['value']
+        else:
+            event.node.name = op['name']
+        self.bus.publish(event)
+        return event
+
+    def _register(self, node):
+        node.id = self._next_id
+        self._next_id += 1
+        self.nodes[node.id] = node
+        return node
+
+    def _fill(self, folder, values):
+        """Добавляет в папку узлы из JSON-списка values (со всеми вложенными папками).
+
+        Обход без рекурсии и с локальными ссылками: при загрузке так строятся
+        все узлы профиля."""
+        nodes = self.nodes
+        next_id = self._next_id
+        pending = [(folder, values)]
+        while pending:
+            parent, values = pending.pop()
+            items = parent.items
+            for value in values:
+                if isinstance(value, str):
+                    node = Snippet(next_id, parent, value, len(items))
+                elif isinstance(value, dict) and value.get('type') == 'folder':
+                    if 'ref' in value:
+                        node = Folder(next_id, parent, value.get('name', ''),
+                                      PendingItems(self._expand, value['ref'], value.get('texts', 0)), len(items))
+                    else:
+                        node = Folder(next_id, parent, value.get('name', ''), row=len(items))
+                        pending.append((node, value.get('items', [])))
+                else:
+                    log.warning("SnippetTree: пропущен элемент неизвестного типа в '%s': %r", parent.name, value)
+                    continue
+                nodes[next_id] = node
+                next_id += 1
+                items.append(node)
+        self._next_id = next_id
+
+    def _expand(self, folder, ref):
+        self._fill(folder, self.source(ref))
+        self.bus.publish(FolderLoaded(folder, ref))
+
+    def _release(self, node):
+        del self.nodes[node.id]
+        if node.is_folder and node.loaded: # У непрочитанной папки узлов ещё нет
+            for child in node.items:
+                self._release(child)
+
+
+def _renumber(items, start, stop):
+    for row in range(start, stop):
+        items[row].row = row
+
+
+def find_folder(items, name):
+    """Папка верхнего уровня с именем name (узел Folder) или None."""
+    for item in items:
+        if item.is_folder and item.name == name:
+            return item
+    return None
+
+
+def unique_folder_name(items, base_name):
+    """base_name или base_name (N), если папка с таким именем уже есть."""
+    existing = {item.name for item in items if item.is_folder}
+    name = base_name
+    counter = 1
+    while name in existing:
+        name = f"{base_name} ({counter})"
+        counter += 1
+    return name
+
+
+def resolve_path(items, path):
+    """Возвращает (список-родитель, индекс) для пути path внутри JSON-профиля items."""
+    for index in path[:-1]:
+        items = items[index].setdefault('items', [])
+    return items, path[-1]
+
+
+def apply_tree_op(items, op):
+    """Применяет к JSON-профилю items операцию add/delete/move/edit/rename."""
+    kind = op['op']
+    parent, index = resolve_path(items, op['path'])
+    if kind == 'add':
+        parent.insert(index, op['value'])
+    elif kind == 'delete':
+        del parent[index]
+    elif kind == 'move':
+        parent.insert(op['to'], parent.pop(index))
+    elif kind == 'edit':
+        parent[index] = op['value']
+    elif kind == 'rename':
+        parent[index]['name'] = op['name']
+    else:
+        raise ValueError(f"Неизвестная операция журнала: {kind}")
@@ -0,0 +1,447 @@
+import json
+import logging
+import os
+import queue
+import threading
+from functools import partial
+
+from models.change_journal import ChangeJournal, SETTINGS_KEYS
+from models.config_codec import decode_config, default_state, encode_config
+from utils.config_store import ConfigWriter, atomic_write_text
+
+log = logging.getLogger(__name__)
+
+# Переменная окружения для выбора хранилища: "json" или "sqlite"
+STORAGE_ENV_VAR = "TEXT_ROTATOR_STORAGE"
+
+
+def _read_json(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class JsonStorage:
+    """Хранилище в JSON-файле конфигурации с журналом правок рядом с ним.
+
+    Правки дописываются в журнал (record), полный снимок (save) пишется
+    в фоне атомарно, после чего журнал сжимается.
+    """
+    kind = "json"
+
+    def __init__(self, config_file, on_error=None):
+        self.config_file = config_file
+        self.writer = ConfigWriter(config_file, on_error=on_error)
+        self.journal = ChangeJournal(config_file + ".journal")
+
+    def load(self):
+        """Возвращает (state, needs_save). needs_save - формат был старым или журнал
+        пришлось обрезать на сломанной правке. Ошибки чтения JSON пробрасываются."""
+        config = _read_json(self.config_file)
+        state, migrated = decode_config(config)
+        self.journal.max_ops = config.get('journal_max_ops', ChangeJournal.DEFAULT_MAX_OPS)
+        self.journal.max_bytes = config.get('journal_max_bytes', ChangeJournal.DEFAULT_MAX_BYTES)
+        # Дополняем снимок правками из журнала, не вошедшими в него
+        replayed = self.journal.replay(state, config.get('journal_seq', 0))
+        if replayed:
+            log.info("Load Config: Из журнала применено правок: %s", replayed)
+        return state, migrated or self.journal.needs_snapshot
+
+    def record(self, op):
+        """Сохраняет одну правку. Возвращает True, если пора записать полный снимок."""
+        self.journal.append(op)
+        return self.journal.needs_compaction()
+
+    def save(self, state):
+        # Номер последней правки журнала, вошедшей в снимок
+        journal_seq = self.journal.seq
+        text = encode_config(state, journal_seq=journal_seq,
+                             journal_max_ops=self.journal.max_ops,
+                             journal_max_bytes=self.journal.max_bytes)
+        self.writer.write_async(text, on_written=partial(self.journal.compact, journal_seq))
+
+    def flush(self):
+        self.writer.flush()
+
+    def close(self):
+        self.writer.close()
+        self.journal.close()
+
+
+class SqliteStorage:
+    """Хранилище профилей в SQLite.
+
+    Все элементы обоих профилей лежат в одной таблице nodes: тексты и папки
+    различаются полем kind, у папки texts - число текстов в ней вместе с
+    вложенными папками. Порядок внутри папки задают разреженные ключи
+    position (с шагом POSITION_STEP): вставка и перенос получают ключ между
+    соседями и меняют одну строку, соседи перенумеровываются, только когда
+    промежуток между ними исчерпан. Настройки хранятся в таблице settings в
+    виде JSON-значений.
+
+    load читает только настройки и верхний уровень профилей; содержимое
+    папки читается при первом обращении к ней (load_children, см. ленивые
+    папки в models/snippet_tree.py). Правки (record) не пишутся из
+    GUI-потока: они ставятся в очередь и применяются потоком записи, который
+    держит списки id детей уже затронутых папок, поэтому путь правки
+    разрешается без обхода соседей. Если правку применить не удалось,
+    record начинает возвращать True, и следующий полный снимок (save)
+    перезаписывает базу в том же потоке.
+
+    При первом запуске профили переносятся из JSON-конфигурации (с учётом
+    журнала правок); сам JSON-файл не меняется. При возврате на JSON
+    (TEXT_ROTATOR_STORAGE=json) база выгружается обратно, см. open_storage.
+    """
+    kind = "sqlite"
+
+    SCHEMA_VERSION = 1
+    POSITION_STEP = 1 << 16
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS nodes (
+            id INTEGER PRIMARY KEY,
+            profile TEXT NOT NULL,
+            parent_id INTEGER REFERENCES nodes(id) ON DELETE CASCADE,
+            position INTEGER NOT NULL,
+            kind TEXT NOT NULL CHECK (kind IN ('text', 'folder')),
+            content TEXT NOT NULL,
+            texts INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS nodes_order ON nodes(profile, parent_id, position);
+        CREATE INDEX IF NOT EXISTS nodes_children ON nodes(parent_id, position);
+        CREATE TABLE IF NOT EXISTS settings (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, db_path, config_file, on_error=None):
+        import sqlite3 # Нужен только при включённом SQLite, JSON-запуск его не загружает
+        self.db_path = db_path
+        self.config_file = config_file
+        self.on_error = on_error
+        # Соединение общее для GUI-потока (чтение) и потока записи, доступ - под _lock
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript(self.SCHEMA)
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._children = {} # Только поток записи: id папки (или ('root', профиль)) -> [id детей]
+        self._positions = {} # Только поток записи: id -> ключ position
+        self._diverged = False # Правка не записалась - база отстаёт от памяти
+        self._thread = threading.Thread(target=self._run, name="SqliteWriter", daemon=True)
+        self._thread.start()
+
+    # --- Чтение (GUI-поток) ---
+
+    def load(self):
+        """Читает настройки и верхний уровень профилей. Возвращает (state, False)."""
+        self.flush()
+        with self._lock:
+            if self._setting('schema_version') is None:
+                with self.conn:
+                    self._import_json()
+            state = self._read_settings()
+        for profile in ('rotation', 'popup'):
+            state['data_' + profile] = self.load_children(('root', profile))
+        return state, False
+
+    def load_children(self, ref):
+        """Элементы папки ref (id строки или ('root', профиль)) в JSON-формате
+        SnippetTree; вложенные папки - ленивые ({'ref': id, 'texts': N}).
+
+        Очередь записи не ждём: правка в дереве всегда идёт в уже прочитанной
+        папке (SnippetTree.apply читает папку, прежде чем её менять), поэтому
+        в очереди нет ничего, что меняло бы содержимое ещё не прочитанной."""
+        with self._lock:
+            rows = self.conn.execute(*self._children_query(ref, "id, kind, content, texts")).fetchall()
+        return [content if kind == 'text' else {'type': 'folder', 'name': content, 'ref': node_id, 'texts': texts}
+                for node_id, kind, content, texts in rows]
+
+    def search_rows(self, profile, refs):
+        """Всё содержимое непрочитанных папок refs профиля одним запросом (для
+        поискового индекса): (id, ref родителя, номер строки в нём, kind, content).
+        Как и load_children, очередь записи не ждёт."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id, parent_id, kind, content FROM nodes WHERE profile = ? AND parent_id IS NOT NULL "
+                "ORDER BY parent_id, position", (profile,)).fetchall()
+        children = {}
+        for node_id, parent_id, kind, content in rows:
+            children.setdefault(parent_id, []).append((node_id, kind, content))
+        found = []
+        pending = list(refs)
+        while pending:
+            ref = pending.pop()
+            for row, (node_id, kind, content) in enumerate(children.get(ref, ())):
+                found.append((node_id, ref, row, kind, content))
+                if kind == 'folder':
+                    pending.append(node_id)
+        return found
+
+    def _children_query(self, ref, columns):
+        if isinstance(ref, tuple):
+            return (f"SELECT {columns} FROM nodes WHERE profile = ? AND parent_id IS NULL ORDER BY position",
+                    (ref[1],))
+        return f"SELECT {columns} FROM nodes WHERE parent_id = ? ORDER BY position", (ref,)
+
+    def _read_all(self):
+        """Полное состояние в формате config_codec одним проходом по таблице (для выгрузки в JSON)."""
+        state = self._read_settings()
+        nodes = {}
+        roots = {'rotation': state['data_rotation'], 'popup': state['data_popup']}
+        rows = self.conn.execute(
+            "SELECT id, profile, parent_id, kind, content FROM nodes ORDER BY parent_id, position")
+        # Строки идут по родителям, а не в порядке обхода дерева, поэтому
+        # раскладываем детей по папкам после создания всех узлов
+        children = []
+        for node_id, profile, parent_id, kind, content in rows:
+            value = content if kind == 'text' else {'type': 'folder', 'name': content, 'items': []}
+            nodes[node_id] = value
+            children.append((profile, parent_id, value))
+        for profile, parent_id, value in children:
+            if parent_id is None:
+                roots[profile].append(value)
+            else:
+                nodes[parent_id]['items'].append(value)
+        return state
+
+    def export_json(self):
+        """Выгружает базу в JSON-конфигурацию (журнал правок JSON при этом не нужен)."""
+        self.flush()
+        with self._lock:
+            state = self._read_all()
+        atomic_write_text(self.config_file, encode_config(state, journal_seq=0))
+        journal_path = self.config_file + ".journal"
+        if os.path.exists(journal_path):
+            os.remove(journal_path)
+        log.info("SqliteStorage: база выгружена в %s", self.config_file)
+
+    def _import_json(self):
+        """Переносит данные из JSON-конфигурации (и её журнала) при первом запуске."""
+        config = _read_json(self.config_file)
+        state, _ = decode_config(config)
+        journal = ChangeJournal(self.config_file + ".journal")
+        journal.replay(state, config.get('journal_seq', 0))
+        journal.close()
+        self._rewrite(state)
+        if config:
+            log.info("SqliteStorage: конфигурация перенесена в %s", self.db_path)
+
+    def _read_settings(self):
+        """default_state() с настройками из базы (профили пустые)."""
+        state = default_state()
+        for key in SETTINGS_KEYS:
+            value = self._setting(key)
+            if value is not None:
+                state[key] = value
+        return state
+
+    def _setting(self, key):
+        row = self.conn.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def _set_setting(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+                          (key, json.dumps(value, ensure_ascii=False)))
+
+    # --- Запись (через поток записи) ---
+
+    def record(self, op):
+        """Ставит правку в очередь записи. Возвращает True, если база отстала
+        от памяти и нужен полный снимок."""
+        self._queue.put(('op', op))
+        return self._diverged
+
+    def save(self, state):
+        """Полностью перезаписывает профили и настройки (в потоке записи)."""
+        self._queue.put(('state', state))
+
+    def flush(self):
+        """Дожидается, пока поток записи применит всё из очереди."""
+        self._queue.join()
+
+    def close(self):
+        self.flush()
+        self._queue.put(None)
+        self._thread.join(1.0)
+        with self._lock:
+            self.conn.close()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                self._queue.task_done()
+                return
+            # Всё, что накопилось в очереди, пишется одной транзакцией
+            batch = [job]
+            while True:
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    self._queue.put(None) # Остановка - после этой пачки
+                    self._queue.task_done()
+                    break
+                batch.append(job)
+            try:
+                with self._lock, self.conn:
+                    self._write_batch(batch)
+            except Exception as e:
+                log.error("SqliteStorage: не удалось записать правки: %s", e)
+                self._diverged = True
+                self._children = {}
+                self._positions = {}
+                if self.on_error:
+                    self.on_error(str(e))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write_batch(self, batch):
+        for kind, payload in batch:
+            if kind == 'state':
+                self._rewrite(payload)
+                self._diverged = False
+            elif not self._diverged: # После сбоя ждём полного снимка
+                self._apply(payload)
+
+    def _rewrite(self, state):
+        self.conn.execute("DELETE FROM nodes")
+        self._children = {}
+        self._positions = {}
+        for profile in ('rotation', 'popup'):
+            for position, value in enumerate(state['data_' + profile]):
+                self._insert(profile, None, (position + 1) * self.POSITION_STEP, value)
+        for key in SETTINGS_KEYS:
+            self._set_setting(key, state[key])
+        self._set_setting('schema_version', self.SCHEMA_VERSION)
+
+    def _insert(self, profile, parent_id, position, value):
+        """Вставляет элемент (с содержимым папки). Возвращает (id, число текстов)."""
+        if isinstance(value, str):
+            cursor = self.conn.execute(
+                "INSERT INTO nodes (profile, parent_id, position, kind, content) VALUES (?, ?, ?, 'text', ?)",
+                (profile, parent_id, position, value))
+            return cursor.lastrowid, 1
+        cursor = self.conn.execute(
+            "INSERT INTO nodes (profile, parent_id, position, kind, content) VALUES (?, ?, ?, 'folder', ?)",
+            (profile, parent_id, position, value.get('name', '')))
+        folder_id = cursor.lastrowid
+        texts = 0
+        for child_position, child in enumerate(value.get('items', [])):
+            texts += self._insert(profile, folder_id, (child_position + 1) * self.POSITION_STEP, child)[1]
+        if texts:
+            self.conn.execute("UPDATE nodes SET texts = ? WHERE id = ?", (texts, folder_id))
+        return folder_id, texts
+
+    def _child_ids(self, ref):
+        """Список id детей папки ref (читается из базы один раз, дальше правится на месте)."""
+        ids = self._children.get(ref)
+        if ids is None:
+            ids = []
+            for node_id, position in self.conn.execute(*self._children_query(ref, "id, position")):
+                ids.append(node_id)
+                self._positions[node_id] = position
+            self._children[ref] = ids
+        return ids
+
+    def _resolve(self, profile, path):
+        """(id папок на пути, ref папки-родителя, список id её детей) для пути path."""
+        ancestors = []
+        ref = ('root', profile)
+        for index in path[:-1]:
+            ref = self._child_ids(ref)[index]
+            ancestors.append(ref)
+        return ancestors, ref, self._child_ids(ref)
+
+    def _position_at(self, ids, index):
+        """Ключ position для нового элемента на месте index списка ids."""
+        before = self._positions[ids[index - 1]] if index > 0 else None
+        after = self._positions[ids[index]] if index < len(ids) else None
+        if before is None:
+            return self.POSITION_STEP if after is None else after - self.POSITION_STEP
+        if after is None:
+            return before + self.POSITION_STEP
+        if after - before > 1:
+            return (before + after) // 2
+        # Промежуток исчерпан: перенумеровываем детей этой папки
+        for number, node_id in enumerate(ids):
+            self._positions[node_id] = (number + 1) * self.POSITION_STEP
+        self.conn.executemany("UPDATE nodes SET position = ? WHERE id = ?",
+                              [(self._positions[node_id], node_id) for node_id in ids])
+        return self._position_at(ids, index)
+
+    def _add_texts(self, ancestors, delta):
+        if ancestors and delta:
+            self.conn.execute(
+                f"UPDATE nodes SET texts = texts + ? WHERE id IN ({','.join('?' * len(ancestors))})",
+                (delta, *ancestors))
+
+    def _forget(self, node_id):
+        self._positions.pop(node_id, None)
+        for child_id in self._children.pop(node_id, ()):
+            self._forget(child_id)
+
+    def _apply(self, op):
+        kind = op['op']
+        if kind == 'set':
+            if op['key'] in SETTINGS_KEYS:
+                self._set_setting(op['key'], op['value'])
+            return
+        profile = op['profile']
+        ancestors, ref, ids = self._resolve(profile, op['path'])
+        index = op['path'][-1]
+        parent_id = None if isinstance(ref, tuple) else ref
+        if kind == 'add':
+            if not 0 <= index <= len(ids):
+                raise IndexError(f"Нет места {index} по пути {op['path']}")
+            position = self._position_at(ids, index)
+            node_id, texts = self._insert(profile, parent_id, position, op['value'])
+            ids.insert(index, node_id)
+            self._positions[node_id] = position
+            self._add_texts(ancestors, texts)
+            return
+        node_id = ids[index]
+        if kind == 'delete':
+            node_kind, texts = self.conn.execute("SELECT kind, texts FROM nodes WHERE id = ?", (node_id,)).fetchone()
+            self.conn.execute("DELETE FROM nodes WHERE id = ?", (node_id,))
+            del ids[index]
+            self._forget(node_id)
+            self._add_texts(ancestors, -(1 if node_kind == 'text' else texts))
+        elif kind == 'edit':
+            self.conn.execute("UPDATE nodes SET content = ? WHERE id = ? AND kind = 'text'", (op['value'], node_id))
+        elif kind == 'rename':
+            self.conn.execute("UPDATE nodes SET content = ? WHERE id = ? AND kind = 'folder'", (op['name'], node_id))
+        elif kind == 'move':
+            del ids[index]
+            position = self._position_at(ids, op['to'])
+            ids.insert(op['to'], node_id)
+            self._positions[node_id] = position
+            self.conn.execute("UPDATE nodes SET position = ? WHERE id = ?", (position, node_id))
+        else:
+            raise ValueError(f"Неизвестная операция: {kind}")
+
+
+def open_storage(config_file, on_error=None):
+    """Выбирает хранилище: SQLite, если оно включено переменной окружения
+    TEXT_ROTATOR_STORAGE=sqlite или база уже создана, иначе JSON.
+
+    При TEXT_ROTATOR_STORAGE=json и существующей базе её содержимое сначала
+    выгружается в JSON-конфигурацию, а сама база переименовывается в .db.bak,
+    чтобы следующий запуск без переменной тоже остался на JSON."""
+    db_path = os.path.splitext(config_file)[0] + ".db"
+    choice = os.environ.get(STORAGE_ENV_VAR, "").lower()
+    if choice == "sqlite" or (choice != "json" and os.path.exists(db_path)):
+        return SqliteStorage(db_path, config_file, on_error=on_error)
+    if os.path.exists(db_path):
+        storage = SqliteStorage(db_path, config_file)
+        storage.export_json()
+        storage.close()
+        os.replace(db_path, db_path + ".bak")
+    return JsonStorage(config_file, on_error=on_error)
@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+
+# Тесты импортируют пакеты models и utils из корня репозитория
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.config_codec import default_state, encode_config
+from models.snippet_store import SnippetStore
+from models.storage import STORAGE_ENV_VAR
+
+
+@pytest.fixture
+def make_store(tmp_path, monkeypatch):
+    """Создаёт SnippetStore на JSON-конфигурации во временной папке с профилями rotation и popup."""
+    monkeypatch.delenv(STORAGE_ENV_VAR, raising=False)
+    stores = []
+
+    def make(rotation=(), popup=(), **settings):
+        state = default_state()
+        state.update(settings, data_rotation=list(rotation), data_popup=list(popup))
+        config_file = str(tmp_path / 'config.json')
+        with open(config_file, 'w', encoding='utf-8') as f:
+            f.write(encode_config(state, journal_seq=0))
+        store = SnippetStore(config_file)
+        store.load()
+        stores.append(store)
+        return store
+
+    yield make
+    for store in stores:
+        store.close()
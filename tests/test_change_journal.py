@@ -0,0 +1,111 @@
+import json
+import os
+
+from models.change_journal import ChangeJournal, apply_op
+
+
+def _write_journal(path, records, tail=''):
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        f.write(tail)
+
+
+def _config():
+    return {'data_rotation': ['a', 'b'], 'data_popup': [], 'hotkey': 'ctrl+1'}
+
+
+def test_append_and_replay_restore_state(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = ChangeJournal(path)
+    expected = _config()
+    ops = [
+        {'op': 'add', 'profile': 'rotation', 'path': [2], 'value': 'c'},
+        {'op': 'move', 'profile': 'rotation', 'path': [0], 'to': 2},
+        {'op': 'edit', 'profile': 'rotation', 'path': [0], 'value': 'B'},
+        {'op': 'set', 'key': 'hotkey', 'value': 'ctrl+2'},
+    ]
+    for op in ops:
+        journal.append(op)
+        apply_op(expected, op)
+    journal.close()
+
+    config = _config()
+    replayed = ChangeJournal(path)
+    assert replayed.replay(config) == len(ops)
+    assert config == expected
+    assert replayed.seq == len(ops)
+    assert not replayed.needs_snapshot
+
+
+def test_replay_skips_ops_already_in_snapshot(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    _write_journal(path, [
+        {'op': 'add', 'profile': 'rotation', 'path': [2], 'value': 'c', 'seq': 1},
+        {'op': 'add', 'profile': 'rotation', 'path': [3], 'value': 'd', 'seq': 2},
+    ])
+    config = {'data_rotation': ['a', 'b', 'c']}
+    journal = ChangeJournal(path)
+    assert journal.replay(config, after_seq=1) == 1
+    assert config['data_rotation'] == ['a', 'b', 'c', 'd']
+    assert journal.seq == 2
+
+
+def test_replay_stops_at_first_failed_op(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    records = [
+        {'op': 'add', 'profile': 'rotation', 'path': [2], 'value': 'c', 'seq': 1},
+        {'op': 'delete', 'profile': 'rotation', 'path': [10], 'seq': 2},
+        {'op': 'add', 'profile': 'rotation', 'path': [0], 'value': 'x', 'seq': 3},
+    ]
+    _write_journal(path, records)
+    with open(path, encoding='utf-8') as f:
+        original = f.read()
+
+    config = _config()
+    journal = ChangeJournal(path)
+    assert journal.replay(config) == 1
+    # Операция 3 после сбойной не применяется: её позиция уже неверна
+    assert config['data_rotation'] == ['a', 'b', 'c']
+    assert journal.seq == 1
+    assert journal.needs_snapshot
+
+    # Журнал обрезан до сбойной операции, исходный сохранён в .bak
+    with open(path, encoding='utf-8') as f:
+        assert [json.loads(line)['seq'] for line in f] == [1]
+    with open(path + '.bak', encoding='utf-8') as f:
+        assert f.read() == original
+
+    # Новые операции продолжают нумерацию после последней применённой
+    assert journal.append({'op': 'set', 'key': 'hotkey', 'value': 'ctrl+3'}) == 2
+    journal.close()
+
+
+def test_replay_drops_torn_tail(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    _write_journal(path, [{'op': 'add', 'profile': 'rotation', 'path': [2], 'value': 'c', 'seq': 1}],
+                   tail='{"op": "add", "pro')
+    config = _config()
+    journal = ChangeJournal(path)
+    assert journal.replay(config) == 1
+    assert not journal.needs_snapshot
+    assert not os.path.exists(path + '.bak')
+    journal.append({'op': 'add', 'profile': 'rotation', 'path': [3], 'value': 'd'})
+    journal.close()
+
+    config = _config()
+    assert ChangeJournal(path).replay(config) == 2
+    assert config['data_rotation'] == ['a', 'b', 'c', 'd']
+
+
+def test_compact_keeps_only_ops_after_snapshot(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = ChangeJournal(path, max_ops=2)
+    for value in 'cde':
+        journal.append({'op': 'add', 'profile': 'rotation', 'path': [0], 'value': value})
+    assert journal.needs_compaction()
+    journal.compact(snapshot_seq=2)
+    assert not journal.needs_compaction()
+    journal.close()
+    with open(path, encoding='utf-8') as f:
+        assert [json.loads(line)['seq'] for line in f] == [3]
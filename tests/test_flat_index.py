@@ -0,0 +1,121 @@
+import random
+
+from models.snippet_tree import apply_tree_op
+from models.storage import STORAGE_ENV_VAR
+
+
+def _flatten(items):
+    texts = []
+    for item in items:
+        if isinstance(item, str):
+            texts.append(item)
+        else:
+            texts.extend(_flatten(item['items']))
+    return texts
+
+
+def _all_texts(index):
+    return [index.text_at(position) for position in range(len(index))]
+
+
+def _rotation():
+    return [
+        'a',
+        {'type': 'folder', 'name': 'f', 'items': ['b', {'type': 'folder', 'name': 'g', 'items': ['c', 'd']}]},
+        {'type': 'folder', 'name': 'empty', 'items': []},
+        'e',
+    ]
+
+
+def test_flat_order_and_group_sizes(make_store):
+    store = make_store(rotation=_rotation())
+    index = store.flat_indexes['rotation']
+    assert len(index) == 5
+    assert _all_texts(index) == ['a', 'b', 'c', 'd', 'e']
+    assert index.group_sizes() == [1, 3, 0, 1]
+    assert index.count(store.profile('rotation')[1].items) == 3
+
+
+def test_prefix_sums_follow_insert_and_remove(make_store):
+    store = make_store(rotation=_rotation())
+    index = store.flat_indexes['rotation']
+    store.apply({'op': 'add', 'profile': 'rotation', 'path': [1, 1, 1], 'value': 'x'})
+    assert _all_texts(index) == ['a', 'b', 'c', 'x', 'd', 'e']
+    store.apply({'op': 'add', 'profile': 'rotation', 'path': [2, 0],
+                 'value': {'type': 'folder', 'name': 'h', 'items': ['y', 'z']}})
+    assert _all_texts(index) == ['a', 'b', 'c', 'x', 'd', 'y', 'z', 'e']
+    assert index.group_sizes() == [1, 4, 2, 1]
+    store.apply({'op': 'delete', 'profile': 'rotation', 'path': [1]})
+    assert _all_texts(index) == ['a', 'y', 'z', 'e']
+    store.apply({'op': 'move', 'profile': 'rotation', 'path': [0], 'to': 2})
+    assert _all_texts(index) == ['y', 'z', 'e', 'a']
+    assert index.group_sizes() == [2, 1, 1]
+
+
+def test_cursor_keeps_next_text(make_store):
+    store = make_store(rotation=['a', 'b', 'c', 'd'])
+    index = store.flat_indexes['rotation']
+    index.cursor = 2 # Следующий - 'c'
+    store.apply({'op': 'add', 'profile': 'rotation', 'path': [0], 'value': 'x'})
+    assert index.text_at(index.cursor) == 'c'
+    store.apply({'op': 'delete', 'profile': 'rotation', 'path': [1]})
+    assert index.text_at(index.cursor) == 'c'
+    store.apply({'op': 'move', 'profile': 'rotation', 'path': [2], 'to': 0})
+    assert index.text_at(index.cursor) == 'c'
+    # Удаление текста под курсором: следующим становится текст после него
+    store.apply({'op': 'delete', 'profile': 'rotation', 'path': [0]})
+    assert index.text_at(index.cursor) == 'x'
+    # Удаление последнего текста под курсором - ротация начинается сначала
+    index.cursor = len(index) - 1
+    store.apply({'op': 'delete', 'profile': 'rotation', 'path': [len(index) - 1]})
+    assert index.cursor == 0
+
+
+def test_next_text_wraps_around(make_store):
+    store = make_store(rotation=_rotation())
+    index = store.flat_indexes['rotation']
+    assert [index.next_text() for _ in range(7)] == ['a', 'b', 'c', 'd', 'e', 'a', 'b']
+
+
+def test_random_edits_match_reflattening(make_store):
+    rng = random.Random(13)
+    data = _rotation()
+    store = make_store(rotation=data)
+    index = store.flat_indexes['rotation']
+    for n in range(300):
+        items, path = data, []
+        while True:
+            folders = [row for row, item in enumerate(items) if isinstance(item, dict)]
+            if not folders or rng.random() < 0.5:
+                break
+            row = rng.choice(folders)
+            path.append(row)
+            items = items[row]['items']
+        kind = rng.choice(['add', 'add', 'delete', 'move']) if items else 'add'
+        if kind == 'add':
+            value = str(n) if rng.random() < 0.7 else {'type': 'folder', 'name': str(n), 'items': [str(n)]}
+            op = {'op': 'add', 'profile': 'rotation', 'path': path + [rng.randint(0, len(items))], 'value': value}
+        elif kind == 'delete':
+            op = {'op': 'delete', 'profile': 'rotation', 'path': path + [rng.randrange(len(items))]}
+        else:
+            op = {'op': 'move', 'profile': 'rotation', 'path': path + [rng.randrange(len(items))],
+                  'to': rng.randrange(len(items))}
+        apply_tree_op(data, dict(op))
+        store.apply(op)
+        expected = _flatten(data)
+        assert len(index) == len(expected)
+        assert _all_texts(index) == expected
+        assert 0 <= index.cursor <= max(len(index) - 1, 0)
+
+
+def test_lazy_folders_counted_before_loading(make_store, monkeypatch):
+    monkeypatch.setenv(STORAGE_ENV_VAR, 'sqlite')
+    store = make_store(rotation=_rotation())
+    folder = store.profile('rotation')[1]
+    index = store.flat_indexes['rotation']
+    assert not folder.loaded
+    assert len(index) == 5
+    # Правка внутри ещё не прочитанной папки
+    store.apply({'op': 'add', 'profile': 'rotation', 'path': [1, 0], 'value': 'x'})
+    assert folder.loaded
+    assert _all_texts(index) == ['a', 'x', 'b', 'c', 'd', 'e']
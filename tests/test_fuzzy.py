@@ -0,0 +1,68 @@
+import pytest
+
+from models.fuzzy import (char_mask, fuzzy_word_score, is_subsequence, layout_variants, missing_at_most,
+                          prefix_distance, typo_limit)
+
+
+def test_layout_variants():
+    assert layout_variants('ghbdtn') == ['ghbdtn', 'привет']
+    assert layout_variants('руддщ') == ['руддщ', 'hello']
+    assert layout_variants('123') == ['123']
+
+
+@pytest.mark.parametrize('token, word, distance', [
+    ('приве', 'привет', 0),
+    ('пирвет', 'привет', 1), # Перестановка соседних
+    ('првет', 'привет', 1), # Пропуск
+    ('приввет', 'привет', 1), # Лишняя буква
+    ('привед', 'привет', 1), # Замена
+    ('пирвед', 'привет', 2),
+])
+def test_prefix_distance(token, word, distance):
+    assert prefix_distance(token, word, 2) == distance
+
+
+def test_prefix_distance_stops_past_limit():
+    assert prefix_distance('абвгд', 'еёжзи', 1) == 2
+
+
+def test_fuzzy_word_score_grades():
+    assert fuzzy_word_score('прив', 'привет') == 1.0
+    assert fuzzy_word_score('пирв', 'привет') == pytest.approx(0.8)
+    assert fuzzy_word_score('доствака', 'доставка') == pytest.approx(0.8)
+    assert fuzzy_word_score('дотсвака', 'доставка') == pytest.approx(0.65)
+    assert 0 < fuzzy_word_score('првт', 'приветствие') <= 0.5
+    assert fuzzy_word_score('кот', 'привет') == 0.0
+
+
+def test_short_words_allow_one_typo():
+    assert typo_limit(6) == 1 and typo_limit(7) == 2
+    # Две опечатки в коротком слове - уже не префикс с опечатками
+    assert fuzzy_word_score('пирвед', 'привет') < 0.5
+
+
+@pytest.mark.parametrize('token, word', [
+    ('доствака', 'доставка'),
+    ('дотсвака', 'доставка'),
+    ('достака', 'доставка'), # Пропущенная буква убирает её из маски запроса
+    ('доставкм', 'доставка'), # Чужая буква в запросе
+    ('достафкп', 'доставка'), # Две чужие буквы при бюджете в две опечатки
+])
+def test_mask_prefilter_keeps_words_within_typo_budget(token, word):
+    # Отсев по маскам не должен отбрасывать то, что fuzzy_word_score примет
+    limit = typo_limit(len(token))
+    assert fuzzy_word_score(token, word) > 0.5
+    assert len(word) >= len(token) - limit
+    assert missing_at_most(char_mask(token), char_mask(word), limit)
+
+
+def test_missing_at_most():
+    assert missing_at_most(char_mask('abc'), char_mask('abc'), 0)
+    assert missing_at_most(char_mask('abx'), char_mask('abc'), 1)
+    assert not missing_at_most(char_mask('axy'), char_mask('abc'), 1)
+    assert missing_at_most(char_mask('axy'), char_mask('abc'), 2)
+
+
+def test_is_subsequence():
+    assert is_subsequence('првт', 'привет')
+    assert not is_subsequence('тврп', 'привет')
@@ -0,0 +1,138 @@
+from types import SimpleNamespace
+
+import pytest
+
+from models import hotkey_dispatcher
+from models.hotkey_dispatcher import ChordTrie, HotkeyDispatcher, parse_chord
+
+SCAN_CODES = {'ctrl': (29,), 'shift': (42,), 'alt': (56,), '2': (3,), '3': (4,), 'a': (30,), 'b': (48,)}
+
+
+class FakeKeyboard:
+    """Замена модуля keyboard: скан-коды из таблицы, hook только запоминает обработчик."""
+
+    def __init__(self):
+        self.handler = None
+        self.unhooked = 0
+
+    def key_to_scan_codes(self, key):
+        try:
+            return SCAN_CODES[key]
+        except KeyError:
+            raise ValueError(f"Неизвестная клавиша {key!r}")
+
+    def hook(self, handler, suppress=False):
+        assert suppress
+        self.handler = handler
+        return handler
+
+    def unhook(self, hook):
+        assert hook is self.handler
+        self.handler = None
+        self.unhooked += 1
+
+    def send(self, key, event_type='down'):
+        """Передаёт событие перехватчику; True - событие пропущено в систему."""
+        event = SimpleNamespace(scan_code=SCAN_CODES.get(key, (0,))[0], name=key, event_type=event_type)
+        return self.handler(event)
+
+    def tap(self, *keys):
+        """Нажимает клавиши по порядку и отпускает в обратном; возвращает пропуски событий."""
+        allowed = [self.send(key) for key in keys]
+        allowed += [self.send(key, 'up') for key in reversed(keys)]
+        return allowed
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(hotkey_dispatcher.time, 'monotonic', lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def dispatcher(clock):
+    return HotkeyDispatcher(backend=FakeKeyboard())
+
+
+def _fired(dispatcher):
+    fired = [binding_id for binding_id, _ in dispatcher._pending]
+    dispatcher._pending.clear()
+    return fired
+
+
+def test_parse_chord_normalizes_and_sorts():
+    assert parse_chord('Shift + Left Ctrl + A') == ('a', 'ctrl', 'shift')
+    assert parse_chord('control+2') == parse_chord('2+ctrl') == ('2', 'ctrl')
+    assert parse_chord('cmd+escape') == ('esc', 'windows')
+    with pytest.raises(ValueError):
+        parse_chord(' + ')
+
+
+def test_chord_trie_matches_only_whole_chords():
+    trie = ChordTrie()
+    trie.add(parse_chord('ctrl+2'), 'main')
+    trie.add(parse_chord('ctrl+shift+2'), 'binding:0')
+    assert trie.lookup(parse_chord('ctrl+2')) == 'main'
+    assert trie.lookup(parse_chord('shift+2+ctrl')) == 'binding:0'
+    assert trie.lookup(('ctrl',)) is None
+    assert trie.lookup(parse_chord('ctrl+3')) is None
+
+
+def test_matched_chord_fires_and_suppresses_key_up(dispatcher):
+    keyboard = dispatcher.backend
+    assert dispatcher.set_bindings({'main': 'ctrl+2'}) == {}
+    # ctrl проходит в систему, 2 и её отпускание подавляются, отпускание ctrl - нет
+    assert keyboard.tap('ctrl', '2') == [True, False, False, True]
+    assert _fired(dispatcher) == ['main']
+
+
+def test_autorepeat_fires_once_and_stays_suppressed(dispatcher, clock):
+    keyboard = dispatcher.backend
+    dispatcher.set_bindings({'main': 'ctrl+2'})
+    keyboard.send('ctrl')
+    assert keyboard.send('2') is False
+    for _ in range(5):
+        clock[0] += 1.0 # Автоповтор не зависит от интервала дребезга
+        assert keyboard.send('2') is False
+    assert keyboard.send('2', 'up') is False
+    assert _fired(dispatcher) == ['main']
+
+
+def test_debounce_drops_fast_repeats_but_still_suppresses(dispatcher, clock):
+    keyboard = dispatcher.backend
+    dispatcher.set_bindings({'main': 'ctrl+2'})
+    keyboard.send('ctrl')
+    assert keyboard.tap('2') == [False, False]
+    clock[0] += HotkeyDispatcher.DEBOUNCE_INTERVAL / 2
+    assert keyboard.tap('2') == [False, False]
+    assert _fired(dispatcher) == ['main']
+
+    clock[0] += HotkeyDispatcher.DEBOUNCE_INTERVAL
+    keyboard.tap('2')
+    assert _fired(dispatcher) == ['main']
+
+
+def test_unmatched_keys_pass_through(dispatcher):
+    keyboard = dispatcher.backend
+    dispatcher.set_bindings({'main': 'ctrl+2'})
+    assert keyboard.tap('a', 'b') == [True] * 4
+    assert keyboard.tap('ctrl', '3') == [True] * 4
+    assert keyboard.tap('shift', '2') == [True] * 4
+    # Лишняя клавиша в наборе - уже другой аккорд
+    assert keyboard.tap('ctrl', 'shift', '2') == [True] * 6
+    assert _fired(dispatcher) == []
+
+
+def test_rebinding_replaces_table_and_reports_errors(dispatcher):
+    keyboard = dispatcher.backend
+    dispatcher.set_bindings({'main': 'ctrl+2'})
+    errors = dispatcher.set_bindings({'main': 'ctrl+3', 'binding:0': '3+ctrl', 'binding:1': 'ctrl+nokey'})
+    assert set(errors) == {'binding:0', 'binding:1'}
+
+    assert keyboard.tap('ctrl', '2') == [True] * 4
+    assert keyboard.tap('ctrl', '3') == [True, False, False, True]
+    assert _fired(dispatcher) == ['main']
+
+    assert dispatcher.set_bindings({}) == {}
+    assert keyboard.handler is None and keyboard.unhooked == 1
@@ -0,0 +1,61 @@
+from models.snippet_store import SnippetStore
+
+
+def _rotation():
+    return ['a', 'b', {'type': 'folder', 'name': 'f', 'items': ['x', 'y', 'z']}, 'c']
+
+
+def _next_texts(store, count, profile='rotation'):
+    return [store.next_in_profile(profile)[1] for _ in range(count)]
+
+
+def test_round_robin_walks_flat_order(make_store):
+    store = make_store(rotation=_rotation())
+    assert _next_texts(store, 8) == ['a', 'b', 'x', 'y', 'z', 'c', 'a', 'b']
+    assert store.next_in_profile('popup') == (None, None)
+
+
+def test_cursors_survive_restart(make_store):
+    store = make_store(rotation=_rotation())
+    _next_texts(store, 3)
+    assert store.next_in_folder('f', 'rotation') == 'x'
+    store.close()
+
+    reopened = SnippetStore(store.storage.config_file)
+    reopened.load()
+    try:
+        assert _next_texts(reopened, 1) == ['y']
+        assert reopened.next_in_folder('f', 'rotation') == 'y'
+    finally:
+        reopened.close()
+
+
+def test_profile_cursor_follows_edits(make_store):
+    store = make_store(rotation=_rotation())
+    _next_texts(store, 2) # Следующий - 'x'
+    store.apply({'op': 'add', 'profile': 'rotation', 'path': [0], 'value': 'new'})
+    store.apply({'op': 'move', 'profile': 'rotation', 'path': [3], 'to': 0})
+    assert _next_texts(store, 3) == ['x', 'y', 'z']
+
+
+def test_folder_lookup_prefers_profile(make_store):
+    store = make_store(rotation=_rotation(), popup=[{'type': 'folder', 'name': 'f', 'items': ['p']},
+                                                   {'type': 'folder', 'name': 'g', 'items': []}])
+    assert store.next_in_folder('f', 'popup') == 'p'
+    assert store.next_in_folder('f', 'rotation') == 'x'
+    assert store.next_in_folder('g', 'rotation') is None
+    assert store.next_in_folder('missing', 'rotation') is None
+
+
+def test_unknown_strategy_falls_back_to_round_robin(make_store):
+    store = make_store(rotation=_rotation())
+    store.apply({'op': 'set', 'key': 'rotation_strategy', 'value': 'bogus'})
+    assert store.state['rotation_strategy'] == 'round_robin'
+    assert _next_texts(store, 2) == ['a', 'b']
+
+
+def test_strategy_covers_folder_only(make_store):
+    store = make_store(rotation=_rotation())
+    store.apply({'op': 'set', 'key': 'rotation_strategy', 'value': 'shuffle'})
+    assert sorted(store.next_in_folder('f', 'rotation') for _ in range(3)) == ['x', 'y', 'z']
+    assert sorted(_next_texts(store, 6)) == ['a', 'b', 'c', 'x', 'y', 'z']
@@ -0,0 +1,76 @@
+from collections import Counter
+
+import pytest
+
+from models.rotation_strategies import STRATEGIES, RotationPool, make_strategy
+
+TEXTS = [str(n) for n in range(10)]
+
+
+def _pool(make_store, rotation=TEXTS):
+    store = make_store(rotation=rotation)
+    return store, RotationPool(store.flat_indexes['rotation'])
+
+
+def _draw(strategy, pool, count):
+    return [pool.text_at(strategy.next(pool)) for _ in range(count)]
+
+
+@pytest.mark.parametrize('name', sorted(STRATEGIES))
+def test_seed_makes_choice_reproducible(make_store, name):
+    _, pool = _pool(make_store)
+    first = _draw(make_strategy(name, seed=1, key='k'), pool, 30)
+    assert _draw(make_strategy(name, seed=1, key='k'), pool, 30) == first
+    assert set(first) <= set(TEXTS)
+
+
+def test_shuffle_covers_every_text_once_per_round(make_store):
+    _, pool = _pool(make_store)
+    strategy = make_strategy('shuffle', seed=3)
+    drawn = _draw(strategy, pool, len(TEXTS) * 5)
+    rounds = [drawn[start:start + len(TEXTS)] for start in range(0, len(drawn), len(TEXTS))]
+    for current in rounds:
+        assert sorted(current) == sorted(TEXTS)
+    # Новый круг не начинается с последнего текста предыдущего
+    for previous, current in zip(rounds, rounds[1:]):
+        assert current[0] != previous[-1]
+
+
+def test_shuffle_restarts_after_edit(make_store):
+    store, pool = _pool(make_store)
+    strategy = make_strategy('shuffle', seed=4)
+    _draw(strategy, pool, 3)
+    store.apply({'op': 'add', 'profile': 'rotation', 'path': [0], 'value': 'new'})
+    assert sorted(_draw(strategy, pool, len(TEXTS) + 1)) == sorted(TEXTS + ['new'])
+
+
+def test_weighted_gives_each_top_level_item_equal_share(make_store):
+    rotation = ['a', {'type': 'folder', 'name': 'big', 'items': [str(n) for n in range(8)]}, 'b']
+    _, pool = _pool(make_store, rotation)
+    drawn = _draw(make_strategy('weighted', seed=5), pool, 6000)
+    counts = Counter('folder' if text.isdigit() else text for text in drawn)
+    for group in ('a', 'b', 'folder'):
+        assert counts[group] == pytest.approx(2000, rel=0.1)
+
+
+def test_lru_cycles_in_order_and_puts_new_texts_first(make_store):
+    store, pool = _pool(make_store, ['a', 'b', 'c'])
+    strategy = make_strategy('lru')
+    assert _draw(strategy, pool, 4) == ['a', 'b', 'c', 'a']
+    store.apply({'op': 'add', 'profile': 'rotation', 'path': [3], 'value': 'd'})
+    assert _draw(strategy, pool, 4) == ['d', 'b', 'c', 'a']
+
+
+def test_skip_recent_avoids_last_window(make_store):
+    _, pool = _pool(make_store)
+    strategy = make_strategy('skip_recent', seed=6)
+    drawn = _draw(strategy, pool, 500)
+    window = min(STRATEGIES['skip_recent'].WINDOW, len(TEXTS) // 2)
+    for position in range(window, len(drawn)):
+        assert drawn[position] not in drawn[position - window:position]
+    assert set(drawn) == set(TEXTS)
+
+
+def test_skip_recent_with_one_text(make_store):
+    _, pool = _pool(make_store, ['only'])
+    assert _draw(make_strategy('skip_recent', seed=7), pool, 3) == ['only'] * 3
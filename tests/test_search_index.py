@@ -0,0 +1,93 @@
+from models.search_index import find_spans
+
+
+def _popup():
+    return [
+        'Добрый день, коллеги',
+        'Спасибо за заказ',
+        {'type': 'folder', 'name': 'Шаблоны ответов', 'items': [
+            'Ваш заказ отправлен',
+            {'type': 'folder', 'name': 'Доставка', 'items': ['Курьер приедет завтра']},
+        ]},
+        'Hello world',
+    ]
+
+
+def _values(results):
+    return [result.value.text if result.kind == 'text' else result.value.name for result in results]
+
+
+def test_prefix_search_across_folders(make_store):
+    store = make_store(popup=_popup())
+    results = store.search_index.search('заказ')
+    # Точные совпадения выше нечётких ("завтра")
+    assert set(_values(results)[:2]) == {'Спасибо за заказ', 'Ваш заказ отправлен'}
+    nested = store.search_index.search('курьер')
+    assert _values(nested) == ['Курьер приедет завтра']
+    assert [folder.name for folder in nested[0].folders] == ['Шаблоны ответов', 'Доставка']
+
+
+def test_all_query_words_must_match(make_store):
+    store = make_store(popup=_popup())
+    assert _values(store.search_index.search('заказ отпр')) == ['Ваш заказ отправлен']
+    assert store.search_index.search('заказ курьер') == []
+
+
+def test_folder_names_are_searchable(make_store):
+    store = make_store(popup=_popup())
+    results = store.search_index.search('шабл')
+    assert results[0].kind == 'folder'
+    assert results[0].value.name == 'Шаблоны ответов'
+
+
+def test_phrase_start_ranks_first(make_store):
+    store = make_store(popup=['Большой заказ', 'Заказ принят'])
+    assert _values(store.search_index.search('заказ'))[0] == 'Заказ принят'
+
+
+def test_wrong_layout_query(make_store):
+    store = make_store(popup=_popup())
+    # "lj,hsq" - "добрый", набранное в английской раскладке
+    assert _values(store.search_index.search('lj,hsq')) == ['Добрый день, коллеги']
+    assert _values(store.search_index.search('руддщ')) == ['Hello world']
+
+
+def test_typos_match_fuzzily(make_store):
+    store = make_store(popup=_popup())
+    assert 'Спасибо за заказ' in _values(store.search_index.search('спсибо'))
+    assert 'Курьер приедет завтра' in _values(store.search_index.search('курьре'))
+
+
+def test_index_follows_edits(make_store):
+    store = make_store(popup=_popup())
+    assert len(store.search_index) == 7
+    store.apply({'op': 'add', 'profile': 'popup', 'path': [0], 'value': 'Новый текст'})
+    assert _values(store.search_index.search('новый')) == ['Новый текст']
+    store.apply({'op': 'edit', 'profile': 'popup', 'path': [0], 'value': 'Изменённый текст'})
+    assert store.search_index.search('новый') == []
+    assert _values(store.search_index.search('изменён')) == ['Изменённый текст']
+    # Удаление папки убирает из индекса и всё её содержимое
+    store.apply({'op': 'delete', 'profile': 'popup', 'path': [3]})
+    assert store.search_index.search('курьер') == []
+    assert store.search_index.search('шаблоны') == []
+    assert len(store.search_index) == 4
+
+
+def test_rotation_profile_is_not_indexed(make_store):
+    store = make_store(rotation=['Заказ в ротации'], popup=_popup())
+    store.apply({'op': 'add', 'profile': 'rotation', 'path': [0], 'value': 'Ещё заказ'})
+    assert 'Ещё заказ' not in _values(store.search_index.search('заказ'))
+    assert 'Заказ в ротации' not in _values(store.search_index.search('заказ'))
+
+
+def test_find_spans_merges_overlaps():
+    assert find_spans('заказ заказчика', {'зак', 'заказ'}) == [(0, 5), (6, 11)]
+
+
+def test_candidates_capped_while_merging(make_store, monkeypatch):
+    store = make_store(popup=[f'заказ {n}' for n in range(30)] + ['заказчик доволен'])
+    index = store.search_index
+    monkeypatch.setattr(index, 'MAX_CANDIDATES', 10)
+    assert len(index.search('зак')) == 10
+    # Короткое слово запроса ищется только среди документов длинного
+    assert _values(index.search('заказ доволен')) == ['заказчик доволен']
@@ -0,0 +1,106 @@
+import pytest
+
+from models.selection_engine import WORD_STOP_RE, SelectionEngine, run_steps
+
+
+class EditorModel:
+    """Поле ввода без переноса строк: курсор, якорь выделения и клавиши,
+    которые посылает план (ctrl+left останавливается на началах WORD_STOP_RE,
+    home - "умный": сначала к первому непробельному символу строки)."""
+
+    def __init__(self, text):
+        self.text = text
+        self.cursor = len(text)
+        self.anchor = None
+        self.shift = False
+
+    def press(self, key):
+        assert key == 'shift'
+        self.shift = True
+        self.anchor = self.cursor
+
+    def release(self, key):
+        assert key == 'shift'
+        self.shift = False
+
+    def press_and_release(self, key):
+        assert self.shift, "Перемещение без shift сбросило бы выделение"
+        line_start = self.text.rfind('\n', 0, self.cursor) + 1
+        if key == 'left':
+            self.cursor = max(self.cursor - 1, 0)
+        elif key == 'ctrl+left':
+            starts = [m.start() for m in WORD_STOP_RE.finditer(self.text) if m.start() < self.cursor]
+            self.cursor = starts[-1] if starts else 0
+        elif key == 'home':
+            line = self.text[line_start:]
+            first = line_start + len(line) - len(line.lstrip(' \t'))
+            self.cursor = first if self.cursor > first else line_start
+        elif key == 'up':
+            column = self.cursor - line_start
+            previous_start = self.text.rfind('\n', 0, line_start - 1) + 1
+            self.cursor = min(previous_start + column, line_start - 1)
+        else:
+            raise AssertionError(f"Неожиданная клавиша {key}")
+
+    def selected(self):
+        return self.text[min(self.cursor, self.anchor):max(self.cursor, self.anchor)]
+
+
+def _select(before, pasted, engine=None):
+    engine = engine or SelectionEngine()
+    editor = EditorModel(before + pasted.replace('\r\n', '\n'))
+    steps = engine.plan_select(pasted)
+    run_steps(steps, editor)
+    return editor.selected(), steps
+
+
+LONG_LINE = "hello world foo, bar (baz) - " * 10
+TEMPLATE = ("Здравствуйте, {name}!\n\n    Ваш заказ №{order} отправлен.\n"
+            "Спасибо, что выбрали нас.\n") * 40
+
+
+@pytest.mark.parametrize('before', ['', 'prefix', 'prefix ', 'line one\nprefix'])
+@pytest.mark.parametrize('pasted', [
+    'short',
+    LONG_LINE,
+    '   ' + LONG_LINE,
+    LONG_LINE + '\n' + LONG_LINE,
+    LONG_LINE + '\n\n  indented tail line here',
+    '\n' + LONG_LINE + '\n',
+    LONG_LINE.replace(' - ', '\r\n'),
+    TEMPLATE,
+])
+def test_plan_selects_exactly_the_pasted_text(before, pasted):
+    selected, _ = _select(before, pasted)
+    assert selected == pasted.replace('\r\n', '\n')
+
+
+def test_first_word_of_joined_line_is_selected():
+    # ctrl+left захватил бы и "prefix", к которому прилипла вставка
+    selected, steps = _select('prefix', LONG_LINE)
+    assert selected == LONG_LINE
+    assert ('send', 'ctrl+left') in steps
+
+
+def test_long_multiline_paste_is_selected_with_few_events():
+    pasted = ("lorem ipsum dolor sit amet\n" * 75)[:2000]
+    selected, steps = _select('', pasted)
+    assert selected == pasted
+    # Нажатия зависят от числа строк, а не от числа символов
+    assert len(steps) < len(pasted.splitlines()) + 20
+
+
+def test_short_text_selected_by_characters():
+    _, steps = _select('', 'abc def')
+    assert steps == [('press', 'shift')] + [('send', 'left')] * 7 + [('release', 'shift')]
+
+
+def test_run_steps_releases_keys_on_error():
+    class FailingBackend(EditorModel):
+        def press_and_release(self, key):
+            raise RuntimeError
+
+    backend = FailingBackend('text')
+    with pytest.raises(RuntimeError):
+        run_steps(SelectionEngine().plan_select('text'), backend)
+    assert not backend.shift
@@ -0,0 +1,110 @@
+import json
+import random
+
+from models.config_codec import encode_config
+from models.snippet_store import SnippetStore
+from models.snippet_tree import PROFILES
+
+
+def _rotation():
+    return ['a', {'type': 'folder', 'name': 'f', 'items': ['x', {'type': 'folder', 'name': 'g', 'items': []}, 'y']}, 'b']
+
+
+def _popup():
+    return [{'type': 'folder', 'name': 'Приветствия', 'items': ['Добрый день', 'Здравствуйте!\n\nС уважением']}, '"кавычки" \\ \t']
+
+
+def _assert_consistent(tree):
+    """Каждый узел дерева есть в индексе по id, знает свою папку и номер строки, и наоборот."""
+    reachable = {}
+    for profile in PROFILES:
+        root = tree.roots[profile]
+        reachable[root.id] = root
+        pending = [root]
+        while pending:
+            folder = pending.pop()
+            for row, node in enumerate(folder.items):
+                assert node.id not in reachable
+                assert node.parent is folder and node.row == row
+                assert tree.container(*tree.path_of(node)).items[row] is node
+                reachable[node.id] = node
+                if node.is_folder:
+                    pending.append(node)
+    assert tree.nodes == reachable
+
+
+def test_config_round_trips_byte_for_byte(make_store):
+    store = make_store(rotation=_rotation(), popup=_popup(), rotation_strategy='shuffle')
+    with open(store.storage.config_file, 'r', encoding='utf-8') as f:
+        original = f.read()
+    assert encode_config(store.snapshot(), journal_seq=0) == original
+
+    store.save()
+    store.flush()
+    reopened = SnippetStore(store.storage.config_file)
+    reopened.load()
+    try:
+        assert encode_config(reopened.snapshot(), journal_seq=0) == original
+    finally:
+        reopened.close()
+
+
+def test_edits_keep_ids_rows_and_parents_consistent(make_store):
+    store = make_store(rotation=_rotation(), popup=_popup())
+    tree = store.tree
+    _assert_consistent(tree)
+
+    folder = tree.roots['rotation'].items[1]
+    ops = [
+        {'op': 'add', 'profile': 'rotation', 'path': [0], 'value': 'new'},
+        {'op': 'add', 'profile': 'rotation', 'path': [2, 1], 'value': {'type': 'folder', 'name': 'h', 'items': ['z']}},
+        {'op': 'move', 'profile': 'rotation', 'path': [3], 'to': 0},
+        {'op': 'move', 'profile': 'rotation', 'path': [3, 0], 'to': 3},
+        {'op': 'rename', 'profile': 'rotation', 'path': [3], 'name': 'f2'},
+        {'op': 'edit', 'profile': 'rotation', 'path': [1], 'value': 'new!'},
+        {'op': 'delete', 'profile': 'rotation', 'path': [3, 1]},
+        {'op': 'delete', 'profile': 'popup', 'path': [0]},
+    ]
+    for op in ops:
+        store.apply(op)
+        _assert_consistent(tree)
+
+    # Переименованная и сдвинутая папка - тот же узел с тем же id
+    assert tree.roots['rotation'].items[3] is folder and folder.name == 'f2'
+    assert tree.node(folder.id) is folder
+    assert tree.to_json('rotation') == [
+        'b', 'new!', 'a',
+        {'type': 'folder', 'name': 'f2', 'items': [{'type': 'folder', 'name': 'h', 'items': ['z']}, 'y', 'x']},
+    ]
+
+
+def test_random_edits_keep_tree_consistent(make_store):
+    store = make_store(rotation=_rotation(), popup=_popup())
+    tree = store.tree
+    rng = random.Random(7)
+    for step in range(300):
+        profile = rng.choice(PROFILES)
+        folders = [tree.roots[profile]] + [node for node in tree.nodes.values()
+                                           if node.is_folder and node.parent is not None and tree.path_of(node)[0] == profile]
+        folder = rng.choice(folders)
+        path = tree.path_of(folder)[1] if folder.parent is not None else []
+        size = len(folder.items)
+        kind = rng.choice(['add', 'add', 'delete', 'move', 'rename']) if size else 'add'
+        row = rng.randrange(size + 1 if kind == 'add' else size)
+        op = {'op': kind, 'profile': profile, 'path': path + [row]}
+        if kind == 'add':
+            op['value'] = f"t{step}" if rng.random() < 0.7 else {'type': 'folder', 'name': f"d{step}", 'items': [f"u{step}"]}
+        elif kind == 'move':
+            op['to'] = rng.randrange(size)
+        elif kind == 'rename' and folder.items[row].is_folder:
+            op['name'] = f"r{step}"
+        elif kind == 'rename':
+            op.update(op='edit', value=f"e{step}")
+        store.apply(op)
+        _assert_consistent(tree)
+
+    # После всех правок снимок переживает перезагрузку без изменений
+    snapshot = encode_config(store.snapshot())
+    store.set_state(json.loads(snapshot))
+    _assert_consistent(tree)
+    assert encode_config(store.snapshot()) == snapshot
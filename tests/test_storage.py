@@ -0,0 +1,197 @@
+import json
+import os
+
+import pytest
+
+from models.config_codec import default_state, encode_config
+from models.snippet_store import SnippetStore
+from models.storage import STORAGE_ENV_VAR, JsonStorage, SqliteStorage, open_storage
+
+
+def _state():
+    state = default_state()
+    state['hotkey'] = 'ctrl+3'
+    state['use_popup'] = True
+    state['data_rotation'] = [
+        'a',
+        {'type': 'folder', 'name': 'f', 'items': [
+            'b',
+            {'type': 'folder', 'name': 'g', 'items': ['c', 'd']},
+        ]},
+        'e',
+    ]
+    state['data_popup'] = ['p', {'type': 'folder', 'name': 'empty', 'items': []}]
+    return state
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    path = str(tmp_path / 'config.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(encode_config(_state(), journal_seq=0))
+    return path
+
+
+@pytest.fixture
+def sqlite_env(monkeypatch):
+    monkeypatch.setenv(STORAGE_ENV_VAR, 'sqlite')
+
+
+def _db_path(config_file):
+    return os.path.splitext(config_file)[0] + '.db'
+
+
+def test_import_loads_top_level_and_lazy_folders(config_file):
+    storage = SqliteStorage(_db_path(config_file), config_file)
+    try:
+        state, needs_save = storage.load()
+        assert not needs_save
+        assert state['hotkey'] == 'ctrl+3' and state['use_popup'] is True
+        top = state['data_rotation']
+        assert top[0] == 'a' and top[2] == 'e'
+        # Папка не читается целиком: вместо items - ссылка и число текстов
+        assert top[1]['name'] == 'f' and 'items' not in top[1]
+        assert top[1]['texts'] == 3
+        children = storage.load_children(top[1]['ref'])
+        assert children[0] == 'b'
+        assert children[1]['name'] == 'g' and children[1]['texts'] == 2
+        assert storage.load_children(children[1]['ref']) == ['c', 'd']
+    finally:
+        storage.close()
+
+
+def test_import_applies_json_journal_and_keeps_json(config_file):
+    op = {'op': 'add', 'profile': 'rotation', 'path': [0], 'value': 'journal', 'seq': 1}
+    with open(config_file + '.journal', 'w', encoding='utf-8') as f:
+        f.write(json.dumps(op) + '\n')
+    with open(config_file, encoding='utf-8') as f:
+        original = f.read()
+    storage = SqliteStorage(_db_path(config_file), config_file)
+    try:
+        state, _ = storage.load()
+        assert state['data_rotation'][0] == 'journal'
+    finally:
+        storage.close()
+    with open(config_file, encoding='utf-8') as f:
+        assert f.read() == original
+
+
+def test_round_trip_through_store(config_file, sqlite_env, monkeypatch):
+    expected = _state()
+    expected['data_rotation'][1]['items'][1]['items'].insert(1, 'new')
+    expected['data_rotation'].insert(0, expected['data_rotation'].pop(2))
+    expected['data_rotation'][2]['name'] = 'renamed'
+    expected['data_popup'][0] = 'edited'
+    expected['data_popup'].pop(1)
+    expected['hotkey'] = 'ctrl+4'
+
+    store = SnippetStore(config_file)
+    store.load()
+    for op in (
+        {'op': 'add', 'profile': 'rotation', 'path': [1, 1, 1], 'value': 'new'},
+        {'op': 'move', 'profile': 'rotation', 'path': [2], 'to': 0},
+        {'op': 'rename', 'profile': 'rotation', 'path': [2], 'name': 'renamed'},
+        {'op': 'edit', 'profile': 'popup', 'path': [0], 'value': 'edited'},
+        {'op': 'delete', 'profile': 'popup', 'path': [1]},
+        {'op': 'set', 'key': 'hotkey', 'value': 'ctrl+4'},
+    ):
+        store.apply(op)
+    store.close()
+
+    # Повторное открытие читает базу, а не JSON
+    store = SnippetStore(config_file)
+    store.load()
+    snapshot = store.snapshot()
+    store.close()
+    for key in ('data_rotation', 'data_popup', 'hotkey'):
+        assert snapshot[key] == expected[key]
+
+    # Возврат на JSON выгружает базу и убирает её в .db.bak
+    monkeypatch.setenv(STORAGE_ENV_VAR, 'json')
+    storage = open_storage(config_file)
+    try:
+        assert isinstance(storage, JsonStorage)
+        state, _ = storage.load()
+    finally:
+        storage.close()
+    assert not os.path.exists(_db_path(config_file))
+    assert os.path.exists(_db_path(config_file) + '.bak')
+    for key in ('data_rotation', 'data_popup', 'hotkey'):
+        assert state[key] == expected[key]
+
+
+def test_many_inserts_at_same_place_keep_order(config_file):
+    storage = SqliteStorage(_db_path(config_file), config_file)
+    try:
+        storage.load()
+        # Вставки в одно и то же место исчерпывают промежуток между ключами position
+        for n in range(40):
+            storage.record({'op': 'add', 'profile': 'popup', 'path': [1], 'value': str(n)})
+        storage.flush() # Чтение очередь записи не ждёт
+        assert storage.load_children(('root', 'popup'))[1:41] == [str(n) for n in reversed(range(40))]
+        assert not storage.record({'op': 'set', 'key': 'hotkey', 'value': 'ctrl+5'})
+    finally:
+        storage.close()
+
+
+def test_failed_op_requests_snapshot(config_file):
+    storage = SqliteStorage(_db_path(config_file), config_file)
+    try:
+        storage.load()
+        storage.record({'op': 'delete', 'profile': 'popup', 'path': [10]})
+        storage.flush()
+        assert storage.record({'op': 'set', 'key': 'hotkey', 'value': 'ctrl+5'})
+    finally:
+        storage.close()
+
+
+def _popup_with_folders(config_file):
+    state = _state()
+    state['data_popup'] = state['data_rotation']
+    with open(config_file, 'w', encoding='utf-8') as f:
+        f.write(encode_config(state, journal_seq=0))
+
+
+def test_search_index_reads_lazy_folders_from_table(config_file, sqlite_env):
+    _popup_with_folders(config_file)
+    store = SnippetStore(config_file)
+    try:
+        store.load()
+        folder = store.profile('popup')[1]
+        index = store.search_index
+        index.ensure_built()
+        assert len(index) == 7
+        assert not folder.loaded # Индекс построен без чтения папок в дерево
+
+        # Результат из вложенной ленивой папки - настоящий узел с цепочкой папок
+        result, = index.search('d')
+        assert result.value is store.profile('popup')[1].items[1].items[1]
+        assert [item.name for item in result.folders] == ['f', 'g']
+        assert folder.loaded
+
+        # После чтения папки правки в ней попадают в индекс как обычно
+        store.apply({'op': 'edit', 'profile': 'popup', 'path': [1, 0], 'value': 'changed'})
+        assert index.search('b') == []
+        assert [r.value.text for r in index.search('changed')] == ['changed']
+        store.apply({'op': 'delete', 'profile': 'popup', 'path': [1]})
+        assert index.search('c') == [] and index.search('g') == []
+        assert len(index) == 2
+    finally:
+        store.close()
+
+
+
+def test_deleting_unread_folder_drops_its_documents(config_file, sqlite_env):
+    _popup_with_folders(config_file)
+    store = SnippetStore(config_file)
+    try:
+        store.load()
+        index = store.search_index
+        index.ensure_built()
+        folder = store.profile('popup')[1]
+        store.apply({'op': 'delete', 'profile': 'popup', 'path': [1]})
+        assert not folder.loaded
+        assert len(index) == 2
+        assert index.search('c') == [] and index.search('g') == []
+    finally:
+        store.close()
@@ -1,41 +1,37 @@
+import logging
 import sys
 import json
 import os
 import time
-import copy
-import winreg # Added for setup_auto_start
 
 __version__ = "1.0.4"
 
-# Standard library imports for updates
-import urllib.request
-import json
-import threading
-import subprocess
-import shutil
-import tempfile
-
-# Third-party imports
-from packaging import version
+# Сеть, обновления (urllib, packaging, subprocess...), winreg и диалоги
+# импортируются при первом использовании: на пути запуска только горячие
+# клавиши, трей и главное окно. Замер: TEXT_ROTATOR_IMPORT_REPORT (utils/import_profile.py)
 
 from PyQt5 import QtWidgets, QtGui, QtCore
 from PyQt5.QtWidgets import (QSystemTrayIcon, QMenu, QAction, QInputDialog, 
                              QVBoxLayout, QHBoxLayout, QLabel, QPushButton, 
-                             QListWidget, QPlainTextEdit, QLineEdit, QMessageBox,
+                             QPlainTextEdit, QLineEdit, QMessageBox,
                              QAbstractItemView, QWidget, QDialog, QCheckBox, QProgressDialog)
 from PyQt5.QtCore import Qt, QPoint, QThread, pyqtSignal, QPropertyAnimation, QRect, QEasingCurve, QVariantAnimation, QAbstractAnimation, QEvent
 from PyQt5.QtGui import QIcon, QFont, QPalette, QMouseEvent, QCursor, QColor, QPainter, QPen, QBrush
 import keyboard
-import pyperclip
 from functools import partial
 
-from models.hotkey_listener import HotkeyListener
+from models.hotkey_dispatcher import HotkeyDispatcher
+from models.latency import LatencyTracer, StartupTimeline
+from models.paste_worker import PasteWorker
+from models.config_codec import default_state
+from models.snippet_store import SnippetStore
 from ui.text_selection_popup import TextSelectionPopup
-from ui.folder_edit_dialog import FolderEditDialog
-from ui.hotkey_recorder_dialog import HotkeyRecorderDialog
-from ui.settings_dialog import SettingsDialog # Import the new dialog
+from ui.icons import IconBindings
+from ui.snippet_model import SnippetTreeModel, NumberedItemDelegate
+from ui.theme import application_stylesheet, apply_stylesheet, theme_name, token
 from utils.resource_path import resource_path
-from utils.updater import Updater
+
+log = logging.getLogger(__name__)
 
 # --- GitHub Update Configuration ---
 GITHUB_API_URL = "https://api.github.com/repos/rulled/Text_Rotator/releases/latest"
@@ -64,7 +60,7 @@ def is_system_dark_theme():
             return False
         return False
     except Exception as e:
-        print(f"Ошибка определения темы системы: {e}")
+        log.error("Ошибка определения темы системы: %s", e)
         return False
 
 class MacOSButton(QPushButton):
@@ -269,67 +265,10 @@ class CustomTitleBar(QWidget):
         # Добавляем контейнер с кнопками в основной макет (справа)
         self.layout.addWidget(buttons_container)
         
-        self.apply_theme()
-        
-    def apply_theme(self):
-        """Применяет стиль в зависимости от темы."""
-        if self.is_dark_theme:
-            # Темная тема
-            self.setStyleSheet("""
-                CustomTitleBar {
-                    background-color: #1E1E1E;
-                    color: #FFFFFF;
-                }
-                QLabel {
-                    color: #FFFFFF;
-                    font-family: 'Inter';
-                    font-size: 14px;
-                    font-weight: 500;
-                }
-            """)
-            
-            # Обновляем стили для кнопок с сохранением их базовых цветов и добавлением рамки
-            for btn, color in [(self.btn_close, "#FF5F57"), 
-                              (self.btn_minimize, "#FEBC2E"), 
-                              (self.btn_maximize, "#28C840")]:
-                btn.setStyleSheet(f"""
-                    QPushButton {{
-                        background-color: {color};
-                        border-radius: 7px;
-                        border: 1px solid rgba(0, 0, 0, 0.15);
-                    }}
-                """)
-        else:
-            # Светлая тема
-            self.setStyleSheet("""
-                CustomTitleBar {
-                    background-color: #F0F0F0;
-                    color: #000000;
-                }
-                QLabel {
-                    color: #000000;
-                    font-family: 'Inter';
-                    font-size: 14px;
-                    font-weight: 500;
-                }
-            """)
-            
-            # Обновляем стили для кнопок с сохранением их базовых цветов и добавлением рамки
-            for btn, color in [(self.btn_close, "#FF5F57"), 
-                              (self.btn_minimize, "#FEBC2E"), 
-                              (self.btn_maximize, "#28C840")]:
-                btn.setStyleSheet(f"""
-                    QPushButton {{
-                        background-color: {color};
-                        border-radius: 7px;
-                        border: 1px solid rgba(0, 0, 0, 0.15);
-                    }}
-                """)
-    
     def update_theme(self, is_dark):
-        """Обновляет тему заголовка."""
+        """Обновляет тему заголовка. Стили заголовка входят в общую таблицу
+        главного окна (ui/theme.py), отдельно их ставить не нужно."""
         self.is_dark_theme = is_dark
-        self.apply_theme()
     
     def mousePressEvent(self, event):
         """Обработка нажатия мыши для начала перемещения окна."""
@@ -732,30 +671,99 @@ class UpdateDownloadThread(QThread):
         except Exception:
             pass
 
+def _setting(key):
+    """Свойство окна, читающее и меняющее настройку key в store.state."""
+    def set_value(self, value):
+        self.store.state[key] = value
+    return property(lambda self: self.store.state[key], set_value)
+
+
 class TextRotator(ResizableFramelessWindow):
-    def __init__(self):
+    # Сообщение об ошибке фоновой записи конфигурации (из потока ConfigWriter)
+    config_save_failed = pyqtSignal(str)
+
+    SAVE_DEBOUNCE_MS = 500 # Серия правок сохраняется одной записью после паузы
+    PASTE_STOP_TIMEOUT_MS = 1000 # Сколько ждать потока вставки при выходе
+
+    # Профили и настройки живут в self.store (models/snippet_store.py)
+    data_rotation = property(lambda self: self.store.profile('rotation')) # Data when checkbox is OFF
+    data_popup = property(lambda self: self.store.profile('popup'))       # Data when checkbox is ON
+    hotkey = _setting('hotkey')
+    hotkey_bindings = _setting('hotkey_bindings') # Дополнительные привязки: [{'hotkey': ..., 'folder': ...} или {'hotkey': ..., 'text': ...}]
+    use_popup = _setting('use_popup')
+    theme_mode = _setting('theme_mode') # "auto", "light", "dark"
+    rotation_strategy = _setting('rotation_strategy') # Порядок ротации, см. models/rotation_strategies.py
+
+    def __init__(self, start_in_tray=False, startup=None, log_service=None):
+        """start_in_tray - запуск из автозагрузки: горячие клавиши включаются
+        сразу, а главное окно строится только при первом показе.
+        startup - StartupTimeline с отметками этапов запуска."""
         super(TextRotator, self).__init__()
+        self.startup = startup or StartupTimeline()
+        self.log_service = log_service # LogService: последние сообщения журнала для экспорта диагностики
+        self.main_window_ready = False # Виджеты главного окна созданы (этап 3)
         
-        self.data_rotation = [] # Data when checkbox is OFF
-        self.data_popup = []    # Data when checkbox is ON
-        self.flat_texts_for_rotation = [] # For rotation mode cache
-        self.current_rotation_index = 0
-        self.hotkey = "ctrl+2"
         self.config_file = os.path.join(os.path.expanduser("~"), "text_rotator_config.json")
+        # Тексты, настройки, индексы и ротация; полные снимки откладываются,
+        # серия правок даёт одну запись
+        self.store = SnippetStore(self.config_file, on_error=self.config_save_failed.emit)
         self.is_running = False
-        self.hotkey_listener_thread = None
-        self.use_popup = False # Will be determined by load_config
         self.popup = None
         self.add_folder_button = None # Placeholder for the button
         self.settings_dialog = None # Placeholder for the settings dialog instance
         self.is_dark_theme = False # Will be determined by apply_theme based on mode
-        self.theme_mode = "auto" # New setting: "auto", "light", "dark"
-        
-        self.load_config() # Load config first (loads theme_mode)
-        self.apply_theme() # Apply theme based on loaded mode
-        self.init_ui()     # Then init UI
-        
-        # Создаем иконку в трее
+        self.applied_theme = None # Тема, стили которой сейчас стоят ('light'/'dark')
+        self.icon_bindings = IconBindings() # Кнопки с иконками, зависящими от темы
+        
+        # Поток вставки текста (буфер обмена, ctrl+v, выделение)
+        # Задержки от нажатия горячей клавиши до вставки (смотрятся в окне настроек)
+        self.latency_tracer = LatencyTracer()
+        self.paste_worker = PasteWorker(tracer=self.latency_tracer)
+        self.paste_worker.clipboard_requested.connect(self.set_clipboard_text, Qt.QueuedConnection)
+        self.paste_worker.paste_failed.connect(self.on_paste_failed)
+        self.paste_worker.paste_finished.connect(self.on_paste_finished)
+        QtWidgets.QApplication.clipboard().dataChanged.connect(self.on_clipboard_changed)
+        
+        # Единый перехватчик всех горячих клавиш; привязки ставятся при запуске
+        self.hotkey_dispatcher = HotkeyDispatcher(tracer=self.latency_tracer)
+        self.hotkey_dispatcher.hotkey_pressed.connect(self.on_hotkey_pressed)
+        self.hotkey_dispatcher.start()
+        self.paste_worker.start()
+        
+        self.config_save_failed.connect(self.on_config_save_failed)
+        self.save_timer = QtCore.QTimer(self)
+        self.save_timer.setSingleShot(True)
+        self.save_timer.setInterval(self.SAVE_DEBOUNCE_MS)
+        self.save_timer.timeout.connect(self.write_config)
+        
+        # Общая модель дерева текстов для главного списка, окна выбора и диалога папки
+        self.snippet_model = SnippetTreeModel(self.store.tree, self)
+        
+        # Этап 1: конфигурация, индексы ротации и окна выбора, горячая клавиша
+        self.load_config() # Индексы перестраиваются вместе с загрузкой
+        self.startup.mark('config')
+        self.apply_theme() # Стили ставятся на само окно; дочерние виджеты получат их при создании
+        if start_in_tray:
+            self.arm_hotkeys() # Автозапуск: горячие клавиши работают сразу, без окна
+        self.startup.mark('hotkey')
+
+        # Этап 2: иконка в трее
+        self.init_tray()
+        self.startup.mark('tray')
+        if self.is_running:
+            self.tray_icon.showMessage("Text Rotator запущен", f"Используйте {self.hotkey}.",
+                                       QSystemTrayIcon.Information, 2000)
+
+        # Окно выбора создаётся заранее, чтобы первый показ был мгновенным, но
+        # после запуска цикла событий - трей и горячая клавиша его не ждут
+        QtCore.QTimer.singleShot(0, self.prepare_popup)
+
+        # Этап 3: главное окно строится при первом показе (см. setVisible)
+        if not start_in_tray:
+            self.show()
+
+    def init_tray(self):
+        """Создаёт иконку в трее с меню."""
         self.tray_icon = QSystemTrayIcon(self)
         # Устанавливаем иконку приложения для трея
         app_icon_path = resource_path("assets/app.ico")
@@ -765,7 +773,7 @@ class TextRotator(ResizableFramelessWindow):
             self.tray_icon.setIcon(self.style().standardIcon(QtWidgets.QStyle.SP_ComputerIcon))
         
         # Создаем меню для иконки в трее
-        tray_menu = QMenu()
+        tray_menu = QMenu(self)
         
         show_action = QAction("Показать окно", self)
         show_action.triggered.connect(self.show)
@@ -782,12 +790,26 @@ class TextRotator(ResizableFramelessWindow):
         
         # Соединяем двойной клик по иконке с показом окна
         self.tray_icon.activated.connect(self.tray_icon_activated)
-        
-        # Применяем тему в зависимости от режима системы - Moved up before init_ui
-        # self.apply_theme()
+
+    def prepare_popup(self):
+        if self.popup is None:
+            self.ensure_popup()
+            self.startup.mark('popup')
+        self.store.search_index.ensure_built() # Первый поиск в окне не ждёт индекса
+
+    def setVisible(self, visible):
+        """Этап 3 запуска: виджеты главного окна создаются при первом показе."""
+        if visible and not self.main_window_ready:
+            self.init_ui()
+            self.main_window_ready = True
+            self.show_run_state()
+            self.startup.mark('main_window')
+        super(TextRotator, self).setVisible(visible)
 
     def apply_theme(self, mode=None):
-        """Применяет тему на основе указанного режима или сохраненного self.theme_mode."""
+        """Применяет тему на основе указанного режима или сохраненного self.theme_mode.
+
+        Стили меняются, только если действующая тема (светлая/тёмная) стала другой."""
         # Determine the mode to use
         current_mode = mode if mode else self.theme_mode
         
@@ -799,216 +821,27 @@ class TextRotator(ResizableFramelessWindow):
         else: # Auto mode
             self.is_dark_theme = is_system_dark_theme()
             
-        print(f"Applying theme. Mode: {current_mode}, is_dark_theme: {self.is_dark_theme}") # Debug log
-
-        # Apply the stylesheet based on self.is_dark_theme
-        if self.is_dark_theme:
-            # Темная тема
-            self.setStyleSheet("""
-                QMainWindow {
-                    background-color: #1E1E1E;
-                    color: #FFFFFF;
-                    border-radius: 10px;
-                    border: 1px solid #3C3C3C;
-                }
-                QDialog, QWidget {
-                    background-color: #1E1E1E;
-                    color: #FFFFFF;
-                }
-                QLabel {
-                    color: #FFFFFF;
-                    font-family: 'Inter';
-                    font-size: 16px;
-                    font-weight: 400;
-                }
-                QLineEdit, QPlainTextEdit {
-                    border: 1px solid #3C3C3C;
-                    border-radius: 5px;
-                    padding: 5px;
-                    font-family: 'Inter';
-                    font-size: 16px;
-                    font-weight: 400;
-                    background-color: #2D2D2D;
-                    color: #FFFFFF;
-                }
-                /* Hover effect for the specific hotkey QLineEdit */
-                QLineEdit#hotkeyDisplayLineEdit:hover {
-                    background-color: #3A3A3A; /* Slightly lighter dark */
-                }
-                QPushButton {
-                    border: 1px solid #3C3C3C;
-                    border-radius: 5px;
-                    padding: 5px 10px;
-                    font-family: 'Inter';
-                    font-size: 16px;
-                    font-weight: 400;
-                    background-color: #2D2D2D;
-                    color: #FFFFFF;
-                }
-                QPushButton:hover {
-                    background-color: #3C3C3C;
-                }
-                QPushButton:disabled {
-                    background-color: #1E1E1E;
-                    color: #808080;
-                    border-color: #2D2D2D;
-                }
-                QListWidget {
-                    border: 1px solid #3C3C3C;
-                    border-radius: 5px;
-                    font-family: 'Inter';
-                    font-size: 16px;
-                    font-weight: 400;
-                    background-color: #2D2D2D;
-                    color: #FFFFFF;
-                }
-                QListWidget::item:selected {
-                    background-color: #3C3C3C;
-                }
-                QCheckBox {
-                    font-family: 'Inter';
-                    font-size: 16px;
-                    font-weight: 400;
-                    color: #FFFFFF;
-                }
-                QMenu {
-                    background-color: #2D2D2D;
-                    color: #FFFFFF;
-                    border: 1px solid #3C3C3C;
-                }
-                QMenu::item:selected {
-                    background-color: #3C3C3C;
-                }
-            """)
-        else:
-            # Светлая тема
-            self.setStyleSheet("""
-                QMainWindow {
-                    background-color: #FFFFFF;
-                }
-                QDialog, QWidget {
-                    background-color: #FFFFFF;
-                }
-                QLabel {
-                    color: #000000;
-                    font-family: 'Inter';
-                    font-size: 16px;
-                    font-weight: 400;
-                }
-                QLineEdit, QPlainTextEdit {
-                    border: 1px solid #C9C9C9;
-                    border-radius: 5px;
-                    padding: 5px;
-                    font-family: 'Inter';
-                    font-size: 16px;
-                    font-weight: 400;
-                }
-                /* Hover effect for the specific hotkey QLineEdit */
-                 QLineEdit#hotkeyDisplayLineEdit:hover {
-                    background-color: #F5F5F5; /* Slightly lighter gray */
-                }
-                QPushButton {
-                    border: 1px solid #CCCCCD;
-                    border-radius: 5px;
-                    padding: 5px 10px;
-                    font-family: 'Inter';
-                    font-size: 16px;
-                    font-weight: 400;
-                    background-color: #FFFFFF;
-                }
-                QPushButton:hover {
-                    background-color: #F9F9F9;
-                }
-                QPushButton:disabled {
-                    background-color: #F0F0F0;
-                    color: #A0A0A0;
-                    border-color: #D0D0D0;
-                }
-                QListWidget {
-                    border: 1px solid #C9C9C9;
-                    border-radius: 5px;
-                    font-family: 'Inter';
-                    font-size: 16px;
-                    font-weight: 400;
-                }
-                QListWidget::item:selected {
-                    background-color: #AAD3FE;
-                }
-                QCheckBox {
-                    font-family: 'Inter';
-                    font-size: 16px;
-                    font-weight: 400;
-                }
-                QMenu {
-                    background-color: #FFFFFF;
-                    color: #000000;
-                    border: 1px solid #C9C9C9;
-                }
-                QMenu::item:selected {
-                    background-color: #AAD3FE;
-                }
-            """)
+        theme = theme_name(self.is_dark_theme)
+        if theme == self.applied_theme:
+            return # Тема не изменилась - стили уже стоят
+        self.applied_theme = theme
+        log.debug("Applying theme. Mode: %s, is_dark_theme: %s", current_mode, self.is_dark_theme) # Debug log
 
-        # Update specific widget styles that depend on the theme
-        if hasattr(self, 'main_list_widget') and self.main_list_widget:
-            self.main_list_widget.setStyleSheet(self._get_main_list_scrollbar_stylesheet())
+        # Одна общая таблица (собирается один раз на тему) - один проход стилей
+        # по главному окну, заголовку, списку, окну выбора и диалогам
+        apply_stylesheet(self, application_stylesheet(theme))
 
         if hasattr(self, 'mode_toggle') and self.mode_toggle:
-            track_color = "#E4E4E4" if not self.is_dark_theme else "#3C3C3C"
-            active_color = "#34C759" # Stays green
-            self.mode_toggle.track_color = track_color
-            self.mode_toggle.track_active_color = active_color # Ensure active color is also set
+            self.mode_toggle.track_color = token(theme, 'toggle_track')
             self.mode_toggle.update() # Redraw the toggle
-            self.update_mode_labels() # Ensure labels reflect current state and theme
 
         if hasattr(self, 'title_bar') and self.title_bar:
             self.title_bar.update_theme(self.is_dark_theme)
-        
-        self.update_button_icons() # Update icons on all relevant buttons
 
-    def _get_main_list_scrollbar_stylesheet(self):
-        if self.is_dark_theme:
-            handle_bg = "#555555"
-            handle_hover_bg = "#666666"
-        else:
-            handle_bg = "#CCCCCC"
-            handle_hover_bg = "#BBBBBB"
-        
-        return f"""
-            QListWidget {{
-                /* Keep existing QListWidget styles from main theme if any, or add defaults */
-                border: 1px solid {'#3C3C3C' if self.is_dark_theme else '#C9C9C9'};
-                border-radius: 5px;
-                font-family: 'Inter';
-                font-size: 16px;
-                font-weight: 400;
-                background-color: {'#2D2D2D' if self.is_dark_theme else '#FFFFFF'};
-                color: {'#FFFFFF' if self.is_dark_theme else '#000000'};
-            }}
-            QListWidget::item:selected {{
-                background-color: {'#3C3C3C' if self.is_dark_theme else '#AAD3FE'};
-            }}
-
-            QScrollBar:vertical {{
-                 border: none;
-                 background: transparent; 
-                 width: 8px;
-                 margin: 1px 1px 1px 1px; /* Small margin to prevent overlap with border */
-             }}
-             QScrollBar::handle:vertical {{
-                 background: {handle_bg};
-                 min-height: 25px;
-                 border-radius: 4px;
-             }}
-             QScrollBar::handle:vertical:hover {{
-                 background: {handle_hover_bg};
-             }}
-             QScrollBar::add-line:vertical, QScrollBar::sub-line:vertical,
-             QScrollBar::up-arrow:vertical, QScrollBar::down-arrow:vertical,
-             QScrollBar::add-page:vertical, QScrollBar::sub-page:vertical {{
-                 border: none; background: none; height: 0px; width: 0px;
-             }}
-        """
+        if self.popup is not None:
+            self.popup.set_theme(self.is_dark_theme)
+        
+        self.icon_bindings.set_theme(theme) # Иконки кнопок из кэша для новой темы
 
     def init_ui(self):
         self.setWindowTitle('Text Rotator')
@@ -1045,8 +878,7 @@ class TextRotator(ResizableFramelessWindow):
         
         # --- Создаем кнопку настроек ЗДЕСЬ (вместо "Изменить") --- 
         settings_button = QPushButton()
-        settings_icon = self.get_themed_icon("setting.svg") # Use new themed icon
-        settings_button.setIcon(settings_icon)
+        self.icon_bindings.bind(settings_button, "setting")
         settings_button.setToolTip("Настройки")
         settings_button.clicked.connect(self.open_settings)
         
@@ -1064,7 +896,7 @@ class TextRotator(ResizableFramelessWindow):
         self.popup_label = ModeLabel("Popup")
         
         # Светлый оттенок серого для неактивного и зелёный для активного режима
-        track_color = "#E4E4E4" if not self.is_dark_theme else "#3C3C3C"
+        track_color = token(theme_name(self.is_dark_theme), 'toggle_track')
         active_color = "#34C759"  # Зелёный цвет в стиле macOS
         
         # Создаём переключатель и устанавливаем начальное состояние
@@ -1091,49 +923,46 @@ class TextRotator(ResizableFramelessWindow):
         list_label = QLabel("Список текстов и папок (активный профиль):")
         content_layout.addWidget(list_label)
         
-        self.main_list_widget = QListWidget() # Переименовали
+        self.main_list_widget = QtWidgets.QListView() # Показывает ветку активного профиля из общей модели
+        self.main_list_widget.setObjectName("mainList") # Полоса прокрутки задаётся в таблице темы
+        self.main_list_widget.setModel(self.snippet_model)
+        self.main_list_widget.setUniformItemSizes(True) # Высота строк не пересчитывается для каждой строки
         self.main_list_widget.setSelectionMode(QAbstractItemView.SingleSelection)
-        self.main_list_widget.itemDoubleClicked.connect(self.edit_selected_item)
-        # Apply custom scrollbar style
-        self.main_list_widget.setStyleSheet(self._get_main_list_scrollbar_stylesheet())
+        self.main_list_widget.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.main_list_numbering = NumberedItemDelegate(self.main_list_widget)
+        self.main_list_widget.setItemDelegate(self.main_list_numbering)
+        self.main_list_widget.doubleClicked.connect(self.edit_selected_item)
         self.update_main_list_widget()
         content_layout.addWidget(self.main_list_widget)
 
         # Кнопки управления списком
         list_buttons_layout = QHBoxLayout()
         
-        # Загружаем иконки с использованием resource_path с учетом темы
-        add_icon = self.get_themed_icon("add.svg")
-        folder_icon = self.get_themed_icon("folder.svg")
-        delete_icon = self.get_themed_icon("delete.svg")
-        move_up_icon = self.get_themed_icon("move_up.svg")
-        move_down_icon = self.get_themed_icon("move_down.svg")
-        
         # Кнопки слева
         self.add_text_button = QPushButton() # Make it an instance attribute
-        self.add_text_button.setIcon(add_icon)
+        self.icon_bindings.bind(self.add_text_button, "add")
         self.add_text_button.setToolTip("Добавить текст в активный профиль")
         self.add_text_button.clicked.connect(self.add_root_text)
         
         delete_button = QPushButton()
-        delete_button.setIcon(delete_icon)
+        self.icon_bindings.bind(delete_button, "delete")
         delete_button.setToolTip("Удалить выбранное из активного профиля")
         delete_button.clicked.connect(self.delete_selected_item)
         
         # Create and store the "Add Folder" button
         self.add_folder_button = QPushButton() 
-        self.add_folder_button.setIcon(folder_icon)
+        self.icon_bindings.bind(self.add_folder_button, "folder")
         self.add_folder_button.setToolTip("Добавить папку (только в режиме окна выбора)")
         self.add_folder_button.clicked.connect(self.add_root_folder)
         
         # Кнопки справа
         move_up_button = QPushButton()
-        move_up_button.setIcon(move_up_icon)
+        self.icon_bindings.bind(move_up_button, "move_up")
         move_up_button.setToolTip("Вверх")
         move_up_button.clicked.connect(self.move_item_up)
         
         move_down_button = QPushButton()
-        move_down_button.setIcon(move_down_icon)
+        self.icon_bindings.bind(move_down_button, "move_down")
         move_down_button.setToolTip("Вниз")
         move_down_button.clicked.connect(self.move_item_down)
         
@@ -1154,8 +983,8 @@ class TextRotator(ResizableFramelessWindow):
         self.add_text_button.setVisible(not self.use_popup)
         self.add_folder_button.setVisible(self.use_popup) 
         self.add_folder_button.setEnabled(self.use_popup) # Ensure it's enabled if visible
-        print(f"Init UI: Add Text button visibility set to {not self.use_popup}.")
-        print(f"Init UI: Add Folder button visibility set to {self.use_popup}, enabled: {self.use_popup}.")
+        log.debug("Init UI: Add Text button visibility set to %s.", not self.use_popup)
+        log.debug("Init UI: Add Folder button visibility set to %s, enabled: %s.", self.use_popup, self.use_popup)
 
         # Кнопка запуска/остановки
         self.start_stop_button = QPushButton("Запустить")
@@ -1192,8 +1021,6 @@ class TextRotator(ResizableFramelessWindow):
         
         # Добавляем содержимое в основной макет
         full_layout.addWidget(content_widget)
-
-        self.show()
     
     def update_mode_labels(self):
         """Обновляет стиль меток режимов в зависимости от активного режима с анимацией."""
@@ -1209,8 +1036,8 @@ class TextRotator(ResizableFramelessWindow):
         if state == self.use_popup:
             return  # No change
               
-        self.use_popup = state
-        print(f"Переключение профиля. Активный профиль: {'popup' if self.use_popup else 'rotation'}")
+        self.apply_change({'op': 'set', 'key': 'use_popup', 'value': state})
+        log.info("Переключение профиля. Активный профиль: %s", 'popup' if self.use_popup else 'rotation')
         
         # Обновляем метки с анимацией
         self.update_mode_labels()
@@ -1223,96 +1050,128 @@ class TextRotator(ResizableFramelessWindow):
         # Update the list widget to show the data for the new profile
         self.update_main_list_widget() 
         
-        # Save the new state immediately
-        self.save_config()
-        
-        # If the listener is running, restart it to use the correct data/mode
+        # Привязки горячих клавиш не меняются, достаточно подготовить данные нового профиля
         if self.is_running:
-            print("Перезапуск listener из-за смены режима...")
-            was_running = self.is_running # Store state before stopping
-            self.toggle_start_stop()      # Stop
-            if was_running:               # Schedule start only if it was running
-                # Small delay might help ensure the stop completes before starting again
-                QtCore.QTimer.singleShot(100, self.toggle_start_stop) # Start again after 100ms
+            if self.prepare_active_profile():
+                self.show_run_state()
+            else:
+                self.toggle_start_stop() # Новый профиль пуст - останавливаемся
 
     def record_hotkey(self):
-        # Если программа запущена, сначала остановим её
-        was_running = False
-        if self.is_running:
-            was_running = True
-            self.toggle_start_stop()
-        
+        from ui.hotkey_recorder_dialog import HotkeyRecorderDialog
         dialog = HotkeyRecorderDialog(self)
-        if dialog.exec_():
+        # Пока идёт запись, перехватчик снят: иначе нажатие текущей горячей
+        # клавиши вызвало бы вставку в диалог и не дошло бы до него
+        self.hotkey_dispatcher.set_bindings({})
+        try:
+            accepted = dialog.exec_()
+        finally:
+            if self.is_running:
+                self.apply_hotkey_bindings()
+        if accepted:
             if dialog.result_hotkey:
                 try:
                     # Проверяем валидность комбинации с keyboard
                     keyboard.parse_hotkey(dialog.result_hotkey)
                     # Если валидно, сохраняем
-                    self.hotkey = dialog.result_hotkey
+                    self.apply_change({'op': 'set', 'key': 'hotkey', 'value': dialog.result_hotkey})
                     self.hotkey_display.setText(self.hotkey)
-                    self.save_config()
+                    # Если программа запущена, подменяем привязки без перезапуска
+                    if self.is_running:
+                        self.apply_hotkey_bindings()
                     QMessageBox.information(self, "Успех", f"Горячая клавиша изменена на {self.hotkey}")
                 except ValueError as e:
                     QMessageBox.warning(self, "Ошибка", f"Некорректная или неподдерживаемая комбинация клавиш: {dialog.result_hotkey}\n({str(e)})")
                 except Exception as e: # Ловим другие возможные ошибки keyboard
                     QMessageBox.warning(self, "Ошибка", f"Не удалось обработать комбинацию: {dialog.result_hotkey}\n({str(e)})")
-        
-        # Если программа была запущена, запустим её снова
-        if was_running:
-            self.toggle_start_stop()
-    
+
+    def build_hotkey_bindings(self):
+        """Собирает все привязки {binding_id: комбинация}: основную и из hotkey_bindings."""
+        bindings = {"main": self.hotkey}
+        for i, binding in enumerate(self.hotkey_bindings):
+            if isinstance(binding, dict) and binding.get('hotkey'):
+                bindings[f"binding:{i}"] = binding['hotkey']
+        return bindings
+
+    def apply_hotkey_bindings(self):
+        """Передаёт привязки перехватчику. Возвращает False, если основная клавиша не установлена."""
+        errors = self.hotkey_dispatcher.set_bindings(self.build_hotkey_bindings())
+        for binding_id, error in errors.items():
+            log.warning("Привязка %s пропущена: %s", binding_id, error)
+        if "main" in errors:
+            QMessageBox.warning(self, "Ошибка", f"Не удалось установить горячую клавишу {self.hotkey}: {errors['main']}")
+            return False
+        return True
+
+    def on_hotkey_pressed(self, binding_id, started=None):
+        """Маршрутизирует срабатывание привязки к её обработчику.
+
+        started - perf_counter() нажатия в потоке перехватчика."""
+        if started is not None:
+            self.latency_tracer.record_since('signal', started)
+        if binding_id == "main":
+            self.rotate_text(started)
+            return
+        try:
+            binding = self.hotkey_bindings[int(binding_id.split(":", 1)[1])]
+        except (IndexError, ValueError):
+            return
+        if 'text' in binding:
+            self.paste_text(binding['text'], select=False, started=started)
+        elif 'folder' in binding:
+            self.rotate_folder(binding['folder'], started)
+
+    def rotate_folder(self, folder_name, started=None):
+        """Вставляет следующий текст из указанной папки (привязка к папке).
+
+        Папка ищется сначала в активном профиле, затем в другом."""
+        if not self.paste_worker.has_room():
+            log.warning("Очередь вставки переполнена, нажатие пропущено без сдвига ротации.")
+            return
+        text = self.store.next_in_folder(folder_name, self.active_profile())
+        if text is None:
+            log.warning("Папка '%s' не найдена или пуста.", folder_name)
+            return
+        self.paste_text(text, select=True, started=started)
+
+    def active_profile(self):
+        return 'popup' if self.use_popup else 'rotation'
+
     def get_current_data(self):
         """Returns the data list for the currently active profile."""
-        return self.data_popup if self.use_popup else self.data_rotation
-
-    def _flatten_data(self, data_list):
-        """Рекурсивно собирает все тексты из ЗАДАННОЙ структуры данных в плоский список."""
-        flat_list = []
-        for item in data_list:
-            if isinstance(item, str):
-                flat_list.append(item)
-            elif isinstance(item, dict) and item.get('type') == 'folder':
-                # Рекурсивно обходим папку
-                flat_list.extend(self._flatten_data(item.get('items', [])))
-        return flat_list
-
-    def recreate_popup(self, data):
-        """Пересоздает окно выбора текста для обеспечения корректной работы"""
-        if self.popup:
-            # Удаляем старый экземпляр
-            try:
-                self.popup.hide()  # Сначала скрываем
-                self.popup.setParent(None)  # Отсоединяем от родительского окна
-                self.popup.deleteLater()  # Планируем уничтожение
-            except Exception as e:
-                print(f"Ошибка при уничтожении popup: {e}")
-            
-        # Создаем новый экземпляр
-        callback = partial(self.paste_selected_text_from_flat_list, data)
-        self.popup = TextSelectionPopup(data, callback, parent=self)
+        return self.store.profile(self.active_profile())
+
+    def ensure_popup(self):
+        """Возвращает постоянное окно выбора текста, создавая его при первом вызове.
+
+        При смене темы окно не пересоздаётся: стили оно наследует от главного
+        окна, а цвета подсветки и тени обновляет apply_theme."""
+        if self.popup is None:
+            callback = partial(self.paste_selected_text_from_flat_list, self.data_popup)
+            # Окно показывает ветку popup общей модели и само следит за её изменениями
+            self.popup = TextSelectionPopup(self.snippet_model, callback, parent=self, search_index=self.store.search_index,
+                                            tracer=self.latency_tracer)
+            self.popup.winId() # Создаём нативное окно заранее
         return self.popup
 
-    def rotate_text(self):
+    def rotate_text(self, started=None):
         """Handles hotkey press: either rotates text or shows popup based on mode."""
-        print(f"Hotkey pressed. Current mode: {'popup' if self.use_popup else 'rotation'}") # Добавим лог режима
+        if started is None:
+            started = time.perf_counter() # Для замера времени до первой отрисовки окна
+        log.debug("Hotkey pressed. Current mode: %s", 'popup' if self.use_popup else 'rotation') # Добавим лог режима
         if self.use_popup:
             # --- Режим всплывающего окна ---
-            print("Entering popup mode logic...") # Лог входа
-            current_profile_data = self.data_popup # Get data for popup profile
-            print(f"Popup profile data: {current_profile_data}") # Лог данных профиля
-            if not current_profile_data:
-                 print("Профиль окна выбора пуст, попап не показан.")
+            log.debug("Entering popup mode logic...") # Лог входа
+            if not self.data_popup:
+                 log.warning("Профиль окна выбора пуст, попап не показан.")
                  return
 
-            print("Preparing to show popup...") # Лог перед показом
+            # Окно создано заранее; список обновляется только после изменений данных
+            popup = self.ensure_popup()
             
-            # Всегда пересоздаем окно для надежности
-            popup = self.recreate_popup(current_profile_data)
-            
-            print("Calling show_at_cursor()...") # Лог перед вызовом
-            popup.show_at_cursor() # show_at_cursor now includes raise_() and activateWindow()
-            print("Called show_at_cursor() on popup.") # Лог вызова показа
+            log.debug("Calling show_at_cursor()...") # Лог перед вызовом
+            popup.show_at_cursor(started) # show_at_cursor now includes raise_() and activateWindow()
+            log.debug("Called show_at_cursor() on popup.") # Лог вызова показа
             
             # Добавляем дополнительную активацию окна
             popup.activateWindow()
@@ -1321,234 +1180,209 @@ class TextRotator(ResizableFramelessWindow):
 
         else:
             # --- Режим ротации ---
-            if not self.flat_texts_for_rotation:
-                print("Профиль ротации пуст, ротация невозможна.")
+            # Курсор сдвигается, только если вставку есть куда поставить: иначе текст пропал бы
+            if not self.paste_worker.has_room():
+                log.warning("Очередь вставки переполнена, нажатие пропущено без сдвига ротации.")
+                return
+            # Курсор переживает правки и перезапуски: ротация продолжается с того же текста
+            position, text_to_insert = self.store.next_in_profile('rotation')
+            if text_to_insert is None:
+                log.warning("Профиль ротации пуст, ротация невозможна.")
                 return
-                
-            if not self.flat_texts_for_rotation: # Double check after potential flattening
-                 print("Профиль ротации все еще пуст после проверки.")
-                 return
-
-            # Ensure index is valid
-            if self.current_rotation_index >= len(self.flat_texts_for_rotation):
-                 self.current_rotation_index = 0 # Reset if out of bounds
-                 
-            if not self.flat_texts_for_rotation: # Check again after potential reset
-                 print("Профиль ротации пуст после сброса индекса.")
-                 return
-
-            text_to_insert = self.flat_texts_for_rotation[self.current_rotation_index]
-            
-            # Обновляем индекс для следующего вызова
-            self.current_rotation_index = (self.current_rotation_index + 1) % len(self.flat_texts_for_rotation)
             
             # --- Use paste_text which handles clipboard AND paste simulation ---
-            print(f"Rotation mode: pasting item {self.current_rotation_index}/{len(self.flat_texts_for_rotation)}")
-            self.paste_text(text_to_insert) 
+            log.debug("Rotation mode: pasting item %s/%s", position + 1, len(self.store.flat_indexes['rotation']))
+            self.paste_text(text_to_insert, started=started)
 
     def paste_selected_text_from_flat_list(self, data, text):
         """Callback for TextSelectionPopup. Gets text and pastes it."""
         if text:
+            self.store.record_pick(text)
             self.paste_text(text) # Use the common paste method
         else:
-            print(f"Ошибка: Неверный текст получен из попапа.")
+            log.error("Ошибка: Неверный текст получен из попапа.")
             
-    def paste_text(self, text_to_insert):
-        """Вставляет переданный текст (используется и попапом, и ротацией)."""
-        if text_to_insert:
-            try:
-                # Копируем текст в буфер обмена через Qt
-                clipboard = QtWidgets.QApplication.clipboard()
-                clipboard.setText(text_to_insert)
-                
-                # Небольшая пауза перед манипуляциями с клавиатурой
-                time.sleep(0.1) 
-                
-                # Вставляем новый текст
-                keyboard.press_and_release('ctrl+v')
-                
-                # Если мы в режиме ротации, выделяем только что вставленный текст123123123
-                # чтобы следующая вставка его заменила (как в oldversion.py)
-                if not self.use_popup: 
-                    time.sleep(0.05) # Короткая пауза после вставки перед выделением
-                    keyboard.press('shift')
-                    for _ in range(len(text_to_insert)):
-                        keyboard.press_and_release('left') # Используем стрелку ВЛЕВО
-                    keyboard.release('shift')
+    def paste_text(self, text_to_insert, select=None, started=None):
+        """Вставляет переданный текст (используется и попапом, и ротацией).
+
+        select - выделить ли вставленный текст; по умолчанию только в режиме ротации.
+        started - perf_counter() нажатия горячей клавиши для замера полной задержки.
+        Сама вставка выполняется в PasteWorker, GUI-поток не блокируется.
+        Возвращает False, если вставка не поставлена в очередь."""
+        if select is None:
+            select = not self.use_popup
+        if not text_to_insert:
+            return False
+        return self.paste_worker.submit(text_to_insert, select=select, started=started)
 
-            except Exception as e:
-                print(f"Ошибка вставки текста: {e}")
-                QMessageBox.warning(self, "Ошибка вставки", f"Не удалось вставить текст: {e}")
+    def set_clipboard_text(self, text):
+        """Устанавливает текст буфера обмена по запросу PasteWorker (в GUI-потоке)."""
+        clipboard = QtWidgets.QApplication.clipboard()
+        clipboard.setText(text)
+        # Запись сверяется по содержимому: если оно уже то, вставлять можно, не дожидаясь dataChanged
+        self.paste_worker.timing.notify_clipboard_text(clipboard.text())
+
+    def on_clipboard_changed(self):
+        """Сообщает PasteWorker новое содержимое буфера обмена (и чужие изменения тоже:
+        перед ctrl+v буфер сверяется с текстом вставки)."""
+        self.paste_worker.timing.notify_clipboard_text(QtWidgets.QApplication.clipboard().text())
+
+    def on_paste_finished(self, text, elapsed_ms):
+        """Показывает в строке статуса, сколько заняла последняя вставка."""
+        if elapsed_ms >= 0:
+            self.show_run_state(f"{self.run_status_text()}\nВставлено за {elapsed_ms:.0f} мс")
+
+    def on_paste_failed(self, error):
+        log.error("Ошибка вставки текста: %s", error)
+        QMessageBox.warning(self, "Ошибка вставки", f"Не удалось вставить текст: {error}")
 
     def load_config(self):
         """Loads configuration, including theme mode."""
-        # Set defaults first
-        self.data_rotation = []
-        self.data_popup = []
-        self.hotkey = "ctrl+2"
-        self.use_popup = False # Default to rotation mode
-        self.theme_mode = "auto" # Default theme mode
-        needs_save_after_migration = False
-
         try:
-            if os.path.exists(self.config_file):
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-
-                self.hotkey = config.get('hotkey', "ctrl+2")
-                self.theme_mode = config.get('theme_mode', "auto") # Load theme mode
-
-                if 'data_rotation' in config or 'data_popup' in config:
-                    self.data_rotation = config.get('data_rotation', [])
-                    self.data_popup = config.get('data_popup', [])
-                    self.use_popup = config.get('use_popup', False)
-                    print(f"Load Config: Загружены профили rotation/popup. Режим use_popup: {self.use_popup}")
-                elif 'data' in config:
-                    print("Load Config: Обнаружен старый формат ('data'). Миграция...")
-                    self.data_rotation = config.get('data', [])
-                    self.data_popup = []
-                    self.use_popup = False # Reset mode
-                    needs_save_after_migration = True # Mark for saving
-                    print("Load Config: Миграция завершена. Режим установлен на 'rotation'.")
-                elif 'texts' in config:
-                    print("Load Config: Обнаружен старый формат ('texts'). Миграция...")
-                    self.data_rotation = config.get('texts', [])
-                    self.data_popup = []
-                    self.use_popup = False # Reset mode
-                    needs_save_after_migration = True # Mark for saving
-                    print("Load Config: Миграция завершена. Режим установлен на 'rotation'.")
-                else:
-                    print("Load Config: Конфигурационный файл не содержит данных. Режим: rotation.")
-                    self.use_popup = False # Ensure default is set
-
-                # Save immediately if migration occurred to persist the corrected state
-                if needs_save_after_migration:
-                    print("Load Config: Сохранение конфигурации после миграции...")
-                    self.save_config() # Save the updated structure and use_popup=False
+            needs_save_after_migration = self.store.load()
+
+            # Save immediately if migration occurred to persist the corrected state
+            if needs_save_after_migration:
+                log.info("Load Config: Сохранение конфигурации после миграции или обрезки журнала...")
+                self.save_config() # Save the updated structure and use_popup=False
 
         except json.JSONDecodeError as e:
              QMessageBox.warning(self, "Ошибка конфигурации", f"Не удалось прочитать файл конфигурации: {e}\nБудут использованы настройки по умолчанию.")
-             self.data_rotation, self.data_popup, self.hotkey, self.use_popup = [], [], "ctrl+2", False
+             self.store.set_state(default_state())
         except Exception as e:
             QMessageBox.warning(self, "Ошибка загрузки", f"Не удалось загрузить конфигурацию: {e}\nБудут использованы настройки по умолчанию.")
-            self.data_rotation, self.data_popup, self.hotkey, self.use_popup = [], [], "ctrl+2", False
-
-        self.flat_texts_for_rotation = []
-        self.current_rotation_index = 0
+            self.store.set_state(default_state())
 
     def save_config(self):
-        """Saves configuration, including both profiles and theme mode."""
-        # No need to update flat_texts_for_rotation here
+        """Планирует сохранение конфигурации.
+
+        Запись откладывается на SAVE_DEBOUNCE_MS, серия правок даёт одну запись."""
+        self.save_timer.start() # Перезапуск таймера продлевает окно ожидания
+
+    def write_config(self):
+        """Передаёт полный снимок обеих конфигураций в хранилище."""
+        self.save_timer.stop()
         try:
-            config = {
-                'data_rotation': self.data_rotation,
-                'data_popup': self.data_popup,
-                'hotkey': self.hotkey,
-                'use_popup': self.use_popup, # Save the current mode
-                'theme_mode': self.theme_mode # Save the theme mode
-            }
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(config, f, ensure_ascii=False, indent=2)
+            self.store.save()
         except Exception as e:
             QMessageBox.warning(self, "Ошибка сохранения", f"Не удалось сохранить конфигурацию: {str(e)}")
 
+    def flush_config(self):
+        """Немедленно записывает отложенные изменения и дожидается окончания записи."""
+        if self.save_timer.isActive():
+            self.write_config()
+        self.store.flush()
+
+    def on_config_save_failed(self, error):
+        QMessageBox.warning(self, "Ошибка сохранения", f"Не удалось сохранить конфигурацию: {error}")
+
+    def prepare_active_profile(self):
+        """Проверяет, что в активном профиле есть тексты, и готовит данные ротации.
+
+        Показывает предупреждение и возвращает False, если запускаться не с чем."""
+        mode_name = "окна выбора" if self.use_popup else "ротации"
+
+        if not self.use_popup:
+            # Rotation mode: check the maintained flat index is not empty
+            log.info("Подготовка к запуску в режиме ротации...")
+            if self.store.has_texts('rotation'):
+                # Курсор не сбрасывается: ротация продолжается с места остановки
+                log.info("Режим ротации: Найдено %s текстов.", len(self.store.flat_indexes['rotation']))
+                return True
+            QMessageBox.warning(self, "Предупреждение", f"Профиль '{mode_name}' пуст или не содержит текстов. Добавьте тексты перед запуском.")
+            return False
+
+        # Popup mode: check if popup data structure itself is not empty
+        log.info("Подготовка к запуску в режиме окна выбора...")
+        if not self.data_popup:
+            QMessageBox.warning(self, "Предупреждение", f"Профиль '{mode_name}' пуст. Добавьте тексты или папки перед запуском.")
+            return False
+        # We also need at least one actual text string inside for it to work
+        if not self.store.has_texts('popup'):
+            QMessageBox.warning(self, "Предупреждение", f"Профиль '{mode_name}' не содержит текстовых элементов. Добавьте тексты перед запуском.")
+            return False
+        log.info("Режим окна выбора: Профиль не пуст и содержит тексты.")
+        return True
+
+    def run_status_text(self):
+        if not self.is_running:
+            return "Готово к запуску"
+        mode_text_display = "режим окна выбора" if self.use_popup else "режим ротации"
+        return f"Запущено ({mode_text_display}). Нажмите {self.hotkey}"
+
+    def show_run_state(self, status=None):
+        """Обновляет кнопку запуска и строку статуса, если главное окно уже построено."""
+        if not self.main_window_ready:
+            return
+        self.start_stop_button.setText("Остановить" if self.is_running else "Запустить")
+        self.status_label.setText(status or self.run_status_text())
+
+    def arm_hotkeys(self):
+        """Проверяет активный профиль и устанавливает привязки. Возвращает True при успехе."""
+        if not self.prepare_active_profile():
+            log.info("Запуск отменен: нет данных для активного режима.")
+            return False
+        try:
+            log.info("Установка горячих клавиш, основная: %s", self.hotkey)
+            if not self.apply_hotkey_bindings():
+                self.hotkey_dispatcher.set_bindings({})
+                self.show_run_state("Ошибка запуска")
+                return False
+            self.is_running = True
+            self.show_run_state()
+            return True
+        except Exception as e:
+            QMessageBox.warning(self, "Ошибка", f"Не удалось установить горячие клавиши: {str(e)}")
+            log.error("Ошибка при запуске: %s", e)
+            self.hotkey_dispatcher.set_bindings({})
+            self.is_running = False # Ensure state is correct on failure
+            self.show_run_state("Ошибка запуска")
+            return False
+
     def toggle_start_stop(self):
         if self.is_running:
-            # Останавливаем
+            # Останавливаем: снимаем привязки, поток перехватчика остаётся жить
             try:
-                if self.hotkey_listener_thread and self.hotkey_listener_thread.isRunning():
-                    print("Остановка listener потока...")
-                    self.hotkey_listener_thread.stop()
-                    self.hotkey_listener_thread.wait() # wait() can block GUI, use event loop check later if needed
-                self.hotkey_listener_thread = None # Allow garbage collection
+                self.hotkey_dispatcher.set_bindings({})
                 self.is_running = False
-                self.start_stop_button.setText("Запустить")
-                self.status_label.setText("Остановлено")
+                self.show_run_state("Остановлено")
                 self.tray_icon.showMessage("Text Rotator", "Программа остановлена", QSystemTrayIcon.Information, 2000)
-                print("Listener остановлен.")
+                log.info("Горячие клавиши отключены.")
             except Exception as e:
                 QMessageBox.warning(self, "Ошибка", f"Не удалось корректно остановить программу: {str(e)}")
-                print(f"Ошибка при остановке: {e}")
-        else:
-            # Запускаем
-            can_start = False
-            active_profile_data = self.get_current_data()
+                log.error("Ошибка при остановке: %s", e)
+        elif self.arm_hotkeys():
             mode_name = "окна выбора" if self.use_popup else "ротации"
+            self.hide()
+            self.tray_icon.showMessage(
+                "Text Rotator запущен",
+                f"Профиль '{mode_name}' активен. Используйте {self.hotkey}.",
+                QSystemTrayIcon.Information,
+                2000
+            )
 
-            if not self.use_popup:
-                # Rotation mode: flatten rotation data and check if not empty
-                print("Подготовка к запуску в режиме ротации...")
-                self.flat_texts_for_rotation = self._flatten_data(self.data_rotation) # Use rotation data
-                if self.flat_texts_for_rotation:
-                    can_start = True
-                    self.current_rotation_index = 0 # Reset index on start
-                    print(f"Режим ротации: Найдено {len(self.flat_texts_for_rotation)} текстов.")
-                else:
-                     QMessageBox.warning(self, "Предупреждение", f"Профиль '{mode_name}' пуст или не содержит текстов. Добавьте тексты перед запуском.")
-            else:
-                 # Popup mode: check if popup data structure itself is not empty
-                 print("Подготовка к запуску в режиме окна выбора...")
-                 if self.data_popup: # Check the main structure, flattening happens on hotkey press
-                     # We also need at least one actual text string inside for it to work
-                     if self._flatten_data(self.data_popup):
-                         can_start = True
-                         print("Режим окна выбора: Профиль не пуст и содержит тексты.")
-                     else:
-                          QMessageBox.warning(self, "Предупреждение", f"Профиль '{mode_name}' не содержит текстовых элементов. Добавьте тексты перед запуском.")
-                 else:
-                     QMessageBox.warning(self, "Предупреждение", f"Профиль '{mode_name}' пуст. Добавьте тексты или папки перед запуском.")
-
-            if not can_start:
-                print("Запуск отменен: нет данных для активного режима.")
-                return # Don't start if checks fail
+    def update_main_list_widget(self):
+        """Показывает в списке АКТИВНЫЙ профиль; строки берутся из общей модели."""
+        self.main_list_numbering.enabled = not self.use_popup # В режиме ротации строки нумеруются
+        self.main_list_widget.setRootIndex(self.snippet_model.profile_index('popup' if self.use_popup else 'rotation'))
 
-            try:
-                print(f"Запуск listener для горячей клавиши: {self.hotkey}")
-                self.hotkey_listener_thread = HotkeyListener(self.hotkey)
-                # rotate_text now handles both modes internally
-                self.hotkey_listener_thread.hotkey_pressed.connect(self.rotate_text) 
-                self.hotkey_listener_thread.start()
-                
-                self.is_running = True
-                self.start_stop_button.setText("Остановить")
-                
-                mode_text_display = "режим окна выбора" if self.use_popup else "режим ротации"
-                self.status_label.setText(f"Запущено ({mode_text_display}). Нажмите {self.hotkey}")
-                
-                self.hide()
-                self.tray_icon.showMessage(
-                    "Text Rotator запущен",
-                    f"Профиль '{mode_name}' активен. Используйте {self.hotkey}.",
-                    QSystemTrayIcon.Information,
-                    2000
-                )
-            except Exception as e:
-                QMessageBox.warning(self, "Ошибка", f"Не удалось запустить listener: {str(e)}")
-                print(f"Ошибка при запуске listener: {e}")
-                self.is_running = False # Ensure state is correct on failure
-                self.start_stop_button.setText("Запустить")
-                self.status_label.setText("Ошибка запуска")
+    def current_main_row(self):
+        index = self.main_list_widget.currentIndex()
+        return index.row() if index.isValid() else -1
 
-    def update_main_list_widget(self):
-        """Обновляет QListWidget, отображая данные АКТИВНОГО профиля."""
-        self.main_list_widget.clear()
-        # Use the helper method to get the correct data list
-        current_data = self.get_current_data() 
-        for item in current_data:
-            if isinstance(item, str):
-                preview = item.replace('\n', ' ')[:80] + ('...' if len(item.replace('\n', ' ')) > 80 else '')
-                if not self.use_popup:  # Если режим Rotation, добавляем номер строки
-                    line_number = self.main_list_widget.count() + 1
-                    preview = f"{line_number}. {preview}"
-                self.main_list_widget.addItem(preview)
-            elif isinstance(item, dict) and item.get('type') == 'folder':
-                folder_name = item.get('name', 'Безымянная папка')
-                display_text = f"📁 {folder_name}"
-                list_item = QtWidgets.QListWidgetItem(display_text)
-                # Optional: Add folder icon
-                # list_item.setIcon(QIcon(resource_path("assets/folder.svg"))) 
-                self.main_list_widget.addItem(list_item)
-            # else: handle unknown types if necessary
+    def set_current_main_row(self, row):
+        self.main_list_widget.setCurrentIndex(
+            self.snippet_model.index(row, 0, self.main_list_widget.rootIndex()))
+
+    def apply_change(self, op):
+        """Выполняет правку в хранилище и сохраняет её. Представления узнают
+        о правке из шины изменений и обновляют только затронутые строки.
+
+        Путь в op задаётся индексами от корня профиля; 'profile' по умолчанию - активный."""
+        if op['op'] != 'set':
+            op.setdefault('profile', self.active_profile())
+        if self.store.apply(op):
+            self.save_config() # Снимок; после записи журнал будет сжат
 
     def add_root_text(self):
         """Добавляет новый текстовый элемент в корень АКТИВНОГО профиля."""
@@ -1557,9 +1391,8 @@ class TextRotator(ResizableFramelessWindow):
         )
         if ok and new_text.strip():
             # Add to the currently active data list
-            self.get_current_data().append(new_text.strip()) 
-            self.update_main_list_widget() # Refresh list view
-            self.save_config()             # Save changes
+            current_data = self.get_current_data()
+            self.apply_change({'op': 'add', 'path': [len(current_data)], 'value': new_text.strip()})
         elif ok and not new_text.strip():
             QMessageBox.warning(self, "Предупреждение", "Текст не может быть пустым!")
 
@@ -1568,17 +1401,8 @@ class TextRotator(ResizableFramelessWindow):
         base_default_name = "Новая папка"
         
         current_data = self.get_current_data()
-        existing_folder_names = set()
-        for item in current_data:
-            if isinstance(item, dict) and item.get('type') == 'folder' and 'name' in item:
-                existing_folder_names.add(item['name'])
-
-        suggested_name = base_default_name
-        counter = 1
-        # Check if the base name or subsequent "(N)" versions exist
-        while suggested_name in existing_folder_names:
-            suggested_name = f"{base_default_name} ({counter})"
-            counter += 1
+        # Базовое имя или "(N)", если такая папка уже есть
+        suggested_name = self.store.suggest_folder_name(self.active_profile(), base_default_name)
         
         folder_name, ok = QInputDialog.getText(
             self, 
@@ -1591,7 +1415,7 @@ class TextRotator(ResizableFramelessWindow):
         if ok and folder_name.strip():
             final_folder_name = folder_name.strip()
             # Note: This change only affects the *suggested* default name.
-            # If the user manually types a name that is already in existing_folder_names,
+            # If the user manually types a name of an existing folder,
             # this current logic will still allow creating it (leading to duplicates if user isn't careful).
             # Addressing that would be a separate enhancement (e.g., warning or further auto-incrementing final_folder_name).
 
@@ -1601,15 +1425,13 @@ class TextRotator(ResizableFramelessWindow):
                 "items": []
             }
             # Add to the currently active data list
-            self.get_current_data().append(new_folder) 
-            self.update_main_list_widget() # Refresh list view
-            self.save_config()             # Save changes
+            self.apply_change({'op': 'add', 'path': [len(current_data)], 'value': new_folder})
         elif ok and not folder_name.strip():
             QMessageBox.warning(self, "Предупреждение", "Имя папки не может быть пустым!")
 
     def delete_selected_item(self):
         """Удаляет выбранный элемент из АКТИВНОГО профиля."""
-        current_row = self.main_list_widget.currentRow()
+        current_row = self.current_main_row()
         current_data = self.get_current_data() # Get the active list
 
         if current_row < 0 or current_row >= len(current_data):
@@ -1620,36 +1442,28 @@ class TextRotator(ResizableFramelessWindow):
         item_description = ""
         confirm_message = ""
 
-        if isinstance(item_to_delete, str):
-            item_description = f"текст " + item_to_delete[:30] + ("..." if len(item_to_delete) > 30 else "")
+        if not item_to_delete.is_folder:
+            text = item_to_delete.text
+            item_description = f"текст " + text[:30] + ("..." if len(text) > 30 else "")
             confirm_message = f"Вы уверены, что хотите удалить {item_description} из текущего профиля?"
-        elif isinstance(item_to_delete, dict) and item_to_delete.get('type') == 'folder':
-            folder_name = item_to_delete.get('name', '')
+        else:
+            folder_name = item_to_delete.name
             item_description = f"папку '{folder_name}' и всё её содержимое"
             confirm_message = f"Вы уверены, что хотите удалить {item_description} из текущего профиля?"
-        else:
-            QMessageBox.warning(self, "Ошибка", "Неизвестный тип элемента для удаления.")
-            return
             
         reply = QMessageBox.question(self, 'Подтверждение', confirm_message,
                                    QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
             
         if reply == QMessageBox.Yes:
-            del current_data[current_row] # Delete from the active list
-            self.update_main_list_widget() # Refresh list view
-            self.save_config()             # Save changes
+            self.apply_change({'op': 'delete', 'path': [current_row]}) # Delete from the active list
 
     def move_item_up(self):
         """Перемещает выбранный элемент вверх в списке АКТИВНОГО профиля."""
-        current_row = self.main_list_widget.currentRow()
-        current_data = self.get_current_data() # Get the active list
+        current_row = self.current_main_row()
         
         if current_row > 0:
-            # Modify the active list directly
-            current_data.insert(current_row - 1, current_data.pop(current_row)) 
-            self.update_main_list_widget() # Refresh list view
-            self.main_list_widget.setCurrentRow(current_row - 1) # Keep selection
-            self.save_config()             # Save changes
+            # Выделение переезжает вместе со строкой
+            self.apply_change({'op': 'move', 'path': [current_row], 'to': current_row - 1})
         elif current_row == 0:
             QMessageBox.information(self, "Информация", "Элемент уже находится вверху списка!")
         else:
@@ -1657,23 +1471,20 @@ class TextRotator(ResizableFramelessWindow):
             
     def move_item_down(self):
         """Перемещает выбранный элемент вниз в списке АКТИВНОГО профиля."""
-        current_row = self.main_list_widget.currentRow()
+        current_row = self.current_main_row()
         current_data = self.get_current_data() # Get the active list
         
         if 0 <= current_row < len(current_data) - 1:
-             # Modify the active list directly
-            current_data.insert(current_row + 1, current_data.pop(current_row))
-            self.update_main_list_widget() # Refresh list view
-            self.main_list_widget.setCurrentRow(current_row + 1) # Keep selection
-            self.save_config()             # Save changes
+            # Выделение переезжает вместе со строкой
+            self.apply_change({'op': 'move', 'path': [current_row], 'to': current_row + 1})
         elif current_row == len(current_data) - 1:
             QMessageBox.information(self, "Информация", "Элемент уже находится внизу списка!")
         else:
             QMessageBox.warning(self, "Предупреждение", "Выберите элемент для перемещения!")
 
-    def edit_selected_item(self, item_widget):
+    def edit_selected_item(self, index):
         """Редактирует текст или ОТКРЫВАЕТ папку в АКТИВНОМ профиле."""
-        current_row = self.main_list_widget.row(item_widget)
+        current_row = index.row()
         current_data = self.get_current_data() # Get the active list
 
         if current_row < 0 or current_row >= len(current_data):
@@ -1681,34 +1492,33 @@ class TextRotator(ResizableFramelessWindow):
 
         item_data = current_data[current_row] # Get the item from the active list
 
-        if isinstance(item_data, str):
+        if not item_data.is_folder:
             # Edit text
             new_text, ok = QInputDialog.getMultiLineText(
-                self, "Редактирование текста", "Отредактируйте текст:", item_data
+                self, "Редактирование текста", "Отредактируйте текст:", item_data.text
             )
             if ok and new_text.strip():
                  # Update item in the active list
-                current_data[current_row] = new_text.strip() 
-                self.update_main_list_widget() # Refresh view
-                self.save_config()             # Save changes
+                self.apply_change({'op': 'edit', 'path': [current_row], 'value': new_text.strip()})
             elif ok and not new_text.strip():
                  QMessageBox.warning(self, "Предупреждение", "Текст не может быть пустым!")
 
-        elif isinstance(item_data, dict) and item_data.get('type') == 'folder':
-            # Open folder edit dialog, passing the dictionary reference from the active list
-            dialog = FolderEditDialog(item_data, self) # Pass the dict reference
-            # The dialog modifies item_data in place
-            dialog.folder_renamed.connect(self.update_main_list_widget) 
+        else:
+            # Диалог показывает папку из общей модели и запрашивает каждую правку сигналом
+            from ui.folder_edit_dialog import FolderEditDialog
+            dialog = FolderEditDialog(self.snippet_model, index, self)
+            folder_path = [current_row]
+            dialog.folder_renamed.connect(
+                lambda name: self.apply_change({'op': 'rename', 'path': folder_path, 'name': name}))
+            dialog.item_changed.connect(
+                lambda op: self.apply_change(dict(op, path=folder_path + op['path'])))
             
             dialog.exec_() 
             
-            # After dialog closes, refresh list (in case name changed) and save
-            self.update_main_list_widget() 
-            self.save_config()
-            
-            # Disconnect signal
+            # Disconnect signals
             try:
-                dialog.folder_renamed.disconnect(self.update_main_list_widget)
+                dialog.folder_renamed.disconnect()
+                dialog.item_changed.disconnect()
             except TypeError:
                  pass 
                  
@@ -1727,16 +1537,20 @@ class TextRotator(ResizableFramelessWindow):
     
     def close_app(self):
         try:
-            if self.is_running:
-                if self.hotkey_listener_thread and self.hotkey_listener_thread.isRunning():
-                    self.hotkey_listener_thread.stop()
-                    self.hotkey_listener_thread.wait()
-            self.save_config()
-            QtWidgets.QApplication.quit()
+            self.hotkey_dispatcher.stop()
+            self.paste_worker.stop()
+            self.flush_config()
+            self.store.close()
+            if self.paste_worker.isRunning():
+                # Поток вставки бросает текущее задание на ближайшем шаге; GUI его не ждёт
+                self.paste_worker.finished.connect(QtWidgets.QApplication.quit)
+                QtCore.QTimer.singleShot(self.PASTE_STOP_TIMEOUT_MS, QtWidgets.QApplication.quit)
+            else:
+                QtWidgets.QApplication.quit()
         except Exception as e:
             QMessageBox.critical(self, "Критическая ошибка", f"Ошибка при закрытии приложения: {str(e)}")
             # Дополнительное логирование для отладки
-            print(f"Критическая ошибка при закрытии: {e}")
+            log.error("Критическая ошибка при закрытии: %s", e)
             sys.exit(1)
     
     def closeEvent(self, event):
@@ -1759,53 +1573,11 @@ class TextRotator(ResizableFramelessWindow):
             if self.theme_mode == "auto":
                 current_dark_theme = is_system_dark_theme()
                 if current_dark_theme != self.is_dark_theme:
-                    print("System theme changed (in auto mode), applying theme...")
+                    log.info("System theme changed (in auto mode), applying theme...")
                     self.apply_theme() # Re-apply theme using "auto" logic
                     # Icons are updated within apply_theme now
         super(TextRotator, self).changeEvent(event)
 
-    def update_button_icons(self):
-        """Обновляет иконки кнопок после смены темы."""
-        # Кнопки уже должны существовать
-        for widget in self.findChildren(QPushButton):
-            if hasattr(widget, 'toolTip'):
-                tooltip = widget.toolTip()
-                if "Добавить текст" in tooltip:
-                    widget.setIcon(self.get_themed_icon("add.svg"))
-                elif "Добавить папку" in tooltip:
-                    widget.setIcon(self.get_themed_icon("folder.svg"))
-                elif "Удалить" in tooltip:
-                    widget.setIcon(self.get_themed_icon("delete.svg"))
-                elif "Вверх" in tooltip:
-                    widget.setIcon(self.get_themed_icon("move_up.svg"))
-                elif "Вниз" in tooltip:
-                    widget.setIcon(self.get_themed_icon("move_down.svg"))
-
-    def get_themed_icon(self, icon_name):
-        """Загружает SVG иконку с учетом текущей темы.
-        Для темной темы добавляет суффикс _d к имени файла."""
-        # Извлекаем только базовое имя файла без пути
-        base_name = os.path.basename(icon_name).replace('.svg', '')
-        
-        if self.is_dark_theme:
-            # Для темной темы пытаемся загрузить версию с суффиксом _d
-            icon_path = resource_path(f"assets/{base_name}_d.svg")
-            # Проверяем существование файла
-            print(f"Проверка наличия темной иконки: {icon_path}")
-            if os.path.exists(icon_path):
-                print(f"Используем темную иконку: {icon_path}")
-                return QIcon(icon_path)
-            else:
-                # Если нет темной версии, используем обычную
-                icon_path = resource_path(f"assets/{base_name}.svg")
-                print(f"Темная иконка не найдена, используем стандартную: {icon_path}")
-                return QIcon(icon_path)
-        else:
-            # Для светлой темы просто загружаем обычную версию
-            icon_path = resource_path(f"assets/{base_name}.svg")
-            print(f"Используем светлую иконку: {icon_path}")
-            return QIcon(icon_path)
-
     def open_settings(self):
         """Открывает диалог настроек."""
         # Создаем диалог только если он еще не открыт
@@ -1815,6 +1587,7 @@ class TextRotator(ResizableFramelessWindow):
         
         # Вариант с одним экземпляром (чтобы не плодить окна):
         if not self.settings_dialog:
+            from ui.settings_dialog import SettingsDialog
             self.settings_dialog = SettingsDialog(self)
         self.settings_dialog.show() # Используем show() для немодального окна
         self.settings_dialog.raise_()
@@ -1833,18 +1606,36 @@ class TextRotator(ResizableFramelessWindow):
         """Устанавливает режим темы, сохраняет и применяет его."""
         if mode in ["light", "dark", "auto"]:
             if self.theme_mode != mode:
-                print(f"Setting theme mode to: {mode}")
-                self.theme_mode = mode
-                self.save_config()
+                log.info("Setting theme mode to: %s", mode)
+                self.apply_change({'op': 'set', 'key': 'theme_mode', 'value': mode})
                 self.apply_theme() # Apply the newly set theme mode
         else:
-            print(f"Warning: Invalid theme mode provided: {mode}")
+            log.warning("Invalid theme mode provided: %s", mode)
+
+    def export_latency_report(self, path):
+        """Сохраняет замеры задержек вставки и буфера обмена и последние сообщения журнала в JSON."""
+        recent_log = self.log_service.recent_lines() if self.log_service is not None else []
+        try:
+            self.latency_tracer.export_json(path, extra={'clipboard_timing': self.paste_worker.timing.metrics(),
+                                                         'startup': self.startup.marks,
+                                                         'log': recent_log})
+            log.info("Задержки вставки сохранены в %s", path)
+        except Exception as e:
+            QMessageBox.warning(self, "Ошибка экспорта", f"Не удалось сохранить файл: {str(e)}")
+
+    def set_rotation_strategy(self, strategy):
+        """Устанавливает порядок выбора текстов при ротации и сохраняет его."""
+        if strategy == self.rotation_strategy:
+            return
+        # Неизвестное имя хранилище заменяет на 'round_robin'
+        self.apply_change({'op': 'set', 'key': 'rotation_strategy', 'value': strategy})
 
     def check_for_updates(self, silent=False):
         """
         Проверяет наличие обновлений на GitHub (или сервере), скачивает .msi если есть, и запускает установку.
         Показывает релиз-ноты и прогресс загрузки. После скачивания .msi предлагает закрыть программу и установить обновление.
         """
+        from utils.updater import Updater # Сетевой стек нужен только здесь
         updater = Updater(
             current_version=__version__,
             github_api_url=GITHUB_API_URL,
@@ -1907,7 +1698,7 @@ class TextRotator(ResizableFramelessWindow):
         except Exception as e:
             if not silent:
                 QMessageBox.critical(self, "Ошибка обновления", f"Произошла ошибка при проверке обновлений: {str(e)}")
-            print(f"Update check error: {e}")
+            log.error("Update check error: %s", e)
             if hasattr(self, 'status_label'):
                 self.status_label.setText("Ошибка проверки обновлений")
         finally:
@@ -1924,7 +1715,7 @@ class TextRotator(ResizableFramelessWindow):
                 try:
                     updater.cleanup_temp_files()
                 except Exception as e:
-                    print(f"Ошибка при очистке временных файлов: {e}")
+                    log.error("Ошибка при очистке временных файлов: %s", e)
                 
                 return
             
@@ -1956,7 +1747,7 @@ class TextRotator(ResizableFramelessWindow):
                 try:
                     updater.cleanup_temp_files()
                 except Exception as e:
-                    print(f"Ошибка при очистке временных файлов: {e}")
+                    log.error("Ошибка при очистке временных файлов: %s", e)
             else:
                 QMessageBox.information(
                     self, 
@@ -1967,7 +1758,7 @@ class TextRotator(ResizableFramelessWindow):
                 self.close_app()
         except Exception as e:
             # Обрабатываем любые непредвиденные ошибки
-            print(f"Критическая ошибка при обработке загрузки обновления: {e}")
+            log.error("Критическая ошибка при обработке загрузки обновления: %s", e)
             
             QMessageBox.critical(
                 self, 
@@ -1981,12 +1772,23 @@ class TextRotator(ResizableFramelessWindow):
             except Exception:
                 pass
 
+    def is_auto_start_enabled(self):
+        """Есть ли запись автозапуска в реестре (вне Windows всегда False)."""
+        try:
+            import winreg
+            key_path = r"Software\Microsoft\Windows\CurrentVersion\Run"
+            with winreg.OpenKey(winreg.HKEY_CURRENT_USER, key_path, 0, winreg.KEY_READ) as key:
+                winreg.QueryValueEx(key, "TextRotator")
+            return True
+        except (ImportError, OSError):
+            return False
+
     def setup_auto_start(self, enable=True):
         """Настраивает автозапуск приложения."""
         app_name = "TextRotator"
         try:
             if getattr(sys, 'frozen', False):
-                app_path = sys.executable
+                app_path = f'"{sys.executable}" --tray' # Из автозагрузки - сразу в трей с включёнными клавишами
             else:
                 # Для .py файлов автозапуск через реестр напрямую может быть не лучшим решением.
                 # Обычно создают .bat или ярлык, или используют планировщик задач.
@@ -1994,31 +1796,32 @@ class TextRotator(ResizableFramelessWindow):
                 # Попытка создать путь для pythonw.exe + script
                 script_path = os.path.abspath(sys.argv[0])
                 python_exe_path = sys.executable.replace("python.exe", "pythonw.exe") # Используем pythonw для скрытия консоли
-                app_path = f'"{python_exe_path}" "{script_path}"'
-                print(f"[INFO] Пытаемся настроить автозапуск для скрипта: {app_path}")
+                app_path = f'"{python_exe_path}" "{script_path}" --tray'
+                log.info("Пытаемся настроить автозапуск для скрипта: %s", app_path)
                 # QMessageBox.information(self, "Автозапуск",
                 #                         "Автозапуск для .py скриптов может потребовать ручной настройки или планировщика задач для надежности.")
                 # return
 
+            import winreg
             key_path = r"Software\Microsoft\Windows\CurrentVersion\Run"
             key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, key_path, 0, winreg.KEY_ALL_ACCESS)
             
             if enable:
                 winreg.SetValueEx(key, app_name, 0, winreg.REG_SZ, app_path)
-                print(f"Автозапуск для '{app_name}' включен: {app_path}")
+                log.info("Автозапуск для '%s' включен: %s", app_name, app_path)
             else:
                 try:
                     winreg.DeleteValue(key, app_name)
-                    print(f"Автозапуск для '{app_name}' отключен.")
+                    log.info("Автозапуск для '%s' отключен.", app_name)
                 except FileNotFoundError:
-                    print(f"Запись автозапуска для '{app_name}' не найдена.")
+                    log.warning("Запись автозапуска для '%s' не найдена.", app_name)
             winreg.CloseKey(key)
 
         except ImportError:
-            print("Модуль 'winreg' не найден. Автозапуск доступен только для Windows.")
+            log.warning("Модуль 'winreg' не найден. Автозапуск доступен только для Windows.")
             # QMessageBox.warning(self, "Ошибка автозапуска", "Автозапуск доступен только для Windows.")
         except Exception as e:
-            print(f"Ошибка при настройке автозапуска: {e}")
+            log.error("Ошибка при настройке автозапуска: %s", e)
             # QMessageBox.warning(self, "Ошибка автозапуска", f"Не удалось настроить автозапуск: {e}")
 
 if __name__ == "__main__":
@@ -2032,8 +1835,8 @@ if __name__ == "__main__":
     if os.path.exists(app_icon_path):
         app.setWindowIcon(QIcon(app_icon_path))
     else:
-        print(f"Warning: Application icon not found at {app_icon_path}")
+        log.warning("Application icon not found at %s", app_icon_path)
         
     app.setQuitOnLastWindowClosed(False)
-    window = TextRotator()
+    window = TextRotator(start_in_tray="--tray" in sys.argv)
     sys.exit(app.exec_())
\ No newline at end of file
@@ -1,24 +1,31 @@
 from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, 
-                             QLineEdit, QPushButton, QListWidget, QMessageBox,
-                             QInputDialog)
-from PyQt5.QtCore import Qt, pyqtSignal
-from PyQt5.QtGui import QIcon
-from utils.resource_path import resource_path
-import os
+                             QLineEdit, QPushButton, QListView, QMessageBox,
+                             QInputDialog, QAbstractItemView)
+from PyQt5.QtCore import pyqtSignal
+from ui.icons import themed_icon
+from ui.theme import theme_name
 
 class FolderEditDialog(QDialog):
-    """Диалог для редактирования содержимого папки."""
+    """Диалог для редактирования содержимого папки.
+
+    Папка показывается из общей модели (SnippetTreeModel). Сам диалог данные
+    не меняет: каждая правка запрашивается сигналом, владелец применяет её
+    через модель, и список обновляется по изменённым строкам."""
     # Сигнал, который будет отправлен при переименовании папки
     folder_renamed = pyqtSignal(str) 
+    # Операция журнала над элементом папки; path отсчитывается от самой папки
+    item_changed = pyqtSignal(dict)
     
-    def __init__(self, folder_data, parent=None):
+    def __init__(self, model, folder_index, parent=None):
         super(FolderEditDialog, self).__init__(parent)
-        # Принимаем весь словарь папки
-        self.folder_data = folder_data 
+        self.model = model
+        self.folder_index = folder_index
+        # Папка (узел Folder) из модели
+        self.folder_data = model.item(folder_index)
         # Получаем ссылку на список элементов для удобства
-        self.folder_items = self.folder_data.setdefault('items', []) 
+        self.folder_items = self.folder_data.items
         # Получаем текущее имя
-        self.folder_name = self.folder_data.get('name', 'Безымянная папка') 
+        self.folder_name = self.folder_data.title
         
         # Получаем тему из родительского окна
         self.is_dark_theme = False
@@ -48,19 +55,23 @@ class FolderEditDialog(QDialog):
         list_label = QLabel("Тексты в папке:")
         main_layout.addWidget(list_label)
 
-        self.list_widget = QListWidget()
-        self.list_widget.itemDoubleClicked.connect(self.edit_item)
-        self.update_list_widget()
+        self.list_widget = QListView()
+        self.list_widget.setModel(self.model)
+        self.list_widget.setRootIndex(self.folder_index)
+        self.list_widget.setUniformItemSizes(True)
+        self.list_widget.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.list_widget.doubleClicked.connect(self.edit_item)
         main_layout.addWidget(self.list_widget)
 
         # Кнопки управления списком
         buttons_layout = QHBoxLayout()
         
-        # Используем иконки с учетом темы
-        add_icon = self.get_themed_icon("add.svg")
-        delete_icon = self.get_themed_icon("delete.svg")
-        move_up_icon = self.get_themed_icon("move_up.svg")
-        move_down_icon = self.get_themed_icon("move_down.svg")
+        # Используем иконки с учетом темы (из общего кэша)
+        theme = theme_name(self.is_dark_theme)
+        add_icon = themed_icon("add", theme)
+        delete_icon = themed_icon("delete", theme)
+        move_up_icon = themed_icon("move_up", theme)
+        move_down_icon = themed_icon("move_down", theme)
         
         add_button = QPushButton()
         add_button.setIcon(add_icon)
@@ -90,27 +101,6 @@ class FolderEditDialog(QDialog):
         
         main_layout.addLayout(buttons_layout)
 
-    def get_themed_icon(self, icon_name):
-        """Загружает SVG иконку с учетом текущей темы.
-        Для темной темы добавляет суффикс _d к имени файла."""
-        # Извлекаем только базовое имя файла без пути
-        base_name = os.path.basename(icon_name).replace('.svg', '')
-        
-        if self.is_dark_theme:
-            # Для темной темы пытаемся загрузить версию с суффиксом _d
-            icon_path = resource_path(f"assets/{base_name}_d.svg")
-            # Проверяем существование файла
-            if os.path.exists(icon_path):
-                return QIcon(icon_path)
-            else:
-                # Если нет темной версии, используем обычную
-                icon_path = resource_path(f"assets/{base_name}.svg")
-                return QIcon(icon_path)
-        else:
-            # Для светлой темы просто загружаем обычную версию
-            icon_path = resource_path(f"assets/{base_name}.svg")
-            return QIcon(icon_path)
-
     def rename_folder(self):
         new_name = self.name_edit.text().strip()
         if not new_name:
@@ -120,76 +110,61 @@ class FolderEditDialog(QDialog):
             
         if new_name != self.folder_name:
             # TODO: Проверка на уникальность имени (если нужно) в основном окне
-            # Обновляем имя в словаре, переданном по ссылке
-            self.folder_data['name'] = new_name
             self.folder_name = new_name # Обновляем локальное имя
             self.setWindowTitle(f"Редактирование папки: {self.folder_name}")
             QMessageBox.information(self, "Успех", "Папка переименована.")
-            # Оповещаем родительское окно, что имя изменилось
+            # Родительское окно переименует папку в модели
             self.folder_renamed.emit(new_name) 
 
-    def update_list_widget(self):
-        self.list_widget.clear()
-        # Отображаем только строки, т.к. в папках пока только текст
-        for item in self.folder_items:
-             if isinstance(item, str):
-                preview = item.replace('\n', ' ')[:80] + ('...' if len(item.replace('\n', ' ')) > 80 else '')
-                self.list_widget.addItem(preview)
-             # Сюда можно добавить обработку вложенных папок, если потребуется
+    def current_row(self):
+        index = self.list_widget.currentIndex()
+        return index.row() if index.isValid() else -1
 
     def add_item(self):
         new_text, ok = QInputDialog.getMultiLineText(
             self, "Добавление текста", f"Введите текст для добавления в папку '{self.folder_name}':", ""
         )
         if ok and new_text.strip():
-            # Напрямую модифицируем список, переданный из TextRotator
-            self.folder_items.append(new_text.strip())
-            self.update_list_widget()
-            # Сохранение будет вызвано в TextRotator после закрытия диалога
+            self.item_changed.emit({'op': 'add', 'path': [len(self.folder_items)], 'value': new_text.strip()})
         elif ok and not new_text.strip():
             QMessageBox.warning(self, "Предупреждение", "Текст не может быть пустым!")
 
-    def edit_item(self, item_widget):
-        current_row = self.list_widget.row(item_widget)
+    def edit_item(self, index):
+        current_row = index.row()
         if 0 <= current_row < len(self.folder_items):
-            # Убедимся, что редактируем строку
-            if isinstance(self.folder_items[current_row], str):
-                current_text = self.folder_items[current_row]
+            # Убедимся, что редактируем текст
+            if not self.folder_items[current_row].is_folder:
+                current_text = self.folder_items[current_row].text
                 new_text, ok = QInputDialog.getMultiLineText(
                     self, "Редактирование текста", "Отредактируйте текст:", current_text
                 )
                 if ok and new_text.strip():
-                    self.folder_items[current_row] = new_text.strip()
-                    self.update_list_widget()
+                    self.item_changed.emit({'op': 'edit', 'path': [current_row], 'value': new_text.strip()})
                 elif ok and not new_text.strip():
                      QMessageBox.warning(self, "Предупреждение", "Текст не может быть пустым!")
             # Сюда можно добавить логику для редактирования вложенных папок
 
     def delete_item(self):
-        current_row = self.list_widget.currentRow()
+        current_row = self.current_row()
         if 0 <= current_row < len(self.folder_items):
-            if isinstance(self.folder_items[current_row], str):
-                item_description = f"текст " + self.folder_items[current_row][:30] + ("..." if len(self.folder_items[current_row]) > 30 else "")
+            if not self.folder_items[current_row].is_folder:
+                text = self.folder_items[current_row].text
+                item_description = f"текст " + text[:30] + ("..." if len(text) > 30 else "")
                 reply = QMessageBox.question(self, 'Подтверждение',
                                            f"Вы уверены, что хотите удалить {item_description} из папки '{self.folder_name}'?",
                                            QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
                 if reply == QMessageBox.Yes:
-                    del self.folder_items[current_row]
-                    self.update_list_widget()
+                    self.item_changed.emit({'op': 'delete', 'path': [current_row]})
             # Добавить логику для удаления вложенных папок
         else:
             QMessageBox.warning(self, "Предупреждение", "Выберите текст для удаления!")
 
     def move_item_up(self):
-        current_row = self.list_widget.currentRow()
+        current_row = self.current_row()
         if current_row > 0:
-            self.folder_items.insert(current_row - 1, self.folder_items.pop(current_row))
-            self.update_list_widget()
-            self.list_widget.setCurrentRow(current_row - 1)
+            self.item_changed.emit({'op': 'move', 'path': [current_row], 'to': current_row - 1})
 
     def move_item_down(self):
-        current_row = self.list_widget.currentRow()
+        current_row = self.current_row()
         if 0 <= current_row < len(self.folder_items) - 1:
-            self.folder_items.insert(current_row + 1, self.folder_items.pop(current_row))
-            self.update_list_widget()
-            self.list_widget.setCurrentRow(current_row + 1) 
\ No newline at end of file
+            self.item_changed.emit({'op': 'move', 'path': [current_row], 'to': current_row + 1}) 
\ No newline at end of file
@@ -0,0 +1,62 @@
+"""Иконки с учётом темы.
+
+Для тёмной темы берётся вариант с суффиксом _d (assets/add_d.svg), если он
+есть. Путь к варианту определяется один раз, а на пару (имя, тема)
+создаётся один QIcon из SVG, который кнопки получают из кэша. Растр Qt
+строит сам для запрошенного размера и плотности пикселей экрана (и кэширует
+его), поэтому иконки не размываются на HiDPI и при нестандартном iconSize.
+"""
+import logging
+import os
+from functools import lru_cache
+
+from PyQt5 import sip
+from PyQt5.QtGui import QIcon
+
+from utils.resource_path import resource_path
+
+log = logging.getLogger(__name__)
+
+def _base_name(name):
+    """'add.svg' и 'assets/add.svg' -> 'add'."""
+    return os.path.splitext(os.path.basename(name))[0]
+
+
+@lru_cache(maxsize=None)
+def icon_path(name, theme):
+    """Путь к SVG для темы; без тёмного варианта - обычный."""
+    base_name = _base_name(name)
+    if theme == 'dark':
+        path = resource_path(f"assets/{base_name}_d.svg")
+        if os.path.exists(path):
+            return path
+        log.debug("Тёмная иконка %s не найдена, используется стандартная", base_name)
+    return resource_path(f"assets/{base_name}.svg")
+
+
+@lru_cache(maxsize=None)
+def themed_icon(name, theme):
+    """QIcon из SVG темы: повторные вызовы не читают и не разбирают файл заново."""
+    return QIcon(icon_path(name, theme))
+
+
+class IconBindings:
+    """Кнопки окна и имена их иконок. При смене темы иконки переставляются
+    по этому списку, без поиска кнопок по дереву виджетов."""
+
+    def __init__(self, theme='light'):
+        self.theme = theme
+        self.bindings = [] # (кнопка, имя иконки)
+
+    def bind(self, button, name):
+        self.bindings.append((button, name))
+        button.setIcon(themed_icon(name, self.theme))
+
+    def set_theme(self, theme):
+        if theme == self.theme:
+            return
+        self.theme = theme
+        # Кнопки удалённых окон пропускаем и забываем
+        self.bindings = [binding for binding in self.bindings if not sip.isdeleted(binding[0])]
+        for button, name in self.bindings:
+            button.setIcon(themed_icon(name, theme))
@@ -1,8 +1,17 @@
-from PyQt5 import QtWidgets, QtCore, QtGui
+import logging
+from PyQt5 import QtCore
 from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QLabel, QHBoxLayout, 
-                             QPushButton, QButtonGroup, QWidget, QMessageBox)
-from PyQt5.QtCore import Qt, QPropertyAnimation, QEasingCurve, pyqtProperty, QRect
-from PyQt5.QtGui import QColor
+                             QPushButton, QButtonGroup, QWidget, QMessageBox, QComboBox,
+                             QFileDialog, QCheckBox)
+from PyQt5.QtCore import Qt, QPropertyAnimation, QEasingCurve
+from PyQt5.QtGui import QColor, QFontDatabase
+import os
+import sys
+
+from models.rotation_strategies import STRATEGY_TITLES
+from ui.theme import apply_stylesheet, stylesheet, theme_name
+
+log = logging.getLogger(__name__)
 
 # We no longer need MacOSToggleSwitch here
 # try:
@@ -91,6 +100,41 @@ class SettingsDialog(QDialog):
         theme_control_layout.addWidget(self.theme_button_group_widget)
         self.layout.addLayout(theme_control_layout)
 
+        # --- Порядок ротации ---
+        strategy_layout = QHBoxLayout()
+        strategy_label = QLabel("Порядок ротации:")
+        self.strategy_combo = QComboBox()
+        for strategy, title in STRATEGY_TITLES.items():
+            self.strategy_combo.addItem(title, strategy)
+        self.strategy_combo.currentIndexChanged.connect(self.strategy_changed)
+        strategy_layout.addWidget(strategy_label)
+        strategy_layout.addStretch()
+        strategy_layout.addWidget(self.strategy_combo)
+        self.layout.addLayout(strategy_layout)
+
+        # --- Автозапуск (запись в реестре с ключом --tray) ---
+        self.auto_start_check = QCheckBox("Запускать при входе в Windows (в трее)")
+        self.auto_start_check.toggled.connect(self.auto_start_toggled)
+        self.layout.addWidget(self.auto_start_check)
+
+        # --- Задержки от горячей клавиши до вставки ---
+        latency_title = QLabel("Задержки вставки (мс):")
+        latency_title.setToolTip("Экспорт сохраняет и последние сообщения журнала")
+        self.layout.addWidget(latency_title)
+        self.latency_label = QLabel()
+        self.latency_label.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        self.latency_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        self.layout.addWidget(self.latency_label)
+        latency_buttons = QHBoxLayout()
+        refresh_latency_button = QPushButton("Обновить")
+        refresh_latency_button.clicked.connect(self.update_latency_view)
+        export_latency_button = QPushButton("Экспорт JSON…")
+        export_latency_button.clicked.connect(self.export_latency_clicked)
+        latency_buttons.addWidget(refresh_latency_button)
+        latency_buttons.addWidget(export_latency_button)
+        latency_buttons.addStretch()
+        self.layout.addLayout(latency_buttons)
+
         self.layout.addStretch()
 
         # --- Check for Updates Button ---
@@ -105,103 +149,59 @@ class SettingsDialog(QDialog):
 
     def apply_initial_styles_and_position(self):
         """Called shortly after init to ensure parent styles are applied first."""
-        self.apply_parent_style() # Applies base + segmented style
+        self.apply_parent_style()
         self.update_indicator_position(animate=False) # Set initial position
 
-    def apply_segmented_control_style(self):
-        """Applies CSS styles for the container, indicator, and buttons."""
-        is_dark = self.parent_window.is_dark_theme if self.parent_window else False
-
-        # Define colors
-        container_border_color = "#505050" if is_dark else "#C6C6C8"
-        button_text_color = "#E0E0E0" if is_dark else "#333333"
-        button_hover_bg = "rgba(128, 128, 128, 0.1)" if is_dark else "rgba(128, 128, 128, 0.1)" # Subtle hover
-        indicator_bg = "#34C759" # App green
-        checked_text_color = "#FFFFFF"
-
-        # Define size adjustments
-        font_size = "12px"
-        button_padding = "3px 10px"
-        container_radius = "7px"
-        indicator_radius = "6px" # Slightly smaller radius for the indicator
-
-        style = f"""
-            /* Container Style */
-            QWidget#themeSegmentedControlContainer {{
-                background-color: transparent;
-                border: 1px solid {container_border_color};
-                border-radius: {container_radius};
-                /* Height is set programmatically */
-            }}
-
-            /* Indicator Style */
-            QWidget#themeIndicator {{
-                background-color: {indicator_bg};
-                border-radius: {indicator_radius};
-            }}
-
-            /* Button Style */
-            QWidget#themeSegmentedControlContainer QPushButton#themeSegmentButton {{
-                background-color: transparent; /* IMPORTANT: Buttons must be transparent */
-                color: {button_text_color};
-                border: none;
-                padding: {button_padding};
-                font-size: {font_size};
-                font-weight: 500;
-                /* Height is set programmatically */
-            }}
-
-            /* Vertical separators (drawn as button borders) */
-            QWidget#themeSegmentedControlContainer QPushButton#themeSegmentButton:not(:first-child) {{
-                 border-left: 1px solid {container_border_color};
-            }}
-            
-            /* Hover effect for non-checked buttons */
-            QWidget#themeSegmentedControlContainer QPushButton#themeSegmentButton:!checked:hover {{
-                background-color: {button_hover_bg};
-                /* Apply border radius on hover to match indicator */
-                border-radius: {indicator_radius};
-            }}
-            
-            /* Text color for the checked button */
-            QWidget#themeSegmentedControlContainer QPushButton#themeSegmentButton:checked {{
-                color: {checked_text_color};
-                background-color: transparent; /* Checked button still transparent */
-                font-weight: 600; /* Bolder when selected */
-            }}
-        """
-        # Append to existing styles from parent (ensure no duplicates)
-        current_style = self.styleSheet()
-        # Simple strategy: Remove old style section if present, then append new one
-        # A more robust approach would parse the CSS, but this is often sufficient
-        start_marker = "/* Container Style */"
-        style_to_set = current_style
-        try:
-            index = current_style.index(start_marker)
-            style_to_set = current_style[:index]
-        except ValueError:
-            pass # Marker not found, just append
-            
-        self.setStyleSheet(style_to_set + style)
-
     def theme_button_clicked(self, button):
         """Handles theme selection and updates indicator position."""
         selected_mode = self.theme_map.get(button)
         if selected_mode and self.parent_window:
-             print(f"SettingsDialog: Theme button '{button.text()}' clicked (mode: {selected_mode})")
+             log.debug("SettingsDialog: Theme button '%s' clicked (mode: %s)", button.text(), selected_mode)
              self.parent_window.set_theme_mode(selected_mode)
              # Parent applies theme, we just need to update our indicator position
              self.update_indicator_position(animate=True) 
 
+    def strategy_changed(self, index):
+        strategy = self.strategy_combo.itemData(index)
+        if strategy and self.parent_window:
+            self.parent_window.set_rotation_strategy(strategy)
+
+    def auto_start_toggled(self, checked):
+        if self.parent_window:
+            self.parent_window.setup_auto_start(checked)
+
+    def update_latency_view(self):
+        """Показывает перцентили задержек по стадиям из LatencyTracer главного окна."""
+        tracer = getattr(self.parent_window, 'latency_tracer', None)
+        if tracer is None:
+            self.latency_label.setText("Нет данных")
+            return
+
+        def cell(value):
+            return f"{value:>8.1f}" if value is not None else f"{'-':>8}"
+
+        lines = [f"{'стадия':<12}{'n':>6}{'p50':>8}{'p95':>8}{'p99':>8}"]
+        for stage, stats in tracer.summary().items():
+            lines.append(f"{stage:<12}{stats['count']:>6}"
+                         f"{cell(stats['p50_ms'])}{cell(stats['p95_ms'])}{cell(stats['p99_ms'])}")
+        self.latency_label.setText("\n".join(lines))
+
+    def export_latency_clicked(self):
+        default_path = os.path.join(os.path.expanduser("~"), "text_rotator_latency.json")
+        path, _ = QFileDialog.getSaveFileName(self, "Экспорт задержек и журнала", default_path, "JSON (*.json)")
+        if path and self.parent_window and hasattr(self.parent_window, 'export_latency_report'):
+            self.parent_window.export_latency_report(path)
+
     def apply_parent_style(self):
-         """Applies parent style and then segmented control style."""
-         if self.parent_window and hasattr(self.parent_window, 'styleSheet'):
-             base_style = self.parent_window.styleSheet()
-             self.setStyleSheet(base_style)
-             # Re-apply/update segmented control styles
-             self.apply_segmented_control_style()
-             # Indicator position updated separately
-             
+        """Стили диалога и сегментного переключателя входят в общую таблицу
+        главного окна (ui/theme.py) и наследуются от него. Без такого родителя
+        диалог ставит себе базовые стили и стили переключателя сам."""
+        if hasattr(self.parent_window, 'applied_theme'):
+            apply_stylesheet(self, "")
+            return
+        theme = theme_name(self.parent_window.is_dark_theme if self.parent_window else False)
+        apply_stylesheet(self, stylesheet(theme, 'window') + stylesheet(theme, 'segmented_control'))
+
     def update_indicator_position(self, animate=True):
         """Moves the indicator widget to the position of the checked button."""
         checked_button = self.theme_button_group.checkedButton()
@@ -245,6 +245,18 @@ class SettingsDialog(QDialog):
                 button_to_check.setChecked(True)
                 button_to_check.blockSignals(False)
 
+            strategy_index = self.strategy_combo.findData(getattr(self.parent_window, 'rotation_strategy', 'round_robin'))
+            self.strategy_combo.blockSignals(True)
+            self.strategy_combo.setCurrentIndex(max(strategy_index, 0))
+            self.strategy_combo.blockSignals(False)
+
+            self.auto_start_check.blockSignals(True)
+            self.auto_start_check.setChecked(self.parent_window.is_auto_start_enabled())
+            self.auto_start_check.setEnabled(sys.platform == 'win32')
+            self.auto_start_check.blockSignals(False)
+
+            self.update_latency_view()
+
             # Apply styles and update indicator position *after* checking the right button
             # Use QTimer to ensure layout is settled before getting geometry
             QtCore.QTimer.singleShot(0, lambda: self.update_indicator_position(animate=False))
@@ -262,7 +274,7 @@ class SettingsDialog(QDialog):
     def check_for_updates_clicked(self):
         """Handles the click on the 'Check for Updates' button."""
         if self.parent_window and hasattr(self.parent_window, 'check_for_updates'):
-            print("SettingsDialog: 'Check for Updates' clicked, calling parent method...")
+            log.debug("SettingsDialog: 'Check for Updates' clicked, calling parent method...")
             # Disable button temporarily to avoid multiple clicks
             self.update_button.setEnabled(False)
             self.update_button.setText("Проверка...")
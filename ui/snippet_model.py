@@ -0,0 +1,179 @@
+from PyQt5.QtCore import Qt, QAbstractItemModel, QModelIndex
+from PyQt5.QtWidgets import QStyledItemDelegate
+
+from models.change_bus import NodeInserted, NodeMoved, NodeRemoved, NodeUpdated, TreeReset
+from models.snippet_tree import PROFILES
+
+# Роли данных элемента
+TEXT_ROLE = Qt.UserRole # Полный текст (для папки - None)
+TYPE_ROLE = Qt.UserRole + 1 # 'text', 'folder' или 'profile'
+SPANS_ROLE = Qt.UserRole + 3 # Отрезки подсветки в отображаемом тексте (результаты поиска)
+RESULT_ROLE = Qt.UserRole + 4 # Номер результата поиска
+
+
+class _Profiles:
+    """Невидимый корень модели: его строки - профили."""
+    __slots__ = ()
+    items = PROFILES
+
+
+class SnippetTreeModel(QAbstractItemModel):
+    """Общая модель дерева текстов обоих профилей (SnippetTree).
+
+    Верхний уровень - профили 'rotation' и 'popup', под ними тексты и папки.
+    Представления показывают нужную ветку через setRootIndex: главное окно -
+    активный профиль, окно выбора - профиль popup, диалог папки - саму папку.
+    Превью текста строится в data() только для видимых строк.
+
+    Внутренний указатель индекса - папка (узел Folder), в которой лежит
+    элемент, поэтому родитель индекса находится по ссылке parent узла.
+
+    Модель подписана на шину изменений дерева (models/change_bus.py) и
+    сообщает представлениям о конкретных вставленных, удалённых,
+    перемещённых или изменённых строках вместо полной перестройки списков.
+    """
+
+    PREVIEW_LENGTH = 80
+
+    def __init__(self, tree, parent=None):
+        super(SnippetTreeModel, self).__init__(parent)
+        self._top = _Profiles()
+        self._tree = tree
+        tree.bus.subscribe(self._before_change, TreeReset, NodeInserted, NodeRemoved, NodeMoved, before=True)
+        tree.bus.subscribe(self._after_change, TreeReset, NodeInserted, NodeRemoved, NodeMoved, NodeUpdated)
+
+    def profile_items(self, profile):
+        """Узлы верхнего уровня профиля (тот же список, что в дереве)."""
+        return self._tree.roots[profile].items
+
+    def profile_index(self, profile):
+        return self.createIndex(PROFILES.index(profile), 0, self._top)
+
+    def item(self, index):
+        """Узел (Snippet или Folder) по индексу."""
+        folder = index.internalPointer()
+        if folder is self._top:
+            return None
+        return folder.items[index.row()]
+
+    def index_of(self, node):
+        """Индекс узла дерева."""
+        if node.parent is None:
+            return self.profile_index(node.name)
+        return self.createIndex(node.row, 0, node.parent)
+
+    def path_of(self, index):
+        """(profile, path) элемента - адрес в формате операций журнала."""
+        path = [index.row()]
+        folder = index.internalPointer()
+        while folder.parent is not None:
+            path.append(folder.row)
+            folder = folder.parent
+        path.reverse()
+        return folder.name, path
+
+    # --- QAbstractItemModel ---
+
+    def index(self, row, column, parent=QModelIndex()):
+        folder = self._child_folder(parent)
+        if folder is None or column != 0 or not 0 <= row < len(folder.items):
+            return QModelIndex()
+        return self.createIndex(row, column, folder)
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        folder = index.internalPointer()
+        if folder is self._top:
+            return QModelIndex()
+        return self.index_of(folder)
+
+    def rowCount(self, parent=QModelIndex()):
+        folder = self._child_folder(parent)
+        return len(folder.items) if folder is not None else 0
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QModelIndex()):
+        return self.rowCount(parent) > 0
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        folder = index.internalPointer()
+        if folder is self._top:
+            if role == Qt.DisplayRole:
+                return PROFILES[index.row()]
+            return 'profile' if role == TYPE_ROLE else None
+        node = folder.items[index.row()]
+        is_text = not node.is_folder
+        if role == Qt.DisplayRole:
+            if is_text:
+                preview = node.text.replace('\n', ' ')
+                return preview[:self.PREVIEW_LENGTH] + '...' if len(preview) > self.PREVIEW_LENGTH else preview
+            return f"📁 {node.title}"
+        if role == TEXT_ROLE:
+            return node.text if is_text else None
+        if role == TYPE_ROLE:
+            return 'text' if is_text else 'folder'
+        return None
+
+    # --- Правки (события шины) ---
+
+    def _before_change(self, event):
+        if isinstance(event, TreeReset):
+            self.beginResetModel()
+            return
+        parent = self.index_of(event.folder)
+        row = event.row
+        if isinstance(event, NodeInserted):
+            self.beginInsertRows(parent, row, row)
+        elif isinstance(event, NodeRemoved):
+            self.beginRemoveRows(parent, row, row)
+        else:
+            # Qt ждёт позицию вставки до удаления исходной строки
+            self.beginMoveRows(parent, row, row, parent, event.to + 1 if event.to > row else event.to)
+
+    def _after_change(self, event):
+        if isinstance(event, TreeReset):
+            self.endResetModel()
+        elif isinstance(event, NodeInserted):
+            self.endInsertRows()
+        elif isinstance(event, NodeRemoved):
+            self.endRemoveRows()
+        elif isinstance(event, NodeMoved):
+            self.endMoveRows()
+        else:
+            index = self.createIndex(event.row, 0, event.folder)
+            self.dataChanged.emit(index, index)
+
+    # --- Служебное ---
+
+    def _child_folder(self, parent):
+        """Папка с детьми индекса parent (None, если у элемента нет детей)."""
+        if not parent.isValid():
+            return self._top
+        folder = parent.internalPointer()
+        if folder is self._top:
+            return self._tree.roots[PROFILES[parent.row()]]
+        node = folder.items[parent.row()]
+        return node if node.is_folder else None
+
+
+class NumberedItemDelegate(QStyledItemDelegate):
+    """Добавляет к тексту строки её номер ("1. ...") - для списка ротации."""
+
+    def __init__(self, parent=None):
+        super(NumberedItemDelegate, self).__init__(parent)
+        self.enabled = False
+
+    def initStyleOption(self, option, index):
+        super(NumberedItemDelegate, self).initStyleOption(option, index)
+        if self.enabled and index.data(TYPE_ROLE) == 'text':
+            option.text = f"{index.row() + 1}. {option.text}"
@@ -1,11 +1,21 @@
+import logging
+import html
 import time
-from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QListWidget, QApplication, 
-                             QListWidgetItem, QGraphicsDropShadowEffect) # Removed QPushButton, QInputDialog
-from PyQt5.QtCore import Qt, QPoint, QEvent, QPropertyAnimation, QEasingCurve, QRect # Добавили для анимации
-from PyQt5.QtGui import QCursor, QColor # Добавили QColor для тени
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QListView, QApplication, QPushButton,
+                             QGraphicsDropShadowEffect, QLineEdit, QAbstractItemView,
+                             QStyledItemDelegate, QStyleOptionViewItem, QStyle) # Removed QInputDialog
+from PyQt5.QtCore import (Qt, QEvent, QPropertyAnimation, QEasingCurve, QRect, # Добавили для анимации
+                          QModelIndex, QPersistentModelIndex)
+from PyQt5.QtGui import (QCursor, QColor, QTextDocument, QAbstractTextDocumentLayout, QPalette, # Добавили QColor для тени
+                         QStandardItemModel, QStandardItem)
 
 import sys
-import os
+
+from models.search_index import SearchIndex, make_preview
+from ui.snippet_model import TEXT_ROLE, TYPE_ROLE, SPANS_ROLE, RESULT_ROLE
+from ui.theme import apply_stylesheet, stylesheet, theme_name, token
+
+log = logging.getLogger(__name__)
 
 # Импортируем Windows API для размещения окна на переднем плане на уровне системы
 if sys.platform == "win32":
@@ -17,20 +27,83 @@ if sys.platform == "win32":
 else:
     ctypes = None
 
+
+class HighlightDelegate(QStyledItemDelegate):
+    """Рисует элемент как обычно, но подсвечивает найденные фрагменты текста."""
+
+    def __init__(self, highlight_color, parent=None):
+        super(HighlightDelegate, self).__init__(parent)
+        self.highlight_color = highlight_color
+
+    def paint(self, painter, option, index):
+        spans = index.data(SPANS_ROLE)
+        if not spans:
+            super(HighlightDelegate, self).paint(painter, option, index)
+            return
+        options = QStyleOptionViewItem(option)
+        self.initStyleOption(options, index)
+        text = options.text
+        options.text = ""
+        widget = options.widget
+        style = widget.style() if widget else QApplication.style()
+        # Фон, выделение и рамку рисует стиль, текст - QTextDocument с подсветкой
+        style.drawControl(QStyle.CE_ItemViewItem, options, painter, widget)
+        text_rect = style.subElementRect(QStyle.SE_ItemViewItemText, options, widget)
+
+        parts = []
+        position = 0
+        for start, end in spans:
+            parts.append(html.escape(text[position:start]))
+            parts.append(f'<span style="background-color: {self.highlight_color}; font-weight: 600;">'
+                         f'{html.escape(text[start:end])}</span>')
+            position = end
+        parts.append(html.escape(text[position:]))
+
+        document = QTextDocument()
+        document.setDocumentMargin(0)
+        document.setDefaultFont(options.font)
+        document.setHtml(''.join(parts))
+        context = QAbstractTextDocumentLayout.PaintContext()
+        color_role = QPalette.HighlightedText if options.state & QStyle.State_Selected else QPalette.Text
+        context.palette.setColor(QPalette.Text, options.palette.color(color_role))
+        painter.save()
+        painter.setClipRect(text_rect)
+        painter.translate(text_rect.left(), text_rect.top() + (text_rect.height() - document.size().height()) / 2)
+        document.documentLayout().draw(painter, context)
+        painter.restore()
+
+
 class TextSelectionPopup(QDialog):
-    def __init__(self, data, callback, parent=None):
+    def __init__(self, model, callback, parent=None, search_index=None, tracer=None):
         super(TextSelectionPopup, self).__init__(parent, 
             Qt.WindowType.FramelessWindowHint | 
             Qt.WindowType.Tool |
             Qt.WindowType.WindowStaysOnTopHint)
         
         self.setAttribute(Qt.WA_TranslucentBackground) # Важно для тени и анимации прозрачности
-        self.setAttribute(Qt.WA_DeleteOnClose)
+        # Окно не удаляется при закрытии: TextRotator создаёт его один раз и
+        # показывает повторно, обновляя список только после изменения данных
         
-        self.data = data
+        # Общая модель дерева текстов; окно показывает ветку профиля popup
+        self.model = model
+        self.root_index = QPersistentModelIndex(model.profile_index('popup'))
         self.callback = callback
         self.is_dark_theme = self.detect_dark_theme()
-        self.folder_stack = []
+        self.folder_stack = [] # QPersistentModelIndex открытых папок
+        self.results_model = QStandardItemModel(self) # Результаты поиска (не больше SearchIndex.MAX_RESULTS)
+        self.search_results = []
+        self._dirty = False # Данные менялись, пока окно было скрыто
+        self._show_started = None # Момент нажатия горячей клавиши для замера первой отрисовки
+        self.tracer = tracer # LatencyTracer: время от горячей клавиши до первого кадра
+        # Индекс поиска по всем папкам; обычно общий с TextRotator и обновляется им
+        if search_index is None:
+            search_index = SearchIndex()
+            search_index.rebuild(model.profile_items('popup'))
+        self.search_index = search_index
+        # Правки в модели меняют число строк - пересчитываем размер окна
+        for signal in (model.rowsInserted, model.rowsRemoved, model.rowsMoved):
+            signal.connect(self.mark_dirty)
+        model.modelReset.connect(self.on_model_reset)
         
         self.init_ui()
         self.init_animations() # Инициализируем анимации
@@ -49,7 +122,7 @@ class TextSelectionPopup(QDialog):
                     return is_light_theme == 0
                 return False
             except Exception as e:
-                print(f"Ошибка определения темы для popup: {e}")
+                log.error("Ошибка определения темы для popup: %s", e)
                 return False
         
     def init_ui(self):
@@ -57,75 +130,40 @@ class TextSelectionPopup(QDialog):
         
         # Основной виджет-контейнер, к которому будут применяться стили (фон, граница)
         # Это позволит тени быть за пределами видимой части окна.
-        self.container_widget = QListWidget() # Используем QListWidget как контейнер
+        self.container_widget = QListView() # Используем QListView как контейнер
         self.container_widget.setObjectName("popupContainer") # Для стилизации
         
-        # Применяем стили в зависимости от темы
-        border_radius_val = "8px" # Немного увеличим радиус
-        border_color_light = "rgba(0, 0, 0, 0.1)" # Очень светлая граница для светлой темы
-        border_color_dark = "rgba(255, 255, 255, 0.1)" # Очень светлая граница для темной темы
-
-        # Общие стили для QListWidget (он же контейнер)
-        container_style_sheet = f"""
-            QListWidget#popupContainer {{
-                border: 1px solid {border_color_dark if self.is_dark_theme else border_color_light};
-                border-radius: {border_radius_val};
-                font-family: 'Inter', 'San Francisco', sans-serif; /* Добавим San Francisco как fallback */
-                font-size: 14px;
-                font-weight: 400;
-                padding: 5px; /* Внутренний отступ для элементов списка */
-                background-color: {"#2C2C2E" if self.is_dark_theme else "#F2F2F7"}; /* Типичные цвета фона Apple */
-                color: {"#FFFFFF" if self.is_dark_theme else "#000000"};
-            }}
-            QListWidget#popupContainer::item {{
-                padding: 10px 8px; /* Увеличим вертикальный padding */
-                border-bottom: 1px solid {"#3A3A3C" if self.is_dark_theme else "#E5E5EA"}; /* Более мягкие разделители */
-            }}
-            QListWidget#popupContainer::item:last-child {{
-                border-bottom: none; /* Убираем разделитель у последнего элемента */
-            }}
-            QListWidget#popupContainer::item:selected {{
-                background-color: {"#3A3A3C" if self.is_dark_theme else "#E5E5EA"}; /* Более мягкий цвет выделения */
-                color: {"#FFFFFF" if self.is_dark_theme else "#000000"};
-                border-radius: 4px; /* Небольшое скругление для выделенного элемента */
-            }}
-            QListWidget#popupContainer::item:hover {{
-                background-color: {"#48484A" if self.is_dark_theme else "#DADADE"};
-                border-radius: 4px;
-            }}
-            QListWidget#popupContainer::item[type="folder"] {{ /* Этот селектор может не работать напрямую, лучше через setData */
-                font-weight: 500;
-                color: {"#0A84FF" if not self.is_dark_theme else "#0A84FF"}; /* Apple Blue */
-            }}
-             QScrollBar:vertical {{
-                 border: none;
-                 background: transparent; 
-                 width: 8px;
-                 margin: 0px 0px 0px 0px;
-             }}
-             QScrollBar::handle:vertical {{
-                 background: {"#555555" if self.is_dark_theme else "#CCCCCC"};
-                 min-height: 25px;
-                 border-radius: 4px;
-             }}
-             QScrollBar::handle:vertical:hover {{
-                 background: {"#666666" if self.is_dark_theme else "#BBBBBB"};
-             }}
-             QScrollBar::add-line:vertical, QScrollBar::sub-line:vertical,
-             QScrollBar::up-arrow:vertical, QScrollBar::down-arrow:vertical,
-             QScrollBar::add-page:vertical, QScrollBar::sub-page:vertical {{
-                 border: none; background: none; height: 0px; width: 0px;
-             }}
-        """
-        self.container_widget.setStyleSheet(container_style_sheet)
+        # Поле поиска по всем папкам; фокус всегда в нём, стрелки и Enter
+        # обрабатывает keyPressEvent окна
+        self.search_edit = QLineEdit()
+        self.search_edit.setObjectName("popupSearch")
+        self.search_edit.setPlaceholderText("Поиск...")
+        self.search_edit.textChanged.connect(lambda _text: self.update_text_list())
+        
+        # Возврат из папки к списку папок
+        self.back_button = QPushButton("← Назад к списку папок")
+        self.back_button.setObjectName("popupBack")
+        self.back_button.setFocusPolicy(Qt.NoFocus)
+        self.back_button.clicked.connect(self.go_back)
+        self.back_button.hide()
         
         layout = QVBoxLayout(self) # Главный layout самого QDialog
         layout.setContentsMargins(10, 10, 10, 10) # Отступы для тени!
+        layout.setSpacing(6)
+        layout.addWidget(self.search_edit)
+        layout.addWidget(self.back_button)
         layout.addWidget(self.container_widget)
         
         self.text_list = self.container_widget # Теперь self.text_list это наш контейнер
-        self.update_text_list() # Это вызовет self.text_list.clear() и т.д.
-        self.text_list.itemClicked.connect(self.on_text_selected)
+        self.text_list.setModel(self.model)
+        self.text_list.setUniformItemSizes(True) # Рисуются только видимые строки одинаковой высоты
+        self.text_list.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.text_list.setFocusPolicy(Qt.NoFocus)
+        self.highlight_delegate = HighlightDelegate(token(theme_name(self.is_dark_theme), 'popup_highlight'), self.text_list)
+        self.text_list.setItemDelegate(self.highlight_delegate)
+        self.apply_theme_stylesheet()
+        self.update_text_list() # Показывает ветку профиля popup
+        self.text_list.clicked.connect(self.on_text_selected)
         
         self.text_list.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
         self.text_list.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
@@ -148,44 +186,75 @@ class TextSelectionPopup(QDialog):
         self.shadow.setBlurRadius(15) # Радиус размытия
         self.shadow.setXOffset(0)     # Смещение по X
         self.shadow.setYOffset(2)     # Небольшое смещение по Y для ощущения "приподнятости"
-        shadow_color_alpha = 70 if self.is_dark_theme else 50 # Прозрачность тени
+        shadow_color_alpha = token(theme_name(self.is_dark_theme), 'popup_shadow_alpha') # Прозрачность тени
         self.shadow.setColor(QColor(0, 0, 0, shadow_color_alpha)) 
         self.setGraphicsEffect(self.shadow)
         
+    def apply_theme_stylesheet(self):
+        """Стили окна берутся из общей таблицы главного окна (ui/theme.py).
+        Без такого родителя окно ставит себе только свою часть таблицы."""
+        if hasattr(self.parent(), "applied_theme"):
+            apply_stylesheet(self, "")
+        else:
+            apply_stylesheet(self, stylesheet(theme_name(self.is_dark_theme), 'popup'))
+
+    def set_theme(self, is_dark):
+        """Переключает тему без пересоздания окна."""
+        if is_dark == self.is_dark_theme:
+            return
+        self.is_dark_theme = is_dark
+        theme = theme_name(is_dark)
+        self.highlight_delegate.highlight_color = token(theme, 'popup_highlight')
+        self.shadow.setColor(QColor(0, 0, 0, token(theme, 'popup_shadow_alpha')))
+        self.apply_theme_stylesheet()
+        self.text_list.viewport().update()
+
     def update_text_list(self):
-        self.text_list.clear()
-        # current_items_data = [] # Not strictly needed here anymore
-
-        if not self.folder_stack: # Мы в корневом уровне
-            # В корне отображаем только папки
-            for item_data_obj in self.data: # self.data это данные из TextRotator (data_popup)
-                if isinstance(item_data_obj, dict) and item_data_obj.get('type') == 'folder':
-                    folder_name = item_data_obj.get('name', 'Безымянная папка')
-                    list_item = QListWidgetItem(f"📁 {folder_name}")
-                    list_item.setData(Qt.UserRole, None) # Для папок сам текст не нужен
-                    list_item.setData(Qt.UserRole + 1, 'folder') # Тип
-                    list_item.setData(Qt.UserRole + 2, item_data_obj) # Сам объект папки
-                    self.text_list.addItem(list_item)
-        else: # Мы внутри папки
-            back_item = QListWidgetItem("← Назад к списку папок")
-            back_item.setData(Qt.UserRole, None)
-            back_item.setData(Qt.UserRole + 1, 'back')
-            self.text_list.addItem(back_item)
-            
-            current_folder_obj = self.folder_stack[-1]
-            current_items_data = current_folder_obj.get('items', [])
-            # Внутри папки отображаем только текстовые элементы
-            for item_data_obj in current_items_data:
-                if isinstance(item_data_obj, str): # Это текстовый элемент
-                    preview = item_data_obj.replace('\n', ' ')
-                    preview = preview[:50] + '...' if len(preview) > 50 else preview
-                    list_item = QListWidgetItem(preview)
-                    list_item.setData(Qt.UserRole, item_data_obj) # Оригинальный текст
-                    list_item.setData(Qt.UserRole + 1, 'text') # Тип
-                    self.text_list.addItem(list_item)
+        query = self.search_edit.text().strip()
+        if query: # Идёт поиск - показываем совпадения из всех папок
+            self.show_search_results(query)
+        else:
+            # Корень профиля или открытая папка - ветка общей модели
+            self.set_list_model(self.model)
+            self.folder_stack = [index for index in self.folder_stack if index.isValid()] # Папку могли удалить
+            root = self.folder_stack[-1] if self.folder_stack else self.root_index
+            self.text_list.setRootIndex(QModelIndex(root))
+        self.back_button.setVisible(bool(self.folder_stack) and not query)
         
         self.adjust_popup_size()
 
+    def set_list_model(self, model):
+        if self.text_list.model() is model:
+            return
+        old_selection = self.text_list.selectionModel()
+        self.text_list.setModel(model)
+        old_selection.deleteLater() # setModel не удаляет прежнюю модель выделения
+
+    def show_search_results(self, query):
+        started = time.perf_counter()
+        results = self.search_results = self.search_index.search(query)
+        self.results_model.clear()
+        for row, result in enumerate(results):
+            if result.kind == 'folder':
+                list_item = QStandardItem(f"📁 {result.value.title}")
+                list_item.setData('folder', TYPE_ROLE)
+                list_item.setData([(start + 2, end + 2) for start, end in result.spans], SPANS_ROLE)
+            else:
+                preview, spans = make_preview(result.value.text, result.spans)
+                # Папка, в которой лежит текст, - после превью
+                location = " › ".join(folder.name for folder in result.folders)
+                list_item = QStandardItem(f"{preview}  ·  {location}" if location else preview)
+                list_item.setData(result.value.text, TEXT_ROLE)
+                list_item.setData('text', TYPE_ROLE)
+                list_item.setData(spans, SPANS_ROLE)
+            list_item.setData(row, RESULT_ROLE)
+            list_item.setEditable(False)
+            self.results_model.appendRow(list_item)
+        self.set_list_model(self.results_model)
+        if results:
+            self.text_list.setCurrentIndex(self.results_model.index(0, 0)) # Enter вставляет лучший результат
+        log.debug("Search '%s': %s results in %.1f ms", query, len(results), (time.perf_counter() - started) * 1000)
+
     def adjust_popup_size(self):
         screen = QApplication.primaryScreen()
         screen_height = screen.availableGeometry().height() # Используем availableGeometry
@@ -196,7 +265,8 @@ class TextSelectionPopup(QDialog):
         # Оценка высоты одного элемента (включая padding)
         # Если список пуст, берем дефолтное значение
         item_height_estimate = 40 # (10px padding-top + 10px padding-bottom + ~20px text)
-        if self.text_list.count() > 0:
+        num_items = self.text_list.model().rowCount(self.text_list.rootIndex())
+        if num_items > 0:
             try:
                 # Пытаемся получить реальную высоту первого элемента
                 # sizeHintForRow может быть неточной без делегата, но для оценки сойдет
@@ -204,16 +274,14 @@ class TextSelectionPopup(QDialog):
                 if hint > 0 : item_height_estimate = hint + 2 # +2 для border
             except Exception:
                 pass # Используем estimate
-
-        num_items = self.text_list.count()
         
         # Высота содержимого списка
         content_height = item_height_estimate * num_items
         
-        # Внутренние отступы самого QListWidget (из CSS padding: 5px)
+        # Внутренние отступы самого QListView (из CSS padding: 5px)
         list_widget_vertical_padding = 5 * 2 
         
-        # Идеальная высота для QListWidget
+        # Идеальная высота для QListView
         ideal_list_height = content_height + list_widget_vertical_padding
         
         # Ограничиваем высоту списка
@@ -226,33 +294,86 @@ class TextSelectionPopup(QDialog):
         self.text_list.setMaximumHeight(int(target_list_height))
         # self.text_list.setFixedHeight(int(target_list_height)) # Можно и так
 
-        # Отступы самого QDialog (где лежит тень)
+        # Отступы самого QDialog (где лежит тень) и поле поиска над списком
         dialog_margins = self.layout().contentsMargins()
         dialog_vertical_margins = dialog_margins.top() + dialog_margins.bottom()
+        search_height = self.search_edit.sizeHint().height() + self.layout().spacing()
+        if not self.back_button.isHidden():
+            search_height += self.back_button.sizeHint().height() + self.layout().spacing()
         
-        total_height = int(target_list_height + dialog_vertical_margins)
+        total_height = int(target_list_height + dialog_vertical_margins + search_height)
         current_width = self.width() if self.width() > 100 else 400 # Оставляем ширину или дефолт
         
         # Устанавливаем размер всего QDialog
         self.setFixedSize(current_width, total_height)
-        print(f"Adjusted popup size: {num_items} items. ItemH_est: {item_height_estimate}. ListH: {target_list_height}. TotalH: {total_height}")
+        log.debug("Adjusted popup size: %s items. ItemH_est: %s. ListH: %s. TotalH: %s", num_items, item_height_estimate, target_list_height, total_height)
 
-    def on_text_selected(self, item):
-        item_type = item.data(Qt.UserRole + 1)
+    def on_text_selected(self, index):
+        item_type = index.data(TYPE_ROLE)
         if item_type == 'folder':
-            folder_obj = item.data(Qt.UserRole + 2)
-            self.folder_stack.append(folder_obj)
-            self.update_text_list()
-        elif item_type == 'back':
-            if self.folder_stack:
-                self.folder_stack.pop()
+            result_row = index.data(RESULT_ROLE)
+            if result_row is not None: # Папка из результатов поиска - переходим в неё из корня
+                self.folder_stack = self.folder_indexes(self.search_results[result_row].folders)
+                self.search_edit.clear() # Вызовет update_text_list
+            else:
+                self.folder_stack.append(QPersistentModelIndex(index))
                 self.update_text_list()
-        elif item_type == 'text' and item.data(Qt.UserRole) is not None:
-            selected_text = item.data(Qt.UserRole)
+        elif item_type == 'text' and index.data(TEXT_ROLE) is not None:
+            selected_text = index.data(TEXT_ROLE)
             self.close_with_animation(selected_text) # Закрываем с анимацией
-        
-    def show_at_cursor(self):
-        print("TextSelectionPopup.show_at_cursor() called")
+
+    def folder_indexes(self, folders):
+        """Индексы модели для цепочки папок (узлов Folder) от корня профиля."""
+        stack = []
+        for folder in folders:
+            index = self.model.index_of(folder)
+            if not index.isValid():
+                break
+            stack.append(QPersistentModelIndex(index))
+        return stack
+
+    def go_back(self):
+        if self.folder_stack:
+            self.folder_stack.pop()
+            self.update_text_list()
+
+    def mark_dirty(self, *args):
+        """Уведомление модели об изменении строк: размер окна пересчитается при показе."""
+        self._dirty = True
+        if self.isVisible():
+            self.adjust_popup_size()
+
+    def on_model_reset(self):
+        """После полной замены данных прежние индексы недействительны."""
+        self.root_index = QPersistentModelIndex(self.model.profile_index('popup'))
+        self.reset_view()
+
+    def reset_view(self):
+        """Возвращает окно к списку корневых папок без поиска."""
+        self._dirty = False
+        self.folder_stack = []
+        self.search_edit.blockSignals(True)
+        self.search_edit.clear()
+        self.search_edit.blockSignals(False)
+        self.update_text_list()
+
+    def paintEvent(self, event):
+        super(TextSelectionPopup, self).paintEvent(event)
+        if self._show_started is not None:
+            latency_ms = (time.perf_counter() - self._show_started) * 1000
+            self._show_started = None
+            if self.tracer is not None:
+                self.tracer.record('popup_paint', latency_ms / 1000)
+            log.debug("Popup first paint: %.1f ms after hotkey", latency_ms)
+
+    def show_at_cursor(self, started=None):
+        """Показывает окно у курсора; started - perf_counter() нажатия горячей клавиши."""
+        log.debug("TextSelectionPopup.show_at_cursor() called")
+        self._show_started = started if started is not None else time.perf_counter()
+        # Список перестраиваем, только если данные менялись или окно закрыли
+        # внутри папки/с поиском; иначе показываем готовый
+        if self._dirty or self.folder_stack or self.search_edit.text():
+            self.reset_view()
         cursor_pos = QCursor.pos()
         
         screens = QApplication.screens()
@@ -317,10 +438,10 @@ class TextSelectionPopup(QDialog):
                     SWP_NOMOVE | SWP_NOSIZE | SWP_SHOWWINDOW
                 )
             except Exception as e:
-                print(f"Windows API call failed: {e}")
+                log.error("Windows API call failed: %s", e)
         
         QApplication.processEvents() # Обработать события, чтобы анимация началась плавно
-        self.text_list.setFocus()
+        self.search_edit.setFocus()
 
     def close_with_animation(self, selected_value=None):
         # Можно добавить анимацию исчезновения, если очень хочется,
@@ -331,50 +452,43 @@ class TextSelectionPopup(QDialog):
         if self.geometry_anim.state() == QPropertyAnimation.Running:
             self.geometry_anim.stop()
         
-        self.close() # Это вызовет deleteLater из-за WA_DeleteOnClose
+        self.close() # Только скрывает окно, оно будет показано повторно
         if selected_value is not None:
-            # Небольшая задержка перед callback, чтобы окно успело исчезнуть
-            # QTimer.singleShot(50, lambda: self.callback(selected_value))
-            # Однако, если окно удаляется, callback должен быть вызван до его полного удаления
-            # или родительский объект должен быть устойчив к этому.
-            # WA_DeleteOnClose может вызвать проблемы, если callback обращается к popup.
-            # Лучше вызвать callback немедленно, а закрытие произойдет.
             self.callback(selected_value)
 
 
     def keyPressEvent(self, event):
         if event.key() == Qt.Key_Escape:
-            if self.folder_stack:
-                self.folder_stack.pop()
-                self.update_text_list()
+            if self.search_edit.text():
+                self.search_edit.clear() # Сначала сбрасываем поиск
+            elif self.folder_stack:
+                self.go_back()
             else:
                 self.close_with_animation() # Закрываем с анимацией (или без, если не реализована на закрытие)
         elif event.key() == Qt.Key_Return or event.key() == Qt.Key_Enter:
-            current_item = self.text_list.currentItem()
-            if current_item:
-                self.on_text_selected(current_item) # on_text_selected вызовет close_with_animation
-        elif event.key() == Qt.Key_Up:
-            current_row = self.text_list.currentRow()
-            if current_row > 0:
-                self.text_list.setCurrentRow(current_row - 1)
-        elif event.key() == Qt.Key_Down:
-            current_row = self.text_list.currentRow()
-            if current_row < self.text_list.count() - 1:
-                self.text_list.setCurrentRow(current_row + 1)
+            current_index = self.text_list.currentIndex()
+            if current_index.isValid():
+                self.on_text_selected(current_index) # on_text_selected вызовет close_with_animation
+        elif event.key() in (Qt.Key_Up, Qt.Key_Down):
+            current_row = self.text_list.currentIndex().row()
+            step = -1 if event.key() == Qt.Key_Up else 1
+            target = self.text_list.model().index(current_row + step, 0, self.text_list.rootIndex())
+            if target.isValid():
+                self.text_list.setCurrentIndex(target)
         else:
             super(TextSelectionPopup, self).keyPressEvent(event)
             
     def focusOutEvent(self, event):
         # Закрываем окно при потере фокуса, если это не связано с дочерними элементами
         if not self.isActiveWindow() and event.reason() != Qt.FocusReason.PopupFocusReason:
-             print(f"FocusOutEvent, reason: {event.reason()}. Closing popup.")
+             log.debug("FocusOutEvent, reason: %s. Closing popup.", event.reason())
              self.close_with_animation()
         super(TextSelectionPopup, self).focusOutEvent(event)
         
     def event(self, event):
         if event.type() == QEvent.WindowDeactivate:
             # Этот обработчик более надежен для закрытия при потере фокуса
-            print("WindowDeactivate event. Closing popup.")
+            log.debug("WindowDeactivate event. Closing popup.")
             self.close_with_animation()
             return True # Событие обработано
         return super(TextSelectionPopup, self).event(event)
@@ -0,0 +1,300 @@
+"""Стили оформления, собранные из палитры токенов.
+
+Каждый компонент (главное окно, заголовок, список, окно выбора, сегментный
+переключатель) описан шаблоном с токенами $name. Таблица стилей для пары
+(тема, компонент) собирается один раз и кэшируется. Главное окно ставит
+общую таблицу application_stylesheet, дочерние окна и диалоги наследуют её,
+поэтому смена темы - один setStyleSheet и один проход перерисовки стилей.
+"""
+from functools import lru_cache
+from string import Template
+
+THEMES = ('light', 'dark')
+
+PALETTES = {
+    'light': {
+        'window_bg': "#FFFFFF",
+        'window_border': "none",
+        'text': "#000000",
+        'border': "#C9C9C9",
+        'field_bg': "#FFFFFF",
+        'field_hover_bg': "#F5F5F5",
+        'button_bg': "#FFFFFF",
+        'button_border': "#CCCCCD",
+        'button_hover_bg': "#F9F9F9",
+        'disabled_bg': "#F0F0F0",
+        'disabled_text': "#A0A0A0",
+        'disabled_border': "#D0D0D0",
+        'selection_bg': "#AAD3FE",
+        'menu_bg': "#FFFFFF",
+        'scroll_handle': "#CCCCCC",
+        'scroll_handle_hover': "#BBBBBB",
+        'title_bg': "#F0F0F0",
+        'toggle_track': "#E4E4E4",
+        'accent': "#0A84FF",
+        'popup_bg': "#F2F2F7",
+        'popup_border': "rgba(0, 0, 0, 0.1)",
+        'popup_separator': "#E5E5EA",
+        'popup_selected_bg': "#E5E5EA",
+        'popup_hover_bg': "#DADADE",
+        'popup_highlight': "rgba(10, 132, 255, 0.2)",
+        'popup_shadow_alpha': 50,
+        'segment_border': "#C6C6C8",
+        'segment_text': "#333333",
+    },
+    'dark': {
+        'window_bg': "#1E1E1E",
+        'window_border': "1px solid #3C3C3C",
+        'text': "#FFFFFF",
+        'border': "#3C3C3C",
+        'field_bg': "#2D2D2D",
+        'field_hover_bg': "#3A3A3A",
+        'button_bg': "#2D2D2D",
+        'button_border': "#3C3C3C",
+        'button_hover_bg': "#3C3C3C",
+        'disabled_bg': "#1E1E1E",
+        'disabled_text': "#808080",
+        'disabled_border': "#2D2D2D",
+        'selection_bg': "#3C3C3C",
+        'menu_bg': "#2D2D2D",
+        'scroll_handle': "#555555",
+        'scroll_handle_hover': "#666666",
+        'title_bg': "#1E1E1E",
+        'toggle_track': "#3C3C3C",
+        'accent': "#0A84FF",
+        'popup_bg': "#2C2C2E",
+        'popup_border': "rgba(255, 255, 255, 0.1)",
+        'popup_separator': "#3A3A3C",
+        'popup_selected_bg': "#3A3A3C",
+        'popup_hover_bg': "#48484A",
+        'popup_highlight': "rgba(10, 132, 255, 0.35)",
+        'popup_shadow_alpha': 70,
+        'segment_border': "#505050",
+        'segment_text': "#E0E0E0",
+    },
+}
+
+# Полоса прокрутки без стрелок; $scope - виджет, к которому она относится,
+# $margin - отступ от его рамки
+_SCROLLBAR = """
+    $scope QScrollBar:vertical {
+        border: none;
+        background: transparent;
+        width: 8px;
+        margin: $margin;
+    }
+    $scope QScrollBar::handle:vertical {
+        background: $scroll_handle;
+        min-height: 25px;
+        border-radius: 4px;
+    }
+    $scope QScrollBar::handle:vertical:hover {
+        background: $scroll_handle_hover;
+    }
+    $scope QScrollBar::add-line:vertical, $scope QScrollBar::sub-line:vertical,
+    $scope QScrollBar::up-arrow:vertical, $scope QScrollBar::down-arrow:vertical,
+    $scope QScrollBar::add-page:vertical, $scope QScrollBar::sub-page:vertical {
+        border: none; background: none; height: 0px; width: 0px;
+    }
+"""
+
+TEMPLATES = {
+    # Базовые виджеты главного окна и его диалогов
+    'window': """
+        QMainWindow {
+            background-color: $window_bg;
+            color: $text;
+            border-radius: 10px;
+            border: $window_border;
+        }
+        QDialog, QWidget {
+            background-color: $window_bg;
+            color: $text;
+        }
+        QLabel {
+            color: $text;
+            font-family: 'Inter';
+            font-size: 16px;
+            font-weight: 400;
+        }
+        QLineEdit, QPlainTextEdit {
+            border: 1px solid $border;
+            border-radius: 5px;
+            padding: 5px;
+            font-family: 'Inter';
+            font-size: 16px;
+            font-weight: 400;
+            background-color: $field_bg;
+            color: $text;
+        }
+        QLineEdit#hotkeyDisplayLineEdit:hover {
+            background-color: $field_hover_bg;
+        }
+        QPushButton {
+            border: 1px solid $button_border;
+            border-radius: 5px;
+            padding: 5px 10px;
+            font-family: 'Inter';
+            font-size: 16px;
+            font-weight: 400;
+            background-color: $button_bg;
+            color: $text;
+        }
+        QPushButton:hover {
+            background-color: $button_hover_bg;
+        }
+        QPushButton:disabled {
+            background-color: $disabled_bg;
+            color: $disabled_text;
+            border-color: $disabled_border;
+        }
+        QListView {
+            border: 1px solid $border;
+            border-radius: 5px;
+            font-family: 'Inter';
+            font-size: 16px;
+            font-weight: 400;
+            background-color: $field_bg;
+            color: $text;
+        }
+        QListView::item:selected {
+            background-color: $selection_bg;
+        }
+        QCheckBox {
+            font-family: 'Inter';
+            font-size: 16px;
+            font-weight: 400;
+            color: $text;
+        }
+        QMenu {
+            background-color: $menu_bg;
+            color: $text;
+            border: 1px solid $border;
+        }
+        QMenu::item:selected {
+            background-color: $selection_bg;
+        }
+    """,
+    'title_bar': """
+        CustomTitleBar {
+            background-color: $title_bg;
+            color: $text;
+        }
+        CustomTitleBar QLabel {
+            color: $text;
+            font-family: 'Inter';
+            font-size: 14px;
+            font-weight: 500;
+        }
+    """,
+    'main_list': Template(_SCROLLBAR).safe_substitute(scope="QListView#mainList", margin="1px"),
+    # Окно выбора текста: список-контейнер, поле поиска и кнопка «Назад»
+    'popup': """
+        QListView#popupContainer {
+            border: 1px solid $popup_border;
+            border-radius: 8px;
+            font-family: 'Inter', 'San Francisco', sans-serif;
+            font-size: 14px;
+            font-weight: 400;
+            padding: 5px;
+            background-color: $popup_bg;
+            color: $text;
+        }
+        QListView#popupContainer::item {
+            padding: 10px 8px;
+            border-bottom: 1px solid $popup_separator;
+        }
+        QListView#popupContainer::item:last-child {
+            border-bottom: none;
+        }
+        QListView#popupContainer::item:selected {
+            background-color: $popup_selected_bg;
+            color: $text;
+            border-radius: 4px;
+        }
+        QListView#popupContainer::item:hover {
+            background-color: $popup_hover_bg;
+            border-radius: 4px;
+        }
+        QLineEdit#popupSearch {
+            border: 1px solid $popup_border;
+            border-radius: 8px;
+            font-family: 'Inter', 'San Francisco', sans-serif;
+            font-size: 14px;
+            padding: 6px 8px;
+            background-color: $popup_bg;
+            color: $text;
+        }
+        QPushButton#popupBack {
+            border: none;
+            text-align: left;
+            font-family: 'Inter', 'San Francisco', sans-serif;
+            font-size: 14px;
+            padding: 4px 8px;
+            background: transparent;
+            color: $accent;
+        }
+    """ + Template(_SCROLLBAR).safe_substitute(scope="QListView#popupContainer", margin="0px"),
+    # Сегментный переключатель темы в окне настроек
+    'segmented_control': """
+        QWidget#themeSegmentedControlContainer {
+            background-color: transparent;
+            border: 1px solid $segment_border;
+            border-radius: 7px;
+        }
+        QWidget#themeIndicator {
+            background-color: #34C759;
+            border-radius: 6px;
+        }
+        QWidget#themeSegmentedControlContainer QPushButton#themeSegmentButton {
+            background-color: transparent;
+            color: $segment_text;
+            border: none;
+            padding: 3px 10px;
+            font-size: 12px;
+            font-weight: 500;
+        }
+        QWidget#themeSegmentedControlContainer QPushButton#themeSegmentButton:!checked:hover {
+            background-color: rgba(128, 128, 128, 0.1);
+            border-radius: 6px;
+        }
+        QWidget#themeSegmentedControlContainer QPushButton#themeSegmentButton:checked {
+            color: #FFFFFF;
+            background-color: transparent;
+            font-weight: 600;
+        }
+    """,
+}
+
+# Компоненты общей таблицы главного окна в порядке следования
+APPLICATION_COMPONENTS = ('window', 'title_bar', 'main_list', 'popup', 'segmented_control')
+
+
+def theme_name(is_dark):
+    return 'dark' if is_dark else 'light'
+
+
+def token(theme, name):
+    """Значение токена палитры (для цветов, которые рисуются не через стили)."""
+    return PALETTES[theme][name]
+
+
+@lru_cache(maxsize=None)
+def stylesheet(theme, component):
+    """Таблица стилей компонента для темы; собирается один раз."""
+    return Template(TEMPLATES[component]).substitute(PALETTES[theme])
+
+
+@lru_cache(maxsize=None)
+def application_stylesheet(theme):
+    """Общая таблица главного окна: все компоненты одной строкой."""
+    return "\n".join(stylesheet(theme, component) for component in APPLICATION_COMPONENTS)
+
+
+def apply_stylesheet(widget, sheet):
+    """Ставит таблицу стилей, только если она отличается от текущей:
+    повторный setStyleSheet заново разбирает стили и обходит всё дерево виджетов."""
+    if widget.styleSheet() != sheet:
+        widget.setStyleSheet(sheet)
+        return True
+    return False
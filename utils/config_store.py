@@ -0,0 +1,84 @@
+import os
+import threading
+
+
+def atomic_write_text(path, text):
+    """Записывает файл целиком через временный файл и атомарное переименование.
+
+    При сбое посреди записи на диске остаётся либо старая, либо новая версия."""
+    import tempfile # Нужен только при записи; не замедляет импорт ядра (models/snippet_store.py)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class ConfigWriter:
+    """Фоновая запись файла конфигурации.
+
+    write_async только запоминает последнюю версию текста и будит поток записи,
+    поэтому несколько сохранений подряд превращаются в одну запись на диск.
+    on_error и on_written вызываются из потока записи.
+    """
+
+    def __init__(self, path, on_error=None):
+        self.path = path
+        self.on_error = on_error
+        self._condition = threading.Condition()
+        self._pending = None
+        self._on_written = None
+        self._writing = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="ConfigWriter", daemon=True)
+        self._thread.start()
+
+    def write_async(self, text, on_written=None):
+        """Планирует запись text; on_written() вызывается после успешной записи."""
+        with self._condition:
+            self._pending = text
+            self._on_written = on_written
+            self._condition.notify_all()
+
+    def flush(self, timeout=5.0):
+        """Ждёт, пока ожидающая версия будет записана на диск."""
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: self._pending is None and not self._writing, timeout)
+
+    def close(self):
+        self.flush()
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(1.0)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending is not None or self._closed)
+                if self._pending is None and self._closed:
+                    return
+                text, self._pending = self._pending, None
+                on_written, self._on_written = self._on_written, None
+                self._writing = True
+            try:
+                atomic_write_text(self.path, text)
+                if on_written:
+                    on_written()
+            except Exception as e:
+                if self.on_error:
+                    self.on_error(str(e))
+            finally:
+                with self._condition:
+                    self._writing = False
+                    self._condition.notify_all()
@@ -0,0 +1,83 @@
+"""Замер времени импорта модулей при запуске, как python -X importtime,
+но силами самого приложения (работает и в собранном .exe).
+
+Включается переменной окружения TEXT_ROTATOR_IMPORT_REPORT=<файл отчёта>:
+main.py ставит перехватчик до импорта Qt и окна, а после запуска пишет
+отчёт в JSON и краткую сводку в журнал.
+"""
+import builtins
+import json
+import os
+import sys
+import threading
+import time
+
+IMPORT_REPORT_ENV_VAR = "TEXT_ROTATOR_IMPORT_REPORT"
+
+
+class ImportProfiler:
+    """Оборачивает builtins.__import__ и для каждого импорта, загрузившего
+    новые модули, запоминает собственное и полное время (в порядке завершения,
+    с глубиной вложенности - как строки -X importtime)."""
+
+    def __init__(self):
+        self.records = [] # (модуль, глубина, собственное время, полное время) в секундах
+        self._local = threading.local() # Стек вложенных импортов свой у каждого потока
+        self._original = None
+
+    def install(self):
+        self._original = builtins.__import__
+        builtins.__import__ = self._import
+        return self
+
+    def uninstall(self):
+        if self._original is not None:
+            builtins.__import__ = self._original
+            self._original = None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        stack = self._local.__dict__.setdefault('stack', [])
+        loaded_before = len(sys.modules)
+        stack.append(0.0) # Время вложенных импортов
+        start = time.perf_counter()
+        try:
+            return self._original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            if len(sys.modules) > loaded_before: # Уже загруженные модули не интересны
+                module = name if level == 0 else "." * level + name
+                self.records.append((module, len(stack), elapsed - children, elapsed))
+
+    def total_ms(self):
+        """Полное время импортов верхнего уровня."""
+        return sum(record[3] for record in self.records if record[1] == 0) * 1000
+
+    def report(self, limit=25):
+        """Словарь для JSON: общее время, самые долгие импорты верхнего уровня
+        и все записи в формате -X importtime."""
+        top = sorted((record for record in self.records if record[1] == 0), key=lambda record: -record[3])
+        return {
+            'total_ms': round(self.total_ms(), 3),
+            'modules_loaded': len(sys.modules),
+            'top': [{'module': module, 'cumulative_ms': round(cumulative * 1000, 3)}
+                    for module, _depth, _self, cumulative in top[:limit]],
+            'importtime': [{'module': module, 'depth': depth, 'self_us': round(own * 1e6),
+                            'cumulative_us': round(cumulative * 1e6)}
+                           for module, depth, own, cumulative in self.records],
+        }
+
+    def write_report(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
+
+
+def start_from_env():
+    """Запускает ImportProfiler, если задана переменная окружения. Возвращает
+    (профайлер, путь отчёта) или (None, None)."""
+    path = os.environ.get(IMPORT_REPORT_ENV_VAR)
+    if not path:
+        return None, None
+    return ImportProfiler().install(), path
@@ -0,0 +1,140 @@
+import logging
+import os
+import queue
+import sys
+import threading
+import traceback
+from collections import deque
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# Уровень можно поднять для отладки: TEXT_ROTATOR_LOG_LEVEL=DEBUG
+LOG_LEVEL_ENV_VAR = "TEXT_ROTATOR_LOG_LEVEL"
+LOG_FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+
+
+class BoundedQueueHandler(QueueHandler):
+    """QueueHandler с ограниченной очередью: при переполнении запись
+    отбрасывается, а не блокирует горячую клавишу или GUI-поток."""
+
+    def __init__(self, log_queue):
+        super(BoundedQueueHandler, self).__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class RingBufferHandler(logging.Handler):
+    """Последние capacity сообщений в памяти: попадают в отчёт о падении
+    (LogService.write_crash_report) и в экспорт диагностики из окна настроек."""
+
+    def __init__(self, capacity=500):
+        super(RingBufferHandler, self).__init__()
+        self.records = deque(maxlen=capacity)
+
+    def emit(self, record):
+        self.records.append(self.format(record))
+
+    def lines(self):
+        return list(self.records)
+
+
+class LogService:
+    """Журнал приложения на стандартном logging.
+
+    Модули пишут в logging.getLogger(__name__) с ленивым форматированием
+    (log.debug("... %s", value)): если уровень выключен, строка не
+    собирается. Вызывающий поток только кладёт запись в ограниченную
+    очередь; фоновый поток QueueListener пишет её в ротируемый файл,
+    в кольцевой буфер и в консоль (если она есть).
+
+    Необработанное исключение (в GUI-потоке или любом другом) пишется в
+    журнал, а вместе с последними сообщениями из кольцевого буфера - в
+    отдельный отчёт <журнал>_crash.log.
+    """
+
+    QUEUE_SIZE = 1000
+    MAX_BYTES = 1024 * 1024
+    BACKUP_COUNT = 3
+
+    def __init__(self, log_file, level=None):
+        self.crash_file = os.path.splitext(log_file)[0] + "_crash.log"
+        self._previous_hooks = None
+        level_name = level or os.environ.get(LOG_LEVEL_ENV_VAR, "INFO")
+        self.level = getattr(logging, level_name.upper(), logging.INFO)
+        formatter = logging.Formatter(LOG_FORMAT)
+
+        self.ring = RingBufferHandler()
+        self.ring.setFormatter(formatter)
+        handlers = [self.ring]
+        try:
+            file_handler = RotatingFileHandler(log_file, maxBytes=self.MAX_BYTES, backupCount=self.BACKUP_COUNT,
+                                               encoding='utf-8', delay=True)
+            file_handler.setFormatter(formatter)
+            handlers.append(file_handler)
+        except OSError as e:
+            if sys.stderr is not None:
+                sys.stderr.write(f"Не удалось открыть журнал {log_file}: {e}\n")
+        if sys.stderr is not None: # В собранном оконном приложении консоли нет
+            console = logging.StreamHandler(sys.stderr)
+            console.setFormatter(formatter)
+            handlers.append(console)
+
+        self.queue_handler = BoundedQueueHandler(queue.Queue(maxsize=self.QUEUE_SIZE))
+        self.listener = QueueListener(self.queue_handler.queue, *handlers)
+
+    def start(self):
+        root = logging.getLogger()
+        root.setLevel(self.level)
+        root.addHandler(self.queue_handler)
+        self.listener.start()
+        self._previous_hooks = (sys.excepthook, threading.excepthook)
+        sys.excepthook = self._excepthook
+        threading.excepthook = self._thread_excepthook
+        return self
+
+    def recent_lines(self):
+        """Последние сообщения журнала (из кольцевого буфера)."""
+        return self.ring.lines()
+
+    def write_crash_report(self, exc_info, thread_name=None):
+        """Пишет отчёт о падении: трассировку и последние сообщения журнала."""
+        header = f"Необработанное исключение в потоке {thread_name}\n" if thread_name else "Необработанное исключение\n"
+        text = (header + "".join(traceback.format_exception(*exc_info))
+                + "\nПоследние сообщения журнала:\n" + "\n".join(self.recent_lines()) + "\n")
+        try:
+            with open(self.crash_file, 'w', encoding='utf-8') as f:
+                f.write(text)
+        except OSError as e:
+            if sys.stderr is not None:
+                sys.stderr.write(f"Не удалось записать отчёт о падении {self.crash_file}: {e}\n")
+
+    def _excepthook(self, exc_type, exc, tb):
+        logging.getLogger(__name__).critical("Необработанное исключение", exc_info=(exc_type, exc, tb))
+        self.write_crash_report((exc_type, exc, tb))
+
+    def _thread_excepthook(self, args):
+        if args.exc_type is SystemExit:
+            return
+        name = args.thread.name if args.thread is not None else None
+        logging.getLogger(__name__).critical("Необработанное исключение в потоке %s", name,
+                                             exc_info=(args.exc_type, args.exc_value, args.exc_traceback))
+        self.write_crash_report((args.exc_type, args.exc_value, args.exc_traceback), name)
+
+    def stop(self):
+        """Дописывает очередь в файл и останавливает фоновый поток."""
+        if self._previous_hooks is not None:
+            sys.excepthook, threading.excepthook = self._previous_hooks
+            self._previous_hooks = None
+        logging.getLogger().removeHandler(self.queue_handler)
+        self.listener.stop()
+        for handler in self.listener.handlers:
+            handler.close()
+
+
+def setup_logging(log_file, level=None):
+    """Настраивает журнал приложения и возвращает запущенный LogService."""
+    return LogService(log_file, level).start()
@@ -1,3 +1,4 @@
+import logging
 import os
 import sys
 import json
@@ -10,6 +11,8 @@ import winreg
 import time
 from packaging import version
 
+log = logging.getLogger(__name__)
+
 class Updater:
     def __init__(self, current_version, github_api_url, asset_name="TextRotator.exe"):
         self.current_version = current_version
@@ -62,7 +65,7 @@ class Updater:
                 
                 return {"available": False} # Текущая версия актуальна
         except Exception as e:
-            print(f"Error in check_for_updates: {e}")
+            log.error("Error in check_for_updates: %s", e)
             return {"available": False, "error": str(e)}
 
     def download_update(self, download_url, progress_callback=None):
@@ -323,7 +326,7 @@ exit 0
                 f.write(ps_script)
             return script_path
         except Exception as e:
-            print(f"Error writing updater script: {e}")
+            log.error("Error writing updater script: %s", e)
             return None
 
     def install_update(self, current_exe_path, update_file_path):
@@ -345,7 +348,7 @@ exit 0
                     os.startfile(update_file_path)
                     # Важно: приложение должно быть закрыто ДО или ВО ВРЕМЯ запуска MSI.
                     # Вызываем sys.exit() здесь, чтобы закрыть текущее приложение.
-                    print("Запуск MSI установщика и выход из приложения...")
+                    log.info("Запуск MSI установщика и выход из приложения...")
                     sys.exit(0) 
                     # return {"success": True} # Этот код не будет достигнут из-за sys.exit()
                 except Exception as e:
@@ -364,7 +367,7 @@ exit 0
                         stdout=subprocess.DEVNULL, # Скрываем вывод PowerShell
                         stderr=subprocess.DEVNULL
                     )
-                    print(f"Запущен скрипт обновления: {updater_script_path}")
+                    log.info("Запущен скрипт обновления: %s", updater_script_path)
                     # После запуска скрипта обновления, текущее приложение должно завершиться,
                     # чтобы скрипт мог заменить его файлы.
                     sys.exit(0) # Завершаем текущее приложение
@@ -409,10 +412,10 @@ exit 0
         return False, None
     
     def add_to_startup(self, app_path, app_name="TextRotator"):
-        """Добавляет приложение в автозапуск Windows."""
+        """Добавляет приложение в автозапуск Windows (с ключом --tray: сразу в трей с включёнными клавишами)."""
         try:
             if not os.path.exists(app_path):
-                print(f"Предупреждение: Файл для автозапуска {app_path} не существует.")
+                log.warning("Файл для автозапуска %s не существует.", app_path)
                 # Можно вернуть False или продолжить, если предполагается, что файл будет создан позже
                 # return False 
             
@@ -420,10 +423,10 @@ exit 0
             key_path = r"SOFTWARE\Microsoft\Windows\CurrentVersion\Run"
             
             with winreg.OpenKey(winreg.HKEY_CURRENT_USER, key_path, 0, winreg.KEY_SET_VALUE) as key:
-                winreg.SetValueEx(key, app_name, 0, winreg.REG_SZ, f'"{app_path}"') # Путь в кавычках
+                winreg.SetValueEx(key, app_name, 0, winreg.REG_SZ, f'"{app_path}" --tray') # Путь в кавычках
             return True
         except Exception as e:
-            print(f"Ошибка добавления в автозапуск: {e}")
+            log.error("Ошибка добавления в автозапуск: %s", e)
             return False
     
     def remove_from_startup(self, app_name="TextRotator"):
@@ -435,11 +438,11 @@ exit 0
                     winreg.DeleteValue(key, app_name)
                 except FileNotFoundError:
                     # Если значение не найдено, считаем, что его уже нет (успех)
-                    print(f"Запись автозапуска '{app_name}' не найдена, удаление не требуется.")
+                    log.warning("Запись автозапуска '%s' не найдена, удаление не требуется.", app_name)
                     pass 
             return True
         except Exception as e:
-            print(f"Ошибка удаления из автозапуска: {e}")
+            log.error("Ошибка удаления из автозапуска: %s", e)
             return False
             
     def cleanup_temp_files(self):
@@ -449,6 +452,6 @@ exit 0
                 shutil.rmtree(self.temp_dir, ignore_errors=True) # ignore_errors=True для большей надежности
             return True
         except Exception as e:
-            print(f"Ошибка при очистке временных файлов: {e}")
+            log.error("Ошибка при очистке временных файлов: %s", e)
             return False
 